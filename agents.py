@@ -9,79 +9,338 @@ os.environ["GRPC_VERBOSITY"] = "ERROR" # Silences low-level gRPC logs
 os.environ["GLOG_minloglevel"] = "2"   # Silences TensorFlow/JAX logs often used by GenAI
 # -----------------------------------------------------------
 
+import re
 import time
 import json
-import google.generativeai as genai
+import threading
+from collections import OrderedDict
 import config
-from schemas import FileIndex, RoutingDecision, AuditResult
+import llm_providers
+from schemas import FileIndex, RoutingDecision, AuditResult, GroupedAuditItem, GroupedAuditResult, VerdictReuseCheck
 from pypdf import PdfReader
-from typing import List, Type, Dict, Optional, Tuple, Any
+from typing import List, Type, Dict, Optional, Tuple, Any, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
+from tracing import tracer, bind_context
+from text_normalizer import normalize_pages
 
 console = Console()
 
 class RateLimitManager:
+    """Process-wide limiter: every thread (and Streamlit session) shares the same quota."""
     def __init__(self):
         self.last_call = 0
         self.interval = 60 / config.RATE_LIMIT_CALLS
+        self._lock = threading.Lock()
 
     def wait(self):
-        now = time.time()
-        elapsed = now - self.last_call
-        if elapsed < self.interval:
-            time.sleep(self.interval - elapsed)
-        self.last_call = time.time()
+        # Reserve the next free slot under the lock, then sleep outside it
+        with self._lock:
+            slot = max(time.time(), self.last_call + self.interval)
+            self.last_call = slot
+        delay = slot - time.time()
+        if delay > 0:
+            # Reported as its own stage so sleeps are not mistaken for model latency
+            with tracer.span("llm.rate_limit_wait"):
+                time.sleep(delay)
 
 rate_limiter = RateLimitManager()
 
+# --- CANCELLATION ---
+# Background jobs (jobs.py) register a threading.Event for their worker thread;
+# once it is set, no further LLM call is started from that thread.
+class AuditCancelled(Exception):
+    pass
+
+_call_context = threading.local()
+
+def set_cancel_event(event: Optional[threading.Event]):
+    _call_context.cancel_event = event
+
+def get_cancel_event() -> Optional[threading.Event]:
+    return getattr(_call_context, "cancel_event", None)
+
+def check_cancelled():
+    event = getattr(_call_context, "cancel_event", None)
+    if event is not None and event.is_set():
+        raise AuditCancelled()
+
 def configure_genai():
-    genai.configure(api_key=config.GOOGLE_API_KEY)
+    """Configures the Gemini client when any agent uses it (see llm_providers.py)."""
+    llm_providers.configure_providers()
+
+# --- EXTRACTED TEXT CACHE ---
+# Optional object with get(filepath) -> Optional[List[str]] and put(filepath, pages),
+# e.g. the content-addressed BlobStore used by the Streamlit app. It holds the raw
+# page texts, so NORMALIZE_TEXT and EVIDENCE_MAX_CHARS are applied on every read.
+_text_cache = None
+
+def set_text_cache(cache):
+    global _text_cache
+    _text_cache = cache
 
-def extract_text_from_pdf(filepath: str) -> str:
+class SharedLRU:
+    """
+    Thread-safe LRU of at most `size` entries (config value read on use). A miss
+    that is already being computed by another thread waits for that result
+    instead of computing it again, so prefetches and readers never parse twice.
+    """
+    def __init__(self, size: Callable[[], int]):
+        self._size = size
+        self._items: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._pending: Dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def peek(self, key: tuple) -> Optional[Any]:
+        """Cached value (waiting for one in progress), or None without computing it."""
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            pending.wait()
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def get_or_compute(self, key: Optional[tuple], compute: Callable[[], Any]) -> Any:
+        if key is None or not self._size():
+            return compute()
+        while True:
+            with self._lock:
+                if key in self._items:
+                    self._items.move_to_end(key)
+                    return self._items[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Another thread is computing it: wait, then re-check (it may have failed)
+            pending.wait()
+        try:
+            value = compute()
+            with self._lock:
+                self._items[key] = value
+                while len(self._items) > self._size():
+                    self._items.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+# In-process LRUs in front of PDF parsing: the scheduler runs requirements that
+# share files back to back, so the same evidence is requested repeatedly, and
+# pipeline prefetches fill them while the Router is still deciding.
+_extract_lru = SharedLRU(lambda: config.EXTRACT_CACHE_SIZE)   # evidence text per (file, pages)
+_pages_lru = SharedLRU(lambda: config.EXTRACT_CACHE_SIZE)     # raw page texts per file
+
+def _extract_key(filepath: str) -> Optional[tuple]:
     try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns)
+
+def _parse_pages(filepath: str) -> List[str]:
+    with tracer.span("pdf.extract", file=os.path.basename(filepath)):
         reader = PdfReader(filepath)
-        text = ""
-        for page in reader.pages:
-            extract = page.extract_text()
-            if extract:
-                text += extract + "\n"
-        return text[:30000] 
+        return [page.extract_text() or "" for page in reader.pages]
+
+def iter_pdf_pages(filepath: str) -> Iterator[str]:
+    """Raw text of each page in order, parsed one page at a time and not cached (long legal PDFs)."""
+    reader = PdfReader(filepath)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+def _load_raw_pages(filepath: str) -> List[str]:
+    pages = _text_cache.get(filepath) if _text_cache is not None else None
+    if pages is None:
+        pages = _parse_pages(filepath)
+        if _text_cache is not None:
+            _text_cache.put(filepath, pages)
+    return pages
+
+def read_raw_pages(filepath: str) -> List[str]:
+    """Text of every page before normalization (cached). Raises on unreadable files."""
+    return _pages_lru.get_or_compute(_extract_key(filepath), lambda: _load_raw_pages(filepath))
+
+def extract_pages_with_stats(filepath: str) -> Tuple[List[str], Dict]:
+    """
+    Text of every page (empty string for pages without text), normalized when
+    NORMALIZE_TEXT is on, plus the normalization stats. Raises on unreadable files.
+    """
+    pages = list(read_raw_pages(filepath))
+    if not config.NORMALIZE_TEXT:
+        chars = sum(len(p) for p in pages)
+        return pages, {"raw_chars": chars, "clean_chars": chars, "compression_ratio": 1.0, "boilerplate_lines": 0}
+    with tracer.span("pdf.normalize", file=os.path.basename(filepath)):
+        return normalize_pages(pages)
+
+def extract_pages_from_pdf(filepath: str) -> List[str]:
+    return extract_pages_with_stats(filepath)[0]
+
+# --- PAGE-SELECTIVE EXTRACTION ---
+PAGE_SPEC = re.compile(r"(\d+)\s*(?:-|–|a|to)\s*(\d+)|(\d+)")
+
+def parse_page_ranges(spec: str, page_count: int, margin: int = 0) -> List[int]:
+    """Sorted 1-based page numbers of a spec like "4-8, 12", widened by `margin` and clipped to the document."""
+    pages = set()
+    for start, end, single in PAGE_SPEC.findall(spec or ""):
+        first, last = (int(start), int(end)) if start else (int(single), int(single))
+        first, last = min(first, last) - margin, max(first, last) + margin
+        pages.update(range(max(first, 1), min(last, page_count) + 1))
+    return sorted(pages)
+
+def extract_selected_pages(filepath: str, spec: str) -> Optional[str]:
+    """
+    Text of only the pages in `spec` (PAGE_RANGE_MARGIN around each range), each
+    prefixed with its [Página N] marker. None if the spec names no page of the file.
+    """
+    key = _extract_key(filepath)
+    cached = _pages_lru.peek(key) if key is not None else None
+    with tracer.span("pdf.extract_pages", file=os.path.basename(filepath)):
+        if cached is not None:
+            # The whole file was already parsed (e.g. prefetched): slice it
+            numbers = parse_page_ranges(spec, len(cached), config.PAGE_RANGE_MARGIN)
+            pages = [cached[n - 1] for n in numbers]
+        else:
+            reader = PdfReader(filepath)
+            numbers = parse_page_ranges(spec, len(reader.pages), config.PAGE_RANGE_MARGIN)
+            pages = [reader.pages[n - 1].extract_text() or "" for n in numbers]
+        if not numbers:
+            return None
+    if config.NORMALIZE_TEXT:
+        with tracer.span("pdf.normalize", file=os.path.basename(filepath)):
+            pages, _ = normalize_pages(pages)
+    text = "".join(f"[Página {n}]\n{page}\n" for n, page in zip(numbers, pages) if page)
+    return text[:config.EVIDENCE_MAX_CHARS]
+
+def _extract_text(filepath: str, pages: Optional[str]) -> str:
+    if pages:
+        text = extract_selected_pages(filepath, pages)
+        if text is not None:
+            return text
+    text = "".join(page + "\n" for page in extract_pages_from_pdf(filepath) if page)
+    return text[:config.EVIDENCE_MAX_CHARS]
+
+def extract_text_from_pdf(filepath: str, pages: Optional[str] = None) -> str:
+    """
+    Extracted text, truncated to EVIDENCE_MAX_CHARS. With `pages` (e.g. "4-8, 12")
+    only those pages are parsed, so evidence beyond the cutoff of the whole text
+    stays reachable; a spec that matches no page falls back to the whole file.
+    """
+    key = _extract_key(filepath)
+    if key is not None:
+        key += (pages, config.NORMALIZE_TEXT, config.EVIDENCE_MAX_CHARS)
+    try:
+        return _extract_lru.get_or_compute(key, lambda: _extract_text(filepath, pages))
     except Exception as e:
         return f"Error reading PDF: {e}"
 
+def chunk_pages(pages: List[str], max_chars: int) -> List[Tuple[int, int, str]]:
+    """
+    Groups consecutive pages into chunks of at most max_chars characters.
+    Returns (first_page, last_page, text) with 1-based page numbers; every page
+    is prefixed with a [Página N] marker so the model can report real page ranges.
+    """
+    chunks = []
+    start, buffer = None, ""
+    for number, page in enumerate(pages, start=1):
+        block = f"[Página {number}]\n{page}\n"[:max_chars]
+        if buffer and len(buffer) + len(block) > max_chars:
+            chunks.append((start, number - 1, buffer))
+            start, buffer = None, ""
+        if start is None:
+            start = number
+        buffer += block
+    if buffer:
+        chunks.append((start, len(pages), buffer))
+    return chunks
+
+# --- STREAMING ---
+def partial_json_field(text: str, field: str) -> Optional[str]:
+    """Value of a string field in JSON that may still be incomplete (streamed)."""
+    match = re.search(rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)', text)
+    if not match:
+        return None
+    raw = match.group(1)
+    for candidate in (raw, raw[:-1]):   # a chunk can end in the middle of an escape
+        try:
+            return json.loads(f'"{candidate}"')
+        except json.JSONDecodeError:
+            continue
+    return raw
+
 class BaseAgent:
     # --- CHANGED: Accept temperature in init ---
-    def __init__(self, model_name, temperature):
+    def __init__(self, model_name, temperature, provider="gemini"):
         self.model_name = model_name
         self.temperature = temperature
-        self.model = genai.GenerativeModel(model_name)
+        self.provider = provider
+        self.model = llm_providers.create_model(provider, model_name)
+
+    def _stream(self, prompt: str, generation_config: Dict,
+                on_text: Optional[Callable[[str], None]] = None) -> Tuple[str, Any, float]:
+        """Streams the response; returns (full text, usage metadata, time to first token)."""
+        start = time.perf_counter()
+        ttft = None
+        parts = []
+        usage_metadata = None
+        for chunk in self.model.generate_content(prompt, generation_config=generation_config, stream=True):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+                tracer.record("llm.ttft", ttft, model=self.model_name)
+            try:
+                parts.append(chunk.text)
+            except ValueError:
+                pass  # chunk without text (e.g. only the finish reason)
+            usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+            if on_text:
+                on_text("".join(parts))
+        return "".join(parts), usage_metadata, ttft
 
-    def generate_structured(self, prompt: str, schema: Type) -> Tuple[Optional[Any], Dict]:
-        rate_limiter.wait()
+    def generate_structured(self, prompt: str, schema: Type, stream: bool = False,
+                            on_text: Optional[Callable[[str], None]] = None) -> Tuple[Optional[Any], Dict]:
+        """
+        stream=True receives the response in chunks: on_text gets the accumulated
+        text after each one and usage["ttft_seconds"] the time to first token.
+        The complete text is validated against `schema` either way.
+        """
+        check_cancelled()
+        if self.provider != "openai":
+            # The quota belongs to the hosted API; a local server is not rate limited
+            rate_limiter.wait()
+            check_cancelled()
         usage = {"input_tokens": 0, "output_tokens": 0}
         
         try:
             # --- CHANGED: Pass temperature to generation_config ---
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "response_mime_type": "application/json",
-                    "temperature": self.temperature 
-                }
-            )
+            generation_config = {
+                "response_mime_type": "application/json",
+                "temperature": self.temperature
+            }
+            with tracer.span("llm.generate", model=self.model_name, provider=self.provider, schema=schema.__name__):
+                if stream:
+                    text, usage_metadata, usage["ttft_seconds"] = self._stream(prompt, generation_config, on_text)
+                else:
+                    response = self.model.generate_content(prompt, generation_config=generation_config)
+                    text, usage_metadata = response.text, response.usage_metadata
             
-            if response.usage_metadata:
-                usage["input_tokens"] = response.usage_metadata.prompt_token_count
-                usage["output_tokens"] = response.usage_metadata.candidates_token_count
+            if usage_metadata:
+                usage["input_tokens"] = usage_metadata.prompt_token_count
+                usage["output_tokens"] = usage_metadata.candidates_token_count
             
             if usage["input_tokens"] == 0:
                 try:
-                    count_resp = self.model.count_tokens(prompt)
+                    with tracer.span("llm.count_tokens", model=self.model_name):
+                        count_resp = self.model.count_tokens(prompt)
                     usage["input_tokens"] = count_resp.total_tokens
                 except:
                     pass
 
-            return schema.model_validate_json(response.text), usage
+            with tracer.span("llm.parse", schema=schema.__name__):
+                return schema.model_validate_json(text), usage
             
         except Exception as e:
             console.print(f"[bold red]API Error:[/bold red] {e}")
@@ -90,17 +349,55 @@ class BaseAgent:
 class CatalogerAgent(BaseAgent):
     def __init__(self):
         # Pass Specific Temp
-        super().__init__(config.MODEL_CATALOGER, config.TEMP_CATALOGER)
+        super().__init__(config.MODEL_CATALOGER, config.TEMP_CATALOGER, config.PROVIDER_CATALOGER)
 
     def analyze_file(self, filepath: str) -> Tuple[Optional[FileIndex], Dict]:
-        import os
         filename = os.path.basename(filepath)
-        content = extract_text_from_pdf(filepath)
-        
+        try:
+            pages, text_stats = extract_pages_with_stats(filepath)
+        except Exception as e:
+            return self._analyze_text(filename, f"Error reading PDF: {e}")
+
+        result, usage = self._analyze_pages(filename, pages)
+        usage["compression_ratio"] = text_stats["compression_ratio"]
+        return result, usage
+
+    def _analyze_pages(self, filename: str, pages: List[str]) -> Tuple[Optional[FileIndex], Dict]:
+        # Short files: a single call, as before
+        if sum(len(p) for p in pages) <= config.CATALOG_CHUNK_CHARS:
+            content = "".join(page + "\n" for page in pages if page)
+            return self._analyze_text(filename, content[:config.CATALOG_CHUNK_CHARS])
+
+        # --- MAP: page-aligned chunks cataloged in parallel ---
+        chunks = chunk_pages(pages, config.CATALOG_CHUNK_CHARS)
+        if config.CATALOG_MAX_CHUNKS:
+            chunks = chunks[:config.CATALOG_MAX_CHUNKS]
+        cancel_event = get_cancel_event()
+
+        def analyze_chunk(part):
+            set_cancel_event(cancel_event)  # Cancellation follows the caller into the pool
+            i, (first, last, text) = part
+            position = f"Part {i + 1} of {len(chunks)} (pages {first}-{last} of {len(pages)})"
+            return self._analyze_text(filename, text, position)
+
+        with ThreadPoolExecutor(max_workers=config.CATALOG_CONCURRENCY) as pool:
+            partials = list(pool.map(bind_context(analyze_chunk), enumerate(chunks)))
+
+        # --- REDUCE ---
+        return merge_file_indexes(filename, [(c[0], c[1]) for c in chunks], partials)
+
+    def _analyze_text(self, filename: str, content: str, position: Optional[str] = None) -> Tuple[Optional[FileIndex], Dict]:
+        scope = ""
+        if position:
+            scope = f"""
+        Scope: {position}. This is only an excerpt of the file.
+        Each page starts with a [Página N] marker: use those absolute numbers for page_ranges.
+        """
+
         prompt = f"""
         You are a Forensic Document Analyst.
         Target File: {filename}
-        
+        {scope}
         Analyze the text below. Ignore the filename.
         1. List every Environmental Plan, Baseline Component, or Social Program.
         2. List every Table and Figure caption exactly as written.
@@ -127,13 +424,54 @@ class CatalogerAgent(BaseAgent):
             result.filename = filename 
         return result, usage
 
+def merge_file_indexes(filename: str, spans: List[Tuple[int, int]],
+                       partials: List[Tuple[Optional[FileIndex], Dict]]) -> Tuple[Optional[FileIndex], Dict]:
+    """Combines per-chunk catalog results into a single FileIndex; usage is summed."""
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    topics, tables, summaries = {}, {}, []
+    page_ranges: Dict[str, List[str]] = {}
+
+    for (first, last), (result, part_usage) in zip(spans, partials):
+        usage["input_tokens"] += part_usage.get("input_tokens", 0)
+        usage["output_tokens"] += part_usage.get("output_tokens", 0)
+        if not result:
+            continue
+        # Keep first spelling, dedupe case-insensitively
+        for topic in result.topics_detected:
+            topics.setdefault(topic.strip().lower(), topic.strip())
+        for table in result.tables_and_figures:
+            tables.setdefault(table.strip().lower(), table.strip())
+        summaries.append(f"(pp. {first}-{last}) {result.content_summary}")
+        for topic, pages in result.page_ranges.items():
+            key = topics.get(topic.strip().lower(), topic.strip())
+            if pages not in page_ranges.setdefault(key, []):
+                page_ranges[key].append(pages)
+
+    if not summaries:
+        return None, usage
+
+    merged = FileIndex(
+        filename=filename,
+        topics_detected=list(topics.values()),
+        tables_and_figures=list(tables.values()),
+        content_summary=" ".join(summaries),
+        page_ranges={topic: ", ".join(ranges) for topic, ranges in page_ranges.items()}
+    )
+    return merged, usage
+
 class RouterAgent(BaseAgent):
     def __init__(self):
         # Pass Specific Temp
-        super().__init__(config.MODEL_ROUTER, config.TEMP_ROUTER)
+        super().__init__(config.MODEL_ROUTER, config.TEMP_ROUTER, config.PROVIDER_ROUTER)
 
     def route(self, requirement: str, project_index: List[Dict]) -> Tuple[Optional[RoutingDecision], Dict]:
         index_str = json.dumps(project_index, indent=2)
+
+        pages_logic, pages_format = "", ""
+        if config.ROUTE_PAGE_RANGES:
+            pages_logic = """4. Page Ranges: For each selected file, use its `page_ranges` in the index to list only the pages that cover the matching topics (e.g. "4-8, 12"). Leave a file out of `page_ranges` if it must be read whole or the index gives no pages for the topic."""
+            pages_format = """,
+            "page_ranges": {"file1.pdf": "4-8, 12"}"""
         
         prompt = f"""
         You are a Strategic Legal Librarian.
@@ -148,12 +486,13 @@ class RouterAgent(BaseAgent):
         1. Search the index for topics matching the requirement.
         2. Identify Dependencies: If a requirement implies a need for both a Methodology (text) and Evidence (Annexes/Tables), select ALL files that complete the picture.
         3. Be strict on relevance.
+        {pages_logic}
         
         **OUTPUT FORMAT**:
         Return a single JSON object:
         {{
             "selected_filenames": ["file1.pdf", "file2.pdf"],
-            "reasoning": "Explanation here"
+            "reasoning": "Explanation here"{pages_format}
         }}
         """
         return self.generate_structured(prompt, RoutingDecision)
@@ -161,25 +500,29 @@ class RouterAgent(BaseAgent):
 class AuditorAgent(BaseAgent):
     def __init__(self):
         # Pass Specific Temp
-        super().__init__(config.MODEL_AUDITOR, config.TEMP_AUDITOR)
+        super().__init__(config.MODEL_AUDITOR, config.TEMP_AUDITOR, config.PROVIDER_AUDITOR)
 
-    def audit(self, prompt_input: str, legal_context: str, file_contents: Dict[str, str]) -> Tuple[Optional[AuditResult], Dict]:
-        
+    def audit(self, prompt_input: str, legal_context: str, file_contents: Dict[str, str],
+              on_partial: Optional[Callable[[str], None]] = None) -> Tuple[Optional[AuditResult], Dict]:
+        """With STREAM_AUDITOR, on_partial gets the reasoning written so far while the response streams."""
+
+        # Evidence goes first, in a stable file order: consecutive requirements
+        # routed to the same files then share the longest possible prompt prefix.
         combined_evidence = ""
-        for fname, text in file_contents.items():
-            combined_evidence += f"\n--- CONTENT OF FILE: {fname} ---\n{text}\n"
+        for fname in sorted(file_contents):
+            combined_evidence += f"\n--- CONTENT OF FILE: {fname} ---\n{file_contents[fname]}\n"
 
         prompt = f"""
         You are a Senior Environmental Auditor (Ecuador).
         
+        **Evidence (Full Text from Selected Files)**:
+        {combined_evidence}
+        
         {prompt_input}
         
         **Legal Context (Normativa)**:
         {legal_context}
         
-        **Evidence (Full Text from Selected Files)**:
-        {combined_evidence}
-        
         **Constraint**: Verify if the technical evidence meets the legal threshold. 
         Output the AuditResult JSON. Reasoning must be in Spanish.
         
@@ -196,4 +539,104 @@ class AuditorAgent(BaseAgent):
             "instruction": "..."
         }}
         """
-        return self.generate_structured(prompt, AuditResult)
\ No newline at end of file
+        on_text = None
+        if on_partial:
+            def on_text(text: str):
+                reasoning = partial_json_field(text, "reasoning")
+                if reasoning:
+                    on_partial(reasoning)
+        return self.generate_structured(prompt, AuditResult, stream=config.STREAM_AUDITOR, on_text=on_text)
+
+    def audit_group(self, items: List[Dict], legal_context: str, file_contents: Dict[str, str]) -> Tuple[Optional[List[GroupedAuditItem]], Dict]:
+        """
+        Audits several requirements that share the same evidence in one call.
+        Returns None as result if the output does not parse or misses a requirement,
+        so the caller can fall back to per-item audits.
+        """
+        combined_evidence = ""
+        for fname in sorted(file_contents):
+            combined_evidence += f"\n--- CONTENT OF FILE: {fname} ---\n{file_contents[fname]}\n"
+
+        requirements_block = ""
+        for item in items:
+            requirements_block += f"""
+        [{item['id']}]
+        REQUIREMENT: {item['requirement']}
+        STRICT COMPLIANCE CRITERIA: {item.get('criteria', 'N/A')}
+        EXPECTED EVIDENCE DESCRIPTION: {item.get('expected_evidence', 'N/A')}
+        """
+
+        prompt = f"""
+        You are a Senior Environmental Auditor (Ecuador).
+        
+        **Evidence (Full Text from Selected Files)**:
+        {combined_evidence}
+        
+        **Requirements to verify** (one independent verdict per requirement):
+        {requirements_block}
+        
+        **Legal Context (Normativa)**:
+        {legal_context}
+        
+        **Constraint**: For EACH requirement, verify if the technical evidence meets the legal threshold. 
+        Judge every requirement on its own; do not let one verdict influence another. Reasoning must be in Spanish.
+        
+        **Instruction Guidelines**:
+        - If status is "NO CUMPLE", provide a single sentence in Spanish starting with an infinitive verb (e.g., "Incluir...", "Presentar...", "Corregir...") that tells the proponent what must be done to comply.
+        - If status is "CUMPLE", use "Ninguna acción requerida".
+
+        Structure (one entry per requirement, using its ID):
+        {{
+            "results": [
+                {{
+                    "req_id": "REQ-...",
+                    "status": "CUMPLE" | "NO CUMPLE",
+                    "reasoning": "...",
+                    "legal_base": "...",
+                    "evidence_location": "...",
+                    "instruction": "..."
+                }}
+            ]
+        }}
+        """
+        result, usage = self.generate_structured(prompt, GroupedAuditResult)
+        if not result:
+            return None, usage
+
+        by_id = {r.req_id.strip(): r for r in result.results}
+        if any(item['id'] not in by_id for item in items):
+            return None, usage
+        return [by_id[item['id']] for item in items], usage
+
+class VerdictCheckerAgent(BaseAgent):
+    """Cheap confirmation (no evidence in the prompt) that a cached verdict also answers a paraphrased requirement."""
+    def __init__(self):
+        super().__init__(config.MODEL_VERDICT_CHECK, config.TEMP_ROUTER, config.PROVIDER_VERDICT_CHECK)
+
+    def confirm(self, item: Dict, cached_item: Dict, cached_result: Dict) -> Tuple[Optional[VerdictReuseCheck], Dict]:
+        prompt = f"""
+        You are a Verdict Reuse Reviewer for an environmental audit (Ecuador).
+        
+        Both requirements below were checked against exactly the same evidence files and pages.
+        
+        **Audited requirement**:
+        REQUIREMENT: {cached_item['requirement']}
+        STRICT COMPLIANCE CRITERIA: {cached_item.get('criteria', 'N/A')}
+        VERDICT: {cached_result['status']}
+        REASONING: {cached_result['reasoning']}
+        EVIDENCE LOCATION: {cached_result['evidence_location']}
+        
+        **New requirement**:
+        REQUIREMENT: {item['requirement']}
+        STRICT COMPLIANCE CRITERIA: {item.get('criteria', 'N/A')}
+        
+        **Logic**: Answer true only if the new requirement asks for the same thing, so the verdict
+        and reasoning above apply to it unchanged. Any extra condition, threshold or document means false.
+        
+        **OUTPUT FORMAT**:
+        {{
+            "same_verdict": true | false,
+            "reasoning": "..."
+        }}
+        """
+        return self.generate_structured(prompt, VerdictReuseCheck)
@@ -2,17 +2,13 @@ import streamlit as st
 import os
 import tempfile
 import json
-import glob
-import time
-import datetime
-import pandas as pd
 import random
 
 # Importar módulos del proyecto
 import config
-from agents import CatalogerAgent, RouterAgent, AuditorAgent, extract_text_from_pdf, configure_genai
-from rag_engine import LegalRAG
-from logger import AuditLogger
+import resources
+import results_view
+from jobs import AuditJob, JobManager
 
 # --- CONFIGURACIÓN & SETUP ---
 st.set_page_config(
@@ -82,21 +78,42 @@ if "temp_dir" not in st.session_state:
     st.session_state.temp_dir = tempfile.mkdtemp()
 if "total_time" not in st.session_state:
     st.session_state.total_time = 0
+if "results_key" not in st.session_state:
+    st.session_state.results_key = None   # (job_id, revisión): clave de caché del informe
+if "export_dir" not in st.session_state:
+    st.session_state.export_dir = tempfile.mkdtemp()
 
 # --- FUNCIONES AUXILIARES ---
 
+@st.cache_resource(show_spinner="Cargando modelos y marco legal...")
+def warm_up_resources():
+    # Una sola vez por proceso: agentes, modelo de embeddings, Chroma y run store compartidos
+    resources.warm_up()
+    return True
+
+@st.cache_resource
+def get_job_manager():
+    # Un único gestor por proceso: los trabajos sobreviven a los reruns del script
+    return JobManager()
+
 def save_uploaded_files(uploaded_files):
+    """
+    Guarda las cargas en el almacén por contenido (compartido entre sesiones) y
+    las expone en temp_dir con su nombre original. Devuelve (rutas, {nombre: hash}).
+    """
+    blob_store = resources.get_blob_store()
     saved_paths = []
-    # Limpiar directorio temporal para nueva ejecución
+    file_hashes = {}
+    # Limpiar directorio temporal para nueva ejecución (solo enlaces)
     for f in os.listdir(st.session_state.temp_dir):
         os.remove(os.path.join(st.session_state.temp_dir, f))
         
     for uploaded_file in uploaded_files:
-        file_path = os.path.join(st.session_state.temp_dir, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        digest = blob_store.put_stream(uploaded_file)
+        file_path = blob_store.link_into(digest, st.session_state.temp_dir, uploaded_file.name)
+        file_hashes[uploaded_file.name] = digest
         saved_paths.append(file_path)
-    return saved_paths
+    return saved_paths, file_hashes
 
 def load_checklist():
     json_path = config.CHECKLIST_FILE
@@ -114,15 +131,15 @@ def load_checklist():
             return data
     return []
 
-def load_local_cache():
-    if os.path.exists(config.INDEX_FILE):
-        try:
-            with open(config.INDEX_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return {item['filename']: item for item in data}
-        except Exception:
-            pass
-    return {}
+def load_local_cache(file_hashes):
+    """Catálogo en caché por hash de contenido, devuelto bajo el nombre actual del archivo."""
+    blob_store = resources.get_blob_store()
+    cache = {}
+    for fname, digest in file_hashes.items():
+        entry = blob_store.get_catalog(digest)
+        if entry:
+            cache[fname] = {**entry, "filename": fname}
+    return cache
 
 # --- INTERFAZ DE USUARIO ---
 sleep_time = 1
@@ -139,6 +156,8 @@ if not config.GOOGLE_API_KEY:
     st.error("⚠️ Falta configuración de API Key en .env")
     st.stop()
 
+warm_up_resources()
+
 uploaded_files = st.file_uploader(
     "Seleccione los archivos PDF (Plan de Manejo, Anexos, Fichas):", 
     type=["pdf"], 
@@ -153,233 +172,183 @@ st.divider()
 st.subheader("2. Proceso de Auditoría")
 
 force_reindex = st.toggle("Forzar re-indexación", value=False, help="Ignora la caché local y vuelve a analizar todos los documentos.")
-start_btn = st.button("Iniciar Verificación", type="primary", disabled=not uploaded_files)
+profile_run = st.toggle("Perfilar ejecución (CPU y memoria)", value=False, help="Muestrea la CPU y las asignaciones de memoria por etapa y guarda el perfil junto a los registros.")
 
+# Reconectar con un trabajo en curso (p. ej. tras refrescar el navegador)
+job_manager = get_job_manager()
+if "job_id" not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
+job = job_manager.get(st.session_state.job_id)
+job_active = job is not None and not job.finished
+
+RESULT_FILTER_KEYS = ("filter_status", "filter_chapter", "filter_file", "filter_text")
+
+start_btn = st.button("Iniciar Verificación", type="primary", disabled=not uploaded_files or job_active)
 
 if start_btn:
-    start_time = time.time()
-    # Preparación
-    configure_genai()
-    saved_paths = save_uploaded_files(uploaded_files)
+    saved_paths, file_hashes = save_uploaded_files(uploaded_files)
     config.PDF_DIR = st.session_state.temp_dir 
-    
-    cataloger = CatalogerAgent()
-    router = RouterAgent()
-    auditor = AuditorAgent()
-    rag = LegalRAG()
-    audit_logger = AuditLogger()
-    total_run_cost = 0.0
-    run_start_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Contenedores para Pasos (Persistentes)
-    step1_container = st.empty()
-    step2_container = st.empty()
-    step3_container = st.empty()
-    
-    try:
-        # --- PASO 1: MARCO LEGAL ---
-        with step1_container.container():
-            st.info("📚 Paso 1/3: Verificando Normativa Legal...")
-            with st.status("Detalles del Marco Legal", expanded=True) as s1:
-                if rag.collection.count() == 0:
-                    legal_files = glob.glob(os.path.join(config.LEGAL_DIR, "*.pdf"))
-                    for l_file in legal_files:
-                        st.write(f"Leyendo: {os.path.basename(l_file)}")
-                        txt = extract_text_from_pdf(l_file)
-                        rag.ingest_text(txt, source_name=os.path.basename(l_file))
-                st.write("✅ Marco legal cargado correctamente.")
-                s1.update(label="📚 Marco Legal Listo", state="complete", expanded=False)
-        
-        # --- PASO 2: CATALOGACIÓN ---
-        with step2_container.container():
-            st.info("🔍 Paso 2/3: Analizando estructura de documentos...")
-            with st.status("Detalles de Indexación", expanded=True) as s2:
-                local_cache = load_local_cache()
-                project_index = []
-                for pdf_path in saved_paths:
-                    fname = os.path.basename(pdf_path)
-                    st.write(f"Analizando: ```{fname}```")
-                    if fname in local_cache and not force_reindex:
-                        st.caption(f"└─ Recuperado de memoria caché.")
-                        project_index.append(local_cache[fname])
-                    else:
-                        f_index, usage = cataloger.analyze_file(pdf_path)
-                        if f_index:
-                            project_index.append(f_index.model_dump())
-                            cost = audit_logger.log_catalog(
-                                fname, "SUCCESS", config.MODEL_CATALOGER,
-                                usage['input_tokens'], usage['output_tokens']
-                            )
-                            total_run_cost += cost
-                        else:
-                            audit_logger.log_catalog(
-                                fname, "FAILED", config.MODEL_CATALOGER,
-                                0, 0
-                            )
-                st.session_state.project_index = project_index
-                st.write(f"✅ Indexación terminada ({len(project_index)} archivos).")
-                s2.update(label="🔍 Documentos Indexados", state="complete", expanded=False)
-
-        # --- PASO 3: AUDITORÍA ---
-        with step3_container.container():
-            st.info("⚖️ Paso 3/3: Cruzando requisitos contra evidencia...")
-            with st.status("Detalles de la Auditoría", expanded=True) as s3:
-                checklist = load_checklist()
-                st.session_state.audit_results = []
-                total = len(checklist)
-                
-                for i, item in enumerate(checklist):
-                    req_id = item['id']
-                    req_text = item['requirement']
-                    criteria = item.get('criteria', 'N/A')
-                    evidence_hint = item.get('expected_evidence', 'N/A')
-
-                    req_start_time = time.time()
-                    s3.update(label=f"⚖️ Auditando {i+1}/{total}: {req_id}", state="running")
-                    st.markdown(f"**{req_id}:** {req_text[:60]}...")
-                    
-                    search_query = f"{req_text} (Evidence needed: {evidence_hint})"
-                    routing_decision, router_usage = router.route(search_query, project_index)
-                    
-                    if not routing_decision or not routing_decision.selected_filenames:
-                        st.caption("⚠️ Sin archivos relevantes.")
-                        req_duration = time.time() - req_start_time
-                        cost = audit_logger.log_requirement(
-                            req_id, req_text, req_duration,
-                            router_data={
-                                'model': config.MODEL_ROUTER,
-                                'input': router_usage.get('input_tokens', 0),
-                                'output': router_usage.get('output_tokens', 0),
-                                'files': "None", 'reasoning': "No relevant files found"
-                            },
-                            auditor_data={
-                                'model': config.MODEL_AUDITOR,
-                                'input': 0, 'output': 0, 'status': "SKIPPED", 'reasoning': "N/A", 'instruction': "N/A"
-                            }
-                        )
-                        total_run_cost += cost
-                        st.session_state.audit_results.append({
-                            "id": req_id, "requirement": req_text, "status": "SKIPPED",
-                            "reasoning": "No se encontraron documentos relacionados.",
-                            "evidence_location": "N/A", "files_used": []
-                        })
-                        continue
-
-                    legal_context = rag.retrieve_context(req_text)
-                    file_contents = {}
-                    for fname in routing_decision.selected_filenames:
-                        path = os.path.join(st.session_state.temp_dir, fname)
-                        if os.path.exists(path):
-                            file_contents[fname] = extract_text_from_pdf(path)
-
-                    if file_contents:
-                        rich_prompt = f"REQUIREMENT: {req_text}\nCRITERIA: {criteria}\nEVIDENCE: {evidence_hint}"
-                        audit_result, auditor_usage = auditor.audit(rich_prompt, legal_context, file_contents)
-
-                        req_duration = time.time() - req_start_time
-                        if audit_result:
-                            cost = audit_logger.log_requirement(
-                                req_id, req_text, req_duration,
-                                router_data={
-                                    'model': config.MODEL_ROUTER,
-                                    'input': router_usage.get('input_tokens', 0),
-                                    'output': router_usage.get('output_tokens', 0),
-                                    'files': str(routing_decision.selected_filenames),
-                                    'reasoning': routing_decision.reasoning
-                                },
-                                auditor_data={
-                                    'model': config.MODEL_AUDITOR,
-                                    'input': auditor_usage.get('input_tokens', 0),
-                                    'output': auditor_usage.get('output_tokens', 0),
-                                    'status': audit_result.status,
-                                    'reasoning': audit_result.reasoning,
-                                    'instruction': audit_result.instruction
-                                }
-                            )
-                            total_run_cost += cost
-                            icon = "✅" if audit_result.status == "CUMPLE" else "❌"
-                            st.caption(f"└─ Resultado: {icon} {audit_result.status}")
-                            st.session_state.audit_results.append({
-                                "id": req_id, "requirement": req_text, "status": audit_result.status,
-                                "reasoning": audit_result.reasoning,
-                                "instruction": audit_result.instruction,
-                                "evidence_location": audit_result.evidence_location,
-                                "files_used": routing_decision.selected_filenames
-                            })
-                
-                # Metadata Final
-                st.session_state.total_time = time.time() - start_time
-                st.session_state.processing_complete = True
-                
-                run_end_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                legal_filenames = [os.path.basename(f) for f in glob.glob(os.path.join(config.LEGAL_DIR, "*.pdf"))]
-                processed_files = [entry['filename'] for entry in st.session_state.project_index]
-                
-                metadata = {
-                    "run_start": run_start_str,
-                    "run_end": run_end_str,
-                    "total_duration_seconds": round(st.session_state.total_time, 2),
-                    "total_cost_estimated_usd": round(total_run_cost, 6),
-                    "input_folder": "Streamlit Upload",
-                    "files_analyzed": processed_files,
-                    "legal_files_used": legal_filenames,
-                    "configuration": {
-                        "model_cataloger": config.MODEL_CATALOGER,
-                        "model_router": config.MODEL_ROUTER,
-                        "model_auditor": config.MODEL_AUDITOR,
-                        "rate_limit": config.RATE_LIMIT_CALLS,
-                        "sampling_limit": config.AUDIT_CHECKLIST_LIMIT
-                    }
-                }
-                audit_logger.log_metadata(metadata)
-                
-                s3.update(label="⚖️ Auditoría Finalizada", state="complete", expanded=False)
-    except Exception as e:
-        st.error(f"Error crítico durante el proceso: {e}")
-
-    # Mensaje Final (Fuera de contenedores)
-    if st.session_state.processing_complete:
-        st.success("El proceso ha concluido con éxito")
+    job = job_manager.submit(AuditJob(
+        checklist=load_checklist(),
+        pdf_paths=saved_paths,
+        pdf_dir=st.session_state.temp_dir,
+        catalog_cache={} if force_reindex else load_local_cache(file_hashes),
+        file_hashes=file_hashes,
+        profile=profile_run
+    ))
+    resources.get_blob_store().gc(keep=job_manager.active_hashes())
+    st.session_state.job_id = job.job_id
+    st.query_params["job"] = job.job_id
+    st.session_state.audit_results = []
+    st.session_state.processing_complete = False
+    # Los filtros del informe anterior pueden no existir en el nuevo
+    for key in RESULT_FILTER_KEYS + ("results_page", "export_file"):
+        st.session_state.pop(key, None)
+    job_active = True
+
+@st.fragment(run_every=config.JOB_POLL_SECONDS)
+def render_job_progress(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return
+    snap = job.snapshot()
+
+    st.info(snap["stage"])
+    st.progress(snap["done"] / snap["total"] if snap["total"] else 0.0,
+                text=f"{snap['done']}/{snap['total']} requisitos · {snap['elapsed']:.0f}s")
+    with st.status("Detalles de la Auditoría", expanded=True, state="running" if not job.finished else "complete"):
+        for line in snap["events"][-8:]:
+            st.caption(line)
+        if snap["partial"]:
+            # Razonamiento del auditor mientras llega (STREAM_AUDITOR)
+            st.markdown(f"**{snap['partial']['req_id']}** · _{snap['partial']['reasoning'][-600:]}_")
+
+    if not job.finished:
+        if st.button("Cancelar auditoría", type="secondary"):
+            job.cancel()
+    else:
+        # Trabajo terminado: pasar resultados al informe y redibujar la página completa
+        st.rerun()
+
+if job is not None:
+    if job.finished:
+        snap = job.snapshot()
+        st.session_state.audit_results = [r for r in snap["results"] if r["status"] != "ERROR"]
+        st.session_state.results_key = (job.job_id, snap["revision"])
+        st.session_state.total_time = snap["elapsed"]
+        st.session_state.processing_complete = job.status == "completed"
+        if job.status == "completed":
+            st.success("El proceso ha concluido con éxito")
+        elif job.status == "cancelled":
+            st.warning(f"Auditoría cancelada tras {snap['done']} de {snap['total']} requisitos.")
+        else:
+            st.error(f"Error crítico durante el proceso: {snap['error']}")
+    else:
+        render_job_progress(job.job_id)
+        # Resultados parciales mientras el trabajo avanza
+        snap = job.snapshot()
+        st.session_state.audit_results = [r for r in snap["results"] if r["status"] != "ERROR"]
+        st.session_state.results_key = (job.job_id, snap["revision"])
+        st.session_state.total_time = job.elapsed
 
 # 3. RESULTADOS
+STATUS_DISPLAY = {"CUMPLE": ("✅", "CUMPLE"), "NO CUMPLE": ("❌", "NO CUMPLE"), "SKIPPED": ("⏭️", "OMITIDO")}
+
+def status_label(status):
+    icon, label = STATUS_DISPLAY.get(status, ("⚪", status))
+    return f"{icon} {label}"
+
+# Métricas y filtros se calculan una vez por versión de los resultados (results_key);
+# la lista se pasa como _results para que Streamlit no la hashee en cada rerun
+@st.cache_data(max_entries=8, show_spinner=False)
+def results_summary(results_key, _results):
+    return results_view.summarize(_results)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def filtered_positions(results_key, statuses, chapters, files, text, _results):
+    return results_view.filter_results(_results, statuses, chapters, files, text)
+
+def reset_results_page():
+    st.session_state.results_page = 1
+
+def render_result(res):
+    with st.expander(f"{status_label(res['status'])}  **{res['id']}**"):
+        st.markdown(f"**Requisito:**")
+        st.markdown(res['requirement'])
+        st.markdown("---")
+        st.markdown(f"**Dictamen:**")
+        st.markdown(res['reasoning'])
+
+        if res.get('instruction') and res['instruction'] != "Ninguna acción requerida" and res['instruction'] != "N/A":
+            st.markdown("---")
+            st.markdown("**Acción Requerida:**")
+            st.info(f"{res['instruction']}")
+
+        st.markdown("---")
+        st.caption(f"📍 Evidencia: {res['evidence_location']} | 📂 Archivos: {', '.join(res['files_used'])}")
+
+@st.fragment
+def render_results(results_key):
+    # Fragmento: filtrar, paginar o exportar solo vuelve a ejecutar esta sección
+    results = st.session_state.audit_results
+    summary = results_summary(results_key, results)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Requisitos", summary["total"])
+    col2.metric("Cumplimiento", summary["statuses"].get("CUMPLE", 0))
+    col3.metric("No Conformidad", summary["statuses"].get("NO CUMPLE", 0))
+    col4.metric("Tiempo Total", f"{st.session_state.total_time:.1f}s")
+
+    st.write("")
+
+    f1, f2 = st.columns(2)
+    statuses = f1.multiselect(
+        "Estado", list(summary["statuses"]), key="filter_status", on_change=reset_results_page,
+        format_func=lambda s: f"{status_label(s)} ({summary['statuses'][s]})"
+    )
+    chapters = f2.multiselect(
+        "Capítulo", summary["chapters"], key="filter_chapter", on_change=reset_results_page,
+        format_func=lambda c: c or "(sin capítulo)"
+    )
+    f3, f4 = st.columns(2)
+    files = f3.multiselect("Archivo", summary["files"], key="filter_file", on_change=reset_results_page)
+    text = f4.text_input("Buscar", placeholder="ID, requisito o dictamen", key="filter_text", on_change=reset_results_page)
+
+    filters = (tuple(statuses), tuple(chapters), tuple(files), text)
+    positions = filtered_positions(results_key, *filters, results)
+    if not positions:
+        st.info("Ningún requisito coincide con los filtros.")
+        return
+
+    page_size = config.RESULTS_PAGE_SIZE
+    start, end, pages = results_view.page_bounds(len(positions), st.session_state.get("results_page", 1), page_size)
+    st.session_state.results_page = start // page_size + 1
+    p1, p2 = st.columns([1, 3])
+    p1.number_input("Página", min_value=1, max_value=pages, step=1, key="results_page")
+    p2.caption(f"Requisitos {start + 1}–{end} de {len(positions)} (página {start // page_size + 1} de {pages})")
+
+    for i in positions[start:end]:
+        render_result(results[i])
+
+    # Exportación de los requisitos filtrados, escrita fila a fila en disco
+    st.write("")
+    e1, e2 = st.columns([1, 2])
+    export_format = e1.radio("Formato", list(results_view.EXPORT_WRITERS), horizontal=True, key="export_format")
+    export_key = (results_key, filters, export_format)
+    if e2.button(f"Preparar exportación ({len(positions)} requisitos)"):
+        writer, extension, _ = results_view.EXPORT_WRITERS[export_format]
+        path = os.path.join(st.session_state.export_dir, f"informe_{results_key[0]}.{extension}")
+        writer(path, (results[i] for i in positions))
+        st.session_state.export_file = (export_key, path)
+    export = st.session_state.get("export_file")
+    if export and export[0] == export_key:
+        _, extension, mime = results_view.EXPORT_WRITERS[export_format]
+        with open(export[1], "rb") as f:
+            e2.download_button(
+                f"Descargar {export_format}", data=f, file_name=f"informe_cumplimiento.{extension}", mime=mime
+            )
+
 if st.session_state.audit_results:
     st.divider()
     st.subheader("3. Informe de Cumplimiento")
-    
-    df = pd.DataFrame(st.session_state.audit_results)
-    if not df.empty:
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Requisitos", len(df))
-        col2.metric("Cumplimiento", len(df[df['status'] == 'CUMPLE']))
-        col3.metric("No Conformidad", len(df[df['status'] == 'NO CUMPLE']))
-        col4.metric("Tiempo Total", f"{st.session_state.total_time:.1f}s")
-    
-    st.write("")
-    
-    for res in st.session_state.audit_results:
-        icon = "⚪"
-        estilo_estado = res['status']
-        
-        if res['status'] == "CUMPLE":
-            icon = "✅"
-        elif res['status'] == "NO CUMPLE": 
-            icon = "❌"
-
-        elif res['status'] == "SKIPPED":
-            icon = "⏭️"
-            estilo_estado = "OMITIDO"
-            
-        with st.expander(f"{icon}  **{res['id']}** | {estilo_estado}"):
-            st.markdown(f"**Requisito:**")
-            st.markdown(res['requirement'])
-            st.markdown("---")
-            st.markdown(f"**Dictamen:**")
-            st.markdown(res['reasoning'])
-            
-            if res.get('instruction') and res['instruction'] != "Ninguna acción requerida" and res['instruction'] != "N/A":
-                st.markdown("---")
-                st.markdown("**Acción Requerida:**")
-                st.info(f"{res['instruction']}")
-
-            st.markdown("---")
-            st.caption(f"📍 Evidencia: {res['evidence_location']} | 📂 Archivos: {', '.join(res['files_used'])}")
\ No newline at end of file
+    render_results(st.session_state.results_key)
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import datetime
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+
+# The benchmark never talks to Gemini: select the mock backend before config loads.
+os.environ["TUCANA_LLM_BACKEND"] = "mock"
+
+from rich.console import Console
+from rich.table import Table
+
+import config
+from synthetic_corpus import generate_corpus
+
+console = Console()
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark (synthetic corpus + mock LLM).")
+    parser.add_argument("--files", type=int, default=10, help="EIA PDF files to generate")
+    parser.add_argument("--pages", type=int, default=30, help="Pages per EIA file")
+    parser.add_argument("--tables", type=int, default=6, help="Tables per EIA file")
+    parser.add_argument("--legal-files", type=int, default=2)
+    parser.add_argument("--legal-pages", type=int, default=40)
+    parser.add_argument("--requirements", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock LLM latency per call (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock LLM calls that fail")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Calls per minute (0 disables the limiter)")
+    parser.add_argument("--audit-mode", choices=["single", "grouped"], default="single")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report Python heap peak (slower)")
+    parser.add_argument("--workdir", default=None, help="Reuse/keep the generated corpus here")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: logs/benchmarks/)")
+    return parser.parse_args(argv)
+
+def run_benchmark(args) -> dict:
+    config.MOCK_LLM_LATENCY = args.latency
+    config.MOCK_LLM_ERROR_RATE = args.error_rate
+
+    # Imported after the backend switch so agents bind to the mock model
+    from agents import CatalogerAgent, RouterAgent, AuditorAgent, rate_limiter
+    from rag_engine import LegalRAG
+    from logger import AuditLogger
+    from tracing import tracer
+    from mock_llm import MockStats
+    from pipeline import ingest_legal_framework, catalog_files, audit_checklist
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tucana_bench_")
+    with console.status("Generating synthetic corpus..."):
+        corpus = generate_corpus(
+            workdir, args.files, args.pages, args.tables,
+            args.legal_files, args.legal_pages, args.requirements, args.seed
+        )
+    total_pages = sum(f["pages"] for f in corpus["files"])
+
+    rate_limiter.interval = 60 / args.rate_limit if args.rate_limit else 0
+    tracer.reset()
+    MockStats.reset()
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    audit_logger = AuditLogger(output_dir=os.path.join(workdir, "logs"))
+    phases = {}
+
+    t0 = time.perf_counter()
+    rag = LegalRAG(db_dir=os.path.join(workdir, "db"))
+    ingest_legal_framework(rag, corpus["legal_dir"])
+    phases["legal_ingest"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cataloger = CatalogerAgent()
+    pdf_paths = sorted(glob.glob(os.path.join(corpus["eia_dir"], "*.pdf")))
+    with console.status("Cataloging..."):
+        project_index, _ = catalog_files(cataloger, pdf_paths, audit_logger)
+    phases["catalog"] = time.perf_counter() - t0
+
+    with open(corpus["checklist_file"], "r", encoding="utf-8") as f:
+        checklist = json.load(f)
+
+    t0 = time.perf_counter()
+    router = RouterAgent()
+    auditor = AuditorAgent()
+    statuses = {}
+    with console.status("Auditing...") as status:
+        results = audit_checklist(
+            checklist, project_index, router, auditor, rag, audit_logger, corpus["eia_dir"],
+            on_stage=lambda stage, req_id: status.update(f"Auditing ({stage}) {req_id}"),
+            mode=args.audit_mode
+        )
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    phases["audit"] = time.perf_counter() - t0
+
+    memory = {"peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    if args.tracemalloc:
+        memory["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "parameters": vars(args),
+        "corpus": {
+            "workdir": workdir, "files": len(corpus["files"]), "pages": total_pages,
+            "tables": sum(len(f["tables"]) for f in corpus["files"]),
+            "legal_articles": corpus["legal_articles"], "requirements": len(checklist)
+        },
+        "phase_seconds": {k: round(v, 4) for k, v in phases.items()},
+        "throughput": {
+            "legal_pages_per_second": round(args.legal_files * args.legal_pages / phases["legal_ingest"], 3) if phases["legal_ingest"] else None,
+            "catalog_files_per_second": round(len(pdf_paths) / phases["catalog"], 3) if phases["catalog"] else None,
+            "catalog_pages_per_second": round(total_pages / phases["catalog"], 3) if phases["catalog"] else None,
+            "requirements_per_second": round(len(checklist) / phases["audit"], 3) if phases["audit"] else None
+        },
+        "llm": {"calls": MockStats.calls, "errors": MockStats.errors},
+        "statuses": statuses,
+        "memory": memory,
+        "stage_latency_seconds": tracer.summary()
+    }
+
+def print_summary(results: dict):
+    table = Table(title=f"Benchmark {results['commit']} ({results['corpus']['files']} files, "
+                        f"{results['corpus']['pages']} pages, {results['corpus']['requirements']} requirements)")
+    for col in ["Stage", "Count", "Total (s)", "p50", "p95", "p99"]:
+        table.add_column(col)
+    for stage, s in results["stage_latency_seconds"].items():
+        table.add_row(stage, str(s["count"]), f"{s['total_seconds']:.3f}", f"{s['p50']:.4f}", f"{s['p95']:.4f}", f"{s['p99']:.4f}")
+    console.print(table)
+    console.print(f"Throughput: {results['throughput']}")
+    console.print(f"Memory: {results['memory']}  LLM: {results['llm']}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmark(args)
+
+    output = args.output
+    if not output:
+        os.makedirs(os.path.join("logs", "benchmarks"), exist_ok=True)
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join("logs", "benchmarks", f"bench_{results['commit']}_{ts}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print_summary(results)
+    console.print(f"[green]Results written to {output}[/green]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+from typing import Optional, Iterable, BinaryIO, List
+
+import config
+
+# Content-addressed store for uploaded PDFs, shared by every Streamlit session.
+#
+#   <root>/objects/ab/<sha256>.pdf   the uploaded bytes
+#   <root>/catalog/<sha256>.json     cached FileIndex (filename-independent)
+#   <root>/text/<sha256>.json        cached raw page texts (normalized and truncated on read)
+#
+# Sessions get a folder of symlinks named after the original uploads, so the
+# pipeline still sees ordinary filenames while everything expensive is keyed
+# by content.
+
+class BlobStore:
+    def __init__(self, root: str = config.BLOB_DIR, max_bytes: int = config.BLOB_STORE_MAX_BYTES,
+                 chunk_size: int = config.UPLOAD_CHUNK_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        for sub in ("objects", "catalog", "text", "tmp"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    # --- PATHS ---
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.pdf")
+
+    def _catalog_path(self, digest: str) -> str:
+        return os.path.join(self.root, "catalog", f"{digest}.json")
+
+    def _text_path(self, digest: str) -> str:
+        return os.path.join(self.root, "text", f"{digest}.json")
+
+    def digest_for_path(self, path: str) -> Optional[str]:
+        """Hash of a path that (through symlinks) points into the store, else None."""
+        real = os.path.realpath(path)
+        objects_dir = os.path.realpath(os.path.join(self.root, "objects"))
+        if not real.startswith(objects_dir + os.sep):
+            return None
+        return os.path.splitext(os.path.basename(real))[0]
+
+    # --- BLOBS ---
+    def _hash_stream(self, stream: BinaryIO) -> str:
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+            sha.update(chunk)
+        return sha.hexdigest()
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        """
+        Stores a seekable binary stream in chunks and returns its sha256.
+        Content already in the store is only hashed, never rewritten.
+        """
+        stream.seek(0)
+        digest = self._hash_stream(stream)
+        target = self.blob_path(digest)
+        if os.path.exists(target):
+            os.utime(target)  # Mark as recently used for GC
+            return digest
+
+        stream.seek(0)
+        tmp_path = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                f.write(chunk)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+        return digest
+
+    def link_into(self, digest: str, dest_dir: str, filename: str) -> str:
+        """Exposes a blob as dest_dir/filename (symlink, or a copy where links are unsupported)."""
+        dest = os.path.join(dest_dir, filename)
+        if os.path.lexists(dest):
+            os.remove(dest)
+        try:
+            os.symlink(os.path.abspath(self.blob_path(digest)), dest)
+        except OSError:
+            shutil.copyfile(self.blob_path(digest), dest)
+        return dest
+
+    # --- DERIVED DATA ---
+    def get_catalog(self, digest: str) -> Optional[dict]:
+        path = self._catalog_path(digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put_catalog(self, digest: str, entry: dict):
+        self._write_atomic(self._catalog_path(digest), json.dumps(entry, ensure_ascii=False, indent=2))
+
+    def get(self, filepath: str) -> Optional[List[str]]:
+        """Raw page texts cached for a file path (see agents.set_text_cache)."""
+        digest = self.digest_for_path(filepath)
+        if not digest:
+            return None
+        try:
+            with open(self._text_path(digest), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, filepath: str, pages: List[str]):
+        digest = self.digest_for_path(filepath)
+        if digest:
+            self._write_atomic(self._text_path(digest), json.dumps(pages, ensure_ascii=False))
+
+    def _write_atomic(self, path: str, content: str):
+        tmp_path = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    # --- GARBAGE COLLECTION ---
+    def gc(self, keep: Iterable[str] = ()) -> int:
+        """
+        Deletes least recently used blobs (with their catalog and text) until the
+        store fits in max_bytes. Hashes in `keep` are never removed. Returns bytes freed.
+        """
+        keep = set(keep)
+        with self._lock:
+            entries = []
+            total = 0
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, "objects")):
+                for name in filenames:
+                    digest = os.path.splitext(name)[0]
+                    paths = [os.path.join(dirpath, name), self._catalog_path(digest), self._text_path(digest),
+                             os.path.join(self.root, "text", f"{digest}.txt")]   # pre-page-cache text files
+                    size = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+                    total += size
+                    entries.append((os.path.getmtime(paths[0]), digest, paths, size))
+
+            freed = 0
+            for _, digest, paths, size in sorted(entries):
+                if total - freed <= self.max_bytes:
+                    break
+                if digest in keep:
+                    continue
+                for p in paths:
+                    if os.path.exists(p):
+                        os.remove(p)
+                freed += size
+            return freed
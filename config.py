@@ -3,14 +3,37 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# "gemini" for the real API, "mock" for the offline backend in mock_llm.py (benchmarks)
+LLM_BACKEND = os.getenv("TUCANA_LLM_BACKEND", "gemini")
+
+# --- LLM PROVIDERS (per agent, see llm_providers.py) ---
+# "gemini" (Google AI API) | "openai" (local OpenAI-compatible server, e.g. llama.cpp).
+# LLM_BACKEND = "mock" replaces all three with the offline backend.
+PROVIDER_CATALOGER = os.getenv("TUCANA_PROVIDER_CATALOGER", "gemini")
+PROVIDER_ROUTER = os.getenv("TUCANA_PROVIDER_ROUTER", "gemini")
+PROVIDER_AUDITOR = os.getenv("TUCANA_PROVIDER_AUDITOR", "gemini")
+
+OPENAI_BASE_URL = os.getenv("TUCANA_OPENAI_BASE_URL", "http://127.0.0.1:8080/v1")
+OPENAI_API_KEY = os.getenv("TUCANA_OPENAI_API_KEY", "")   # llama-server --api-key, if set
+OPENAI_TIMEOUT = 600        # Seconds per request (long prompts are slow on CPU)
+OPENAI_POOL_SIZE = 8        # Keep-alive connections per server
+
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
+if not GOOGLE_API_KEY and LLM_BACKEND == "gemini" and "gemini" in (PROVIDER_CATALOGER, PROVIDER_ROUTER, PROVIDER_AUDITOR):
     raise ValueError("GOOGLE_API_KEY not found in .env")
 
 # Model Definitions (Feb 2026 Standards)
-MODEL_CATALOGER = "gemini-2.5-flash"
-MODEL_ROUTER = "gemini-2.5-flash"
-MODEL_AUDITOR = "gemini-2.5-pro"
+# With the "openai" provider, use the model name the local server expects.
+MODEL_CATALOGER = os.getenv("TUCANA_MODEL_CATALOGER", "gemini-2.5-flash")
+MODEL_ROUTER = os.getenv("TUCANA_MODEL_ROUTER", "gemini-2.5-flash")
+MODEL_AUDITOR = os.getenv("TUCANA_MODEL_AUDITOR", "gemini-2.5-pro")
+
+# Models on the local server cost nothing per token (see AuditLogger.calculate_cost)
+LOCAL_MODELS = {
+    model for model, provider in [
+        (MODEL_CATALOGER, PROVIDER_CATALOGER), (MODEL_ROUTER, PROVIDER_ROUTER), (MODEL_AUDITOR, PROVIDER_AUDITOR)
+    ] if provider == "openai"
+}
 
 # --- INDIVIDUAL TEMPERATURES ---
 TEMP_CATALOGER = 0.0
@@ -22,11 +45,102 @@ DATA_DIR = "./data"
 PDF_DIR = os.path.join(DATA_DIR, "proyecto_eia") 
 LEGAL_DIR = os.path.join(DATA_DIR, "leyes")
 DB_DIR = os.path.join(DATA_DIR, "db")
+
+# --- LEGAL RAG ---
+RAG_BACKEND = "chroma"              # "chroma" (persistent Chroma) | "numpy" (memory-mapped .npy index)
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = "sentence-transformers"   # "sentence-transformers" | "onnx-int8" (quantized onnxruntime)
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_THREADS = None            # CPU threads for embedding (None = runtime default)
+EMBEDDING_MAX_TOKENS = 256          # Truncation length (all-MiniLM-L6-v2 was trained with 256)
+MODELS_DIR = os.path.join(DATA_DIR, "models")   # Quantized ONNX models
+LEGAL_SNAPSHOT = None               # Snapshot .zip that seeds an empty legal index (see legal_snapshot.py)
+LEGAL_VERSION = None                # Pinned corpus version under DB_DIR/versions/ (None = default index)
+LEGAL_CHUNK_CHARS = 1000            # Characters per legal chunk
+LEGAL_INGEST_BATCH = 128            # Chunks embedded and stored per batch during legal ingestion
+LEGAL_INGEST_QUEUE = 2              # Chunked batches waiting for the embedder (bounds ingestion memory)
 INDEX_FILE = os.path.join(DATA_DIR, "project_index.json")
 CHECKLIST_FILE = os.path.join(DATA_DIR, "audit_checklist.json")
+BLOB_DIR = os.path.join(DATA_DIR, "blobs")  # Content-addressed uploads (Streamlit)
 
 # --- EXECUTION SETTINGS ---
 FORCE_REINDEX = False  
 RATE_LIMIT_CALLS = 20
 AUDIT_CHECKLIST_LIMIT = 4
 RANDOM_SEED = 42
+
+# --- OBSERVABILITY ---
+METRICS_PORT = None  # e.g. 9464 to expose a Prometheus /metrics endpoint during runs
+
+# --- PROFILING (main_cli.py --profile / app toggle, see profiler.py) ---
+PROFILE_INTERVAL = 0.01             # Seconds between stack samples
+PROFILE_TRACEMALLOC_FRAMES = 16     # Frames kept per allocation (0 = CPU sampling only)
+PROFILE_TOP_SITES = 15              # Allocation sites listed per stage
+
+# --- MOCK LLM BACKEND (LLM_BACKEND = "mock") ---
+MOCK_LLM_LATENCY = 0.0      # Seconds per call
+MOCK_LLM_ERROR_RATE = 0.0   # Fraction of calls that fail like an API error
+
+# --- STREAMLIT BACKGROUND JOBS ---
+JOB_WORKERS = 2             # Concurrent audit jobs per server process
+JOB_POLL_SECONDS = 2        # Refresh interval of the progress view
+RESULTS_PAGE_SIZE = 25      # Requirements rendered per page of the report (see results_view.py)
+
+# --- WORK QUEUE (work_queue.py coordinator + workers) ---
+QUEUE_DB = os.path.join("logs", "work_queue.db")   # Shared by every worker (same path on all hosts)
+QUEUE_LEASE_SECONDS = 300   # A task is handed to another worker if its lease is not renewed in time
+QUEUE_MAX_ATTEMPTS = 3      # Claims per task before it is marked failed
+QUEUE_POLL_SECONDS = 1.0    # Idle wait of workers and the coordinator
+SQLITE_JOURNAL_MODE = "WAL" # "DELETE" when workers on several hosts share the logs folder (WAL needs one host)
+
+# --- UPLOAD STORE ---
+UPLOAD_CHUNK_BYTES = 1024 * 1024            # Read/write chunk for uploads
+BLOB_STORE_MAX_BYTES = 5 * 1024 ** 3        # GC threshold for data/blobs
+
+# --- CATALOGING (map-reduce for long files) ---
+CATALOG_CHUNK_CHARS = 30000     # Max characters per Cataloger call (page-aligned)
+CATALOG_CONCURRENCY = 4         # Parallel Cataloger calls per file
+CATALOG_MAX_CHUNKS = None       # Optional cap on calls per file (None = whole file)
+
+# --- NEAR-DUPLICATE FILES (MinHash, see near_duplicates.py) ---
+DEDUP_DOCUMENTS = True              # Catalog and route only one file of each group of near-duplicates
+DEDUP_THRESHOLD = 0.85              # Estimated Jaccard similarity of word shingles to count as duplicates
+DEDUP_NUM_PERM = 128                # MinHash signature length
+DEDUP_SHINGLE_WORDS = 5             # Words per shingle
+DEDUP_MIN_WORDS = 50                # Files with less text (e.g. scans without OCR) are never grouped
+DUPLICATES_FILE = os.path.join(DATA_DIR, "duplicate_groups.json")   # Groups found with the cached index
+
+# --- TEXT NORMALIZATION (extracted PDF text) ---
+NORMALIZE_TEXT = True               # Strip repeated headers/footers, page numbers and layout artifacts
+BOILERPLATE_PAGE_FRACTION = 0.5     # A line is boilerplate if it repeats on this fraction of pages...
+BOILERPLATE_MIN_PAGES = 3           # ...and on at least this many pages
+BOILERPLATE_MAX_LINE_CHARS = 200    # Longer lines are never treated as boilerplate
+BOILERPLATE_EDGE_LINES = 3          # Header/footer zone where digits are ignored when matching
+BOILERPLATE_SAMPLE_PAGES = 40       # Pages that boilerplate is learned from when streaming (legal ingestion)
+
+# --- SCHEDULING ---
+SCHEDULE_REQUIREMENTS = True        # Route first, then audit requirements clustered by shared files/legal chunks
+PRIORITY_CHAPTERS = []              # Chapter substrings audited first, in this order (e.g. ["Plan de Manejo"])
+EXTRACT_CACHE_SIZE = 32             # Extracted PDF texts kept in memory (0 disables)
+PREFETCH_EVIDENCE = True            # Legal retrieval + speculative file parsing run while the Router decides
+PREFETCH_CANDIDATES = 2             # Files closest to the requirement (catalog word overlap) parsed ahead
+PREFETCH_WORKERS = 4                # Threads for prefetching and parallel evidence reads
+
+# --- EVIDENCE ---
+EVIDENCE_MAX_CHARS = 30000          # Characters of each file sent to the Auditor
+ROUTE_PAGE_RANGES = True            # Router also picks page ranges per file; only those pages are extracted
+PAGE_RANGE_MARGIN = 1               # Extra pages read before/after each selected range
+
+# --- SEMANTIC VERDICT CACHE (see verdict_cache.py) ---
+SEMANTIC_CACHE = False              # Opt-in: reuse verdicts of similar requirements on the same evidence and legal basis (single mode)
+SEMANTIC_CACHE_THRESHOLD = 0.92     # Cosine similarity of requirement + criteria embeddings
+SEMANTIC_CACHE_MODE = "confirm"     # "confirm" (cheap checker call first) | "reuse" (no LLM call)
+MODEL_VERDICT_CHECK = MODEL_ROUTER
+PROVIDER_VERDICT_CHECK = PROVIDER_ROUTER
+
+# --- AUDITING MODE ---
+STREAM_AUDITOR = False                   # Stream single Auditor responses: live reasoning in CLI/app, TTFT logged
+AUDIT_MODE = "single"                    # "single" | "grouped" (several requirements per Auditor call)
+AUDIT_GROUP_TOKEN_BUDGET = 200_000       # Max estimated input+output tokens per grouped call
+AUDIT_GROUP_MAX_ITEMS = 10               # Hard cap of requirements per grouped call
+AUDIT_GROUP_OUTPUT_TOKENS_PER_ITEM = 600 # Output allowance per requirement when sizing groups
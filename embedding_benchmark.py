@@ -0,0 +1,132 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import datetime
+import tempfile
+
+# Never needs the Gemini API: select the mock backend before config loads.
+os.environ["TUCANA_LLM_BACKEND"] = "mock"
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+import config
+from agents import extract_pages_from_pdf
+from rag_engine import chunk_text
+from embeddings import create_embedder
+from rag_benchmark import git_commit
+
+# Speed and retrieval-quality check of the embedding backends on the legal
+# corpus. The first backend is the reference: recall@k is the share of its
+# top-k legal chunks that each other backend also returns, per checklist query.
+
+console = Console()
+
+def load_corpus(legal_dir: str, checklist_file: str, synthetic_pages: int) -> tuple:
+    legal_files = sorted(glob.glob(os.path.join(legal_dir, "*.pdf")))
+    if not legal_files or not os.path.exists(checklist_file):
+        from synthetic_corpus import generate_corpus
+        workdir = tempfile.mkdtemp(prefix="tucana_embed_bench_")
+        console.print(f"[yellow]Legal corpus or checklist missing, using a synthetic corpus in {workdir}[/yellow]")
+        corpus = generate_corpus(workdir, files=3, legal_files=3, legal_pages=synthetic_pages, requirements=60)
+        legal_files = sorted(glob.glob(os.path.join(corpus["legal_dir"], "*.pdf")))
+        checklist_file = corpus["checklist_file"]
+
+    chunks = []
+    for path in legal_files:
+        text = "".join(page + "\n" for page in extract_pages_from_pdf(path) if page)
+        chunks.extend(chunk_text(text))
+    with open(checklist_file, "r", encoding="utf-8") as f:
+        queries = [item["requirement"] for item in json.load(f)]
+    return legal_files, chunks, queries
+
+def top_k(query_vectors: np.ndarray, chunk_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ chunk_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embedding backend speed and recall check for LegalRAG.")
+    parser.add_argument("--backends", default="sentence-transformers,onnx-int8", help="First one is the reference")
+    parser.add_argument("--legal-dir", default=config.LEGAL_DIR)
+    parser.add_argument("--checklist", default=config.CHECKLIST_FILE)
+    parser.add_argument("--k", type=int, default=2, help="Chunks retrieved per requirement (LegalRAG uses 2)")
+    parser.add_argument("--synthetic-pages", type=int, default=80, help="Pages per legal file if no corpus is found")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="Exit with status 1 below this recall")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: logs/benchmarks/)")
+    args = parser.parse_args(argv)
+
+    legal_files, chunks, queries = load_corpus(args.legal_dir, args.checklist, args.synthetic_pages)
+    console.print(f"{len(legal_files)} legal files, {len(chunks)} chunks, {len(queries)} queries")
+
+    rows, reference = [], None
+    for backend in args.backends.split(","):
+        with console.status(f"Embedding with {backend}..."):
+            t0 = time.perf_counter()
+            embed = create_embedder(backend)
+            load_seconds = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            chunk_vectors = embed(chunks)
+            ingest_seconds = time.perf_counter() - t0
+            query_vectors = embed(queries)
+
+        row = {
+            "backend": backend,
+            "load_seconds": round(load_seconds, 3),
+            "ingest_seconds": round(ingest_seconds, 3),
+            "chunks_per_second": round(len(chunks) / ingest_seconds, 1) if ingest_seconds else None,
+            "recall_at_k": None, "mean_cosine_to_reference": None
+        }
+        found = top_k(query_vectors, chunk_vectors, args.k)
+        if reference is None:
+            reference = {"found": found, "chunks": chunk_vectors}
+            row["recall_at_k"] = 1.0
+            row["mean_cosine_to_reference"] = 1.0
+        else:
+            overlap = [len(set(a) & set(b)) / len(b) for a, b in zip(found, reference["found"])]
+            row["recall_at_k"] = round(float(np.mean(overlap)), 4)
+            if chunk_vectors.shape == reference["chunks"].shape:
+                row["mean_cosine_to_reference"] = round(float(np.mean(np.sum(chunk_vectors * reference["chunks"], axis=1))), 4)
+        rows.append(row)
+
+    table = Table(title=f"Embedding backends ({len(chunks)} legal chunks, {len(queries)} queries, k={args.k})")
+    columns = {
+        "backend": "Backend", "load_seconds": "Load (s)", "ingest_seconds": "Embed corpus (s)",
+        "chunks_per_second": "Chunks/s", "recall_at_k": f"Recall@{args.k} vs {rows[0]['backend']}",
+        "mean_cosine_to_reference": "Cosine to reference"
+    }
+    for label in columns.values():
+        table.add_column(label)
+    for row in rows:
+        table.add_row(*[str(row[col]) for col in columns])
+    console.print(table)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "parameters": vars(args),
+        "corpus": {"legal_files": [os.path.basename(f) for f in legal_files], "chunks": len(chunks), "queries": len(queries)},
+        "embedding": {"batch_size": config.EMBEDDING_BATCH_SIZE, "threads": config.EMBEDDING_THREADS,
+                      "max_tokens": config.EMBEDDING_MAX_TOKENS},
+        "backends": rows
+    }
+    output = args.output
+    if not output:
+        os.makedirs(os.path.join("logs", "benchmarks"), exist_ok=True)
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join("logs", "benchmarks", f"embeddings_{results['commit']}_{ts}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    console.print(f"[green]Results written to {output}[/green]")
+
+    low = [r["backend"] for r in rows if r["recall_at_k"] is not None and r["recall_at_k"] < args.min_recall]
+    if low:
+        console.print(f"[bold red]Recall below {args.min_recall}: {', '.join(low)}[/bold red]")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import uuid
+from typing import List, Optional
+
+import numpy as np
+
+import config
+from vector_index import normalize_rows
+
+# Embedding backends for LegalRAG (config.EMBEDDING_BACKEND).
+#
+#   "sentence-transformers"  the original all-MiniLM-L6-v2 through PyTorch
+#   "onnx-int8"              the same model exported to ONNX, dynamically
+#                            quantized to int8 and run with onnxruntime
+#
+# Both return L2-normalized float32 rows. The ONNX path tokenizes everything
+# once, sorts texts by token length and pads each batch only to its longest
+# member, so short legal chunks do not pay for long ones.
+
+def hub_repo(model_name: str) -> str:
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str = config.EMBEDDING_MODEL,
+                 batch_size: int = config.EMBEDDING_BATCH_SIZE, threads: Optional[int] = config.EMBEDDING_THREADS):
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True),
+            dtype=np.float32
+        )
+
+class OnnxInt8Embedder:
+    def __init__(self, model_name: str = config.EMBEDDING_MODEL, models_dir: str = config.MODELS_DIR,
+                 batch_size: int = config.EMBEDDING_BATCH_SIZE, threads: Optional[int] = config.EMBEDDING_THREADS,
+                 max_tokens: int = config.EMBEDDING_MAX_TOKENS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        from huggingface_hub import hf_hub_download
+
+        repo = hub_repo(model_name)
+        model_path = self._quantized_model(repo, models_dir)
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(repo, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or 0  # 0 = one per physical core
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _quantized_model(repo: str, models_dir: str) -> str:
+        """Downloads the ONNX export once and stores an int8 dynamically quantized copy."""
+        target = os.path.join(models_dir, f"{repo.split('/')[-1]}-int8.onnx")
+        if os.path.exists(target):
+            return target
+
+        from huggingface_hub import hf_hub_download
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        os.makedirs(models_dir, exist_ok=True)
+        source = hf_hub_download(repo, "onnx/model.onnx")
+        tmp_path = os.path.join(models_dir, f"{uuid.uuid4().hex}.onnx")
+        quantize_dynamic(source, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, target)
+        return target
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+        pooled = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            width = max(len(encodings[i].ids) for i in batch)
+            input_ids = np.zeros((len(batch), width), dtype=np.int64)
+            attention = np.zeros((len(batch), width), dtype=np.int64)
+            for row, i in enumerate(batch):
+                ids = encodings[i].ids
+                input_ids[row, :len(ids)] = ids
+                attention[row, :len(ids)] = 1
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]  # (batch, tokens, dim)
+
+            # Mean pooling over real tokens, as sentence-transformers does
+            mask = attention[:, :, None].astype(np.float32)
+            means = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            for row, i in enumerate(batch):
+                pooled[i] = means[row]
+
+        return normalize_rows(np.stack(pooled))
+
+def create_embedder(backend: Optional[str] = None):
+    backend = backend or config.EMBEDDING_BACKEND
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbedder()
+    if backend == "onnx-int8":
+        return OnnxInt8Embedder()
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,242 @@
+import time
+import uuid
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+import config
+from agents import AuditCancelled, set_cancel_event
+from tracing import Tracer
+from profiler import Profiler
+from pipeline import catalog_files, skip_near_duplicates, audit_checklist
+import resources
+
+# Background execution of the audit pipeline for app.py. Jobs live in a
+# process-wide JobManager, so they survive Streamlit reruns and browser
+# refreshes; the page only polls their state.
+
+STAGE_LABELS = {"route": "enrutando", "evidence": "evidencia", "audit": "auditor"}
+
+class AuditJob:
+    def __init__(self, checklist: List[dict], pdf_paths: List[str], pdf_dir: str,
+                 catalog_cache: Optional[Dict[str, dict]] = None,
+                 file_hashes: Optional[Dict[str, str]] = None, profile: bool = False):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.checklist = checklist
+        self.pdf_paths = pdf_paths
+        self.pdf_dir = pdf_dir
+        self.catalog_cache = catalog_cache or {}
+        self.file_hashes = file_hashes or {}  # filename -> sha256 in the upload store
+        self.profile = profile                # CPU/memory profile of the run (profiler.py)
+        self.profile_files: Optional[tuple] = None
+
+        self.status = "queued"   # queued | running | completed | cancelled | failed
+        self.stage = "En cola"
+        self.events: List[str] = []
+        self.partial: Optional[Dict[str, str]] = None   # Streamed reasoning of the requirement being audited
+        self.results: List[dict] = []
+        self.revision = 0        # Bumped on every change to results (cache key of the report view)
+        self.project_index: List[dict] = []
+        self.duplicate_groups: List[dict] = []   # Near-duplicate files left out of cataloging
+        self.done = 0
+        self.error: Optional[str] = None
+        self.total_cost = 0.0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return len(self.checklist)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "cancelled", "failed")
+
+    @property
+    def elapsed(self) -> float:
+        if not self.start_time:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def cancel(self):
+        """Stops the job before its next LLM call."""
+        self.cancel_event.set()
+        with self._lock:
+            if self.status in ("queued", "running"):
+                self.stage = "Cancelando..."
+
+    def log(self, message: str):
+        with self._lock:
+            self.events.append(message)
+
+    def set_partial(self, req_id: str, reasoning: str):
+        with self._lock:
+            self.partial = {"req_id": req_id, "reasoning": reasoning}
+
+    def add_result(self, result: dict):
+        with self._lock:
+            self.results.append(result)
+            self.revision += 1
+            self.done += 1
+            self.partial = None
+
+    def set_results(self, results: List[dict]):
+        """Replaces the live (completion-order) results with the final checklist-order list."""
+        with self._lock:
+            self.results = list(results)
+            self.revision += 1
+
+    def snapshot(self) -> dict:
+        """Consistent copy of the state for rendering."""
+        with self._lock:
+            return {
+                "status": self.status, "stage": self.stage, "done": self.done, "total": self.total,
+                "events": list(self.events), "results": list(self.results), "revision": self.revision,
+                "partial": self.partial,
+                "elapsed": self.elapsed, "error": self.error
+            }
+
+def run_audit_job(job: AuditJob):
+    # Up to JOB_WORKERS jobs run at once: each records its spans into its own
+    # Tracer instead of resetting the process-wide one
+    with Tracer().activate() as job_tracer:
+        _run_audit_job(job, job_tracer)
+
+def _run_audit_job(job: AuditJob, job_tracer: Tracer):
+    job.status = "running"
+    job.start_time = time.time()
+    run_start_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    set_cancel_event(job.cancel_event)
+    audit_logger = resources.new_audit_logger()
+    legal_filenames = []
+    profiler = Profiler() if job.profile else None
+    if profiler and not profiler.start():
+        # The sampler and tracemalloc are process-wide
+        job.log("Ya hay otra auditoría perfilándose: esta se ejecuta sin perfil.")
+        profiler = None
+
+    try:
+        # --- PASO 1: MARCO LEGAL ---
+        job.stage = "📚 Paso 1/3: Verificando Normativa Legal..."
+        # Resources are warmed up at server start; only files missing from the index are read here
+        rag = resources.get_legal_rag()
+        legal_filenames = resources.ingest_legal(on_file=lambda f: job.log(f"Leyendo: {f}"))
+
+        # --- PASO 2: CATALOGACIÓN ---
+        job.stage = "🔍 Paso 2/3: Analizando estructura de documentos..."
+        cataloger = resources.get_cataloger()
+        pdf_paths, job.duplicate_groups = skip_near_duplicates(job.pdf_paths)
+        for group in job.duplicate_groups:
+            for duplicate in group["duplicates"]:
+                job.log(f"Omitido por duplicado: {duplicate['filename']} ≈ {group['representative']} ({duplicate['similarity']:.0%})")
+        job.project_index, catalog_cost = catalog_files(
+            cataloger, pdf_paths, audit_logger, cache=job.catalog_cache,
+            on_file=lambda f, outcome: job.log(f"Indexado: {f} ({outcome})")
+        )
+        job.total_cost += catalog_cost
+
+        # Cache new catalog entries by content hash for later uploads of the same file
+        blob_store = resources.get_blob_store()
+        for entry in job.project_index:
+            digest = job.file_hashes.get(entry['filename'])
+            if digest and entry['filename'] not in job.catalog_cache:
+                blob_store.put_catalog(digest, entry)
+
+        # --- PASO 3: AUDITORÍA ---
+        router = resources.get_router()
+        auditor = resources.get_auditor()
+        def on_stage(stage, req_id):
+            if job.cancel_event.is_set():
+                raise AuditCancelled()
+            job.stage = f"⚖️ Auditando ({STAGE_LABELS[stage]}) {job.done + 1}/{job.total}: {req_id}"
+
+        def on_result(result):
+            job.total_cost += result["cost"]
+            job.log(f"{result['id']}: {result['status']}")
+            job.add_result(result)
+
+        results = audit_checklist(
+            job.checklist, job.project_index, router, auditor, rag, audit_logger, job.pdf_dir,
+            on_stage=on_stage, on_result=on_result, on_partial=job.set_partial
+        )
+        job.set_results(results)
+
+        job.status = "completed"
+        job.stage = "⚖️ Auditoría Finalizada"
+    except AuditCancelled:
+        job.status = "cancelled"
+        job.stage = "⏹️ Auditoría cancelada"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        job.stage = "Error crítico durante el proceso"
+    finally:
+        set_cancel_event(None)
+        job.end_time = time.time()
+        if profiler:
+            profiler.stop()
+            job.profile_files = audit_logger.log_profile(profiler)
+            job.log(f"Perfil guardado: {', '.join(job.profile_files)}")
+        metadata = {
+            "run_start": run_start_str,
+            "run_end": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "total_duration_seconds": round(job.elapsed, 2),
+            "total_cost_estimated_usd": round(job.total_cost, 6),
+            "input_folder": "Streamlit Upload",
+            "job_id": job.job_id,
+            "job_status": job.status,
+            "files_analyzed": [entry['filename'] for entry in job.project_index],
+            "duplicate_groups": job.duplicate_groups,
+            "legal_files_used": legal_filenames,
+            "legal_version": config.LEGAL_VERSION,
+            "semantic_cache_hits": sum(1 for r in job.results if "reused_from" in r),
+            "configuration": {
+                "model_cataloger": config.MODEL_CATALOGER,
+                "model_router": config.MODEL_ROUTER,
+                "model_auditor": config.MODEL_AUDITOR,
+                "providers": {
+                    "cataloger": config.PROVIDER_CATALOGER,
+                    "router": config.PROVIDER_ROUTER,
+                    "auditor": config.PROVIDER_AUDITOR
+                },
+                "rate_limit": config.RATE_LIMIT_CALLS,
+                "sampling_limit": config.AUDIT_CHECKLIST_LIMIT,
+                "audit_mode": config.AUDIT_MODE,
+                "stream_auditor": config.STREAM_AUDITOR,
+                "semantic_cache": config.SEMANTIC_CACHE and config.SEMANTIC_CACHE_MODE,
+                "semantic_cache_threshold": config.SEMANTIC_CACHE_THRESHOLD
+            },
+            "stage_latency_seconds": job_tracer.summary(),
+            "profile_files": job.profile_files
+        }
+        audit_logger.log_metadata(metadata)
+        audit_logger.log_trace(job_tracer)
+
+class JobManager:
+    """Worker pool plus registry of jobs, shared by every Streamlit session."""
+
+    def __init__(self, max_workers: int = config.JOB_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audit-job")
+        self.jobs: Dict[str, AuditJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job: AuditJob) -> AuditJob:
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self.executor.submit(run_audit_job, job)
+        return job
+
+    def active_hashes(self) -> set:
+        """Upload hashes still needed by queued or running jobs (protected from GC)."""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {h for job in jobs if not job.finished for h in job.file_hashes.values()}
+
+    def get(self, job_id: Optional[str]) -> Optional[AuditJob]:
+        if not job_id:
+            return None
+        with self._lock:
+            return self.jobs.get(job_id)
@@ -0,0 +1,167 @@
+import os
+import io
+import json
+import shutil
+import zipfile
+import argparse
+import datetime
+from typing import List, Optional
+
+# Snapshots only move embeddings around; no LLM is involved.
+os.environ.setdefault("TUCANA_LLM_BACKEND", "mock")
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+import config
+from rag_engine import LegalRAG, version_dir
+from vector_index import VECTORS_FILE, CHUNKS_FILE
+from pipeline import ingest_legal_framework, file_digest
+
+# Portable legal index snapshots (one .zip per corpus version):
+#   manifest.json   version, embedding model/backend, dimension, chunk count,
+#                   sha256 of every source legal PDF
+#   chunks.json     ids, documents and metadatas in row order
+#   vectors.npy     float32 embeddings (N x D)
+# A node can start from a snapshot instead of re-extracting and re-embedding
+# the legal PDFs, and several versions can be mounted side by side under
+# <DB_DIR>/versions/<version>/ (see LegalRAG(version=...)).
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+
+# --- EXPORT ---
+def export_snapshot(rag: LegalRAG, path: str, version: str, legal_dir: str = config.LEGAL_DIR) -> dict:
+    """Writes the contents of `rag` to a snapshot file. Returns the manifest."""
+    ids, documents, metadatas, vectors = rag.store.export()
+    if not ids:
+        raise ValueError("The legal index is empty, nothing to export")
+
+    sources = {}
+    for source in sorted({m.get("source") for m in metadatas if m}):
+        source_path = os.path.join(legal_dir, source)
+        sources[source] = file_digest(source_path) if os.path.exists(source_path) else None
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "embedding_model": config.EMBEDDING_MODEL,
+        "embedding_backend": rag.embedding_backend,
+        "dim": int(vectors.shape[1]),
+        "count": len(ids),
+        "sources": sources
+    }
+
+    buffer = io.BytesIO()
+    np.save(buffer, vectors.astype(np.float32))
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(MANIFEST_FILE, json.dumps(manifest, indent=2, ensure_ascii=False))
+        zf.writestr(CHUNKS_FILE, json.dumps({"ids": ids, "documents": documents, "metadatas": metadatas}, ensure_ascii=False))
+        zf.writestr(VECTORS_FILE, buffer.getvalue())
+    os.replace(tmp_path, path)
+    return manifest
+
+# --- IMPORT ---
+def check_compatible(manifest: dict, embedding_backend: str = config.EMBEDDING_BACKEND):
+    """Query vectors must come from the same model as the snapshot's vectors."""
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+    if (manifest["embedding_model"], manifest["embedding_backend"]) != (config.EMBEDDING_MODEL, embedding_backend):
+        raise ValueError(
+            f"Snapshot was embedded with {manifest['embedding_model']} ({manifest['embedding_backend']}), "
+            f"current setting is {config.EMBEDDING_MODEL} ({embedding_backend})"
+        )
+
+def import_snapshot(path: str, db_dir: str = config.DB_DIR, rag: Optional[LegalRAG] = None) -> dict:
+    """
+    Without `rag`, unpacks the snapshot as a pinned version under
+    <db_dir>/versions/<version>/. With `rag`, loads it into that (default) index.
+    Returns the manifest.
+    """
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read(MANIFEST_FILE))
+        check_compatible(manifest, rag.embedding_backend if rag else config.EMBEDDING_BACKEND)
+
+        if rag is not None:
+            chunks = json.loads(zf.read(CHUNKS_FILE))
+            vectors = np.load(io.BytesIO(zf.read(VECTORS_FILE)))
+            rag.store.upsert(chunks["ids"], chunks["documents"], vectors, chunks["metadatas"])
+            return manifest
+
+        target = version_dir(db_dir, manifest["version"])
+        tmp_dir = f"{target}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in (MANIFEST_FILE, CHUNKS_FILE, VECTORS_FILE):
+            zf.extract(name, tmp_dir)
+
+    # Swap in the complete folder so a mounted version is never half-written
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    return manifest
+
+def list_versions(db_dir: str = config.DB_DIR) -> List[dict]:
+    """Manifests of every imported version, sorted by version name."""
+    root = os.path.join(db_dir, "versions")
+    if not os.path.isdir(root):
+        return []
+    manifests = []
+    for name in sorted(os.listdir(root)):
+        manifest_path = os.path.join(root, name, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    return manifests
+
+# --- CLI ---
+console = Console()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and import prebuilt legal index snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Write the default legal index to a snapshot file")
+    export_cmd.add_argument("path", help="Snapshot file to write (.zip)")
+    export_cmd.add_argument("--version", required=True, help="Corpus version label, e.g. 2024-06")
+
+    import_cmd = commands.add_parser("import", help="Import a snapshot file")
+    import_cmd.add_argument("path", help="Snapshot file to read")
+    import_cmd.add_argument("--default", action="store_true",
+                            help="Load into the default legal index instead of mounting it as a pinned version")
+
+    commands.add_parser("list", help="List imported corpus versions")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        rag = LegalRAG()
+        with console.status("[bold blue]Indexing Legal Documents...[/bold blue]"):
+            # Only files missing from the index are ingested
+            ingest_legal_framework(rag, config.LEGAL_DIR, on_file=lambda f: console.print(f"[green]✓ Indexing: {f}[/green]"))
+        manifest = export_snapshot(rag, args.path, args.version)
+        console.print(f"[green]Exported {manifest['count']} chunks from {len(manifest['sources'])} file(s) to {args.path}[/green]")
+
+    elif args.command == "import":
+        rag = LegalRAG() if args.default else None
+        manifest = import_snapshot(args.path, rag=rag)
+        where = "the default legal index" if args.default else version_dir(config.DB_DIR, manifest["version"])
+        console.print(f"[green]Imported version {manifest['version']} ({manifest['count']} chunks) into {where}[/green]")
+
+    else:
+        versions = list_versions()
+        if not versions:
+            console.print("[dim]No legal corpus versions imported.[/dim]")
+            return
+        table = Table(title="Legal Corpus Versions", box=box.SIMPLE)
+        for col in ["Version", "Created", "Chunks", "Sources", "Embedding"]:
+            table.add_column(col)
+        for m in versions:
+            table.add_row(m["version"], m["created"], str(m["count"]), ", ".join(m["sources"]),
+                          f"{m['embedding_model']} ({m['embedding_backend']})")
+        console.print(table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import json
+import queue
+import threading
+import http.client
+from types import SimpleNamespace
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+
+# LLM providers behind BaseAgent.generate_structured, selected per agent with
+# config.PROVIDER_CATALOGER / PROVIDER_ROUTER / PROVIDER_AUDITOR:
+#
+#   "gemini"  Google AI API (google-generativeai keeps its own gRPC channel)
+#   "openai"  any OpenAI-compatible /chat/completions server, e.g. llama.cpp's
+#             llama-server, over pooled keep-alive HTTP connections
+#   "mock"    offline stand-in from mock_llm.py (forced by LLM_BACKEND = "mock")
+#
+# Every provider exposes the part of genai.GenerativeModel the agents use:
+#   generate_content(prompt, generation_config=None, stream=False)
+#       -> object with .text and .usage_metadata, or an iterator of such chunks
+#   count_tokens(prompt) -> object with .total_tokens
+
+PROVIDERS = ("gemini", "openai", "mock")
+
+# --- HTTP CONNECTION POOL ---
+# A keep-alive socket the server closed while idle fails on first use; such
+# errors are retried once on a fresh connection.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+class ConnectionPool:
+    """Up to `size` keep-alive connections to one server, shared by all threads."""
+
+    def __init__(self, base_url: str, size: int, timeout: float):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection, response: Optional[http.client.HTTPResponse]):
+        """Returns the connection for reuse, or closes it if the server will close it anyway."""
+        if response is None or response.will_close:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def _open(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                self._release(conn, None)
+                if attempt:
+                    raise
+            except Exception:
+                self._release(conn, None)
+                raise
+
+    def request(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        conn, response = self._open(method, path, body, headers)
+        try:
+            data = response.read()
+        except Exception:
+            self._release(conn, None)
+            raise
+        self._release(conn, response)
+        return response.status, data
+
+    def stream_lines(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Iterator[bytes]:
+        """Yields the response body line by line (server-sent events); raises on a non-200 status."""
+        conn, response = self._open(method, path, body, headers)
+        finished = False
+        try:
+            if response.status != 200:
+                raise RuntimeError(f"{response.status} {response.reason}: {response.read()[:500].decode('utf-8', 'replace')}")
+            for line in response:
+                yield line
+            finished = True
+        finally:
+            # A stream abandoned half way leaves unread data: drop that connection
+            self._release(conn, response if finished else None)
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(base_url: str, size: int = config.OPENAI_POOL_SIZE, timeout: float = config.OPENAI_TIMEOUT) -> ConnectionPool:
+    """One pool per server, shared by every agent that talks to it."""
+    key = (base_url, size, timeout)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(base_url, size, timeout)
+        return _pools[key]
+
+# --- OPENAI-COMPATIBLE PROVIDER ---
+def _usage(usage: Optional[dict]):
+    if not usage:
+        return None
+    return SimpleNamespace(
+        prompt_token_count=usage.get("prompt_tokens", 0),
+        candidates_token_count=usage.get("completion_tokens", 0)
+    )
+
+class OpenAICompatibleModel:
+    def __init__(self, model_name: str, base_url: str = config.OPENAI_BASE_URL, api_key: str = config.OPENAI_API_KEY):
+        self.model_name = model_name
+        self.pool = get_pool(base_url)
+        self.headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _body(self, prompt: str, generation_config: Optional[dict], stream: bool) -> bytes:
+        generation_config = generation_config or {}
+        payload = {"model": self.model_name, "messages": [{"role": "user", "content": prompt}]}
+        if "temperature" in generation_config:
+            payload["temperature"] = generation_config["temperature"]
+        if generation_config.get("response_mime_type") == "application/json":
+            payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    def generate_content(self, prompt: str, generation_config: Optional[dict] = None, stream: bool = False, **kwargs):
+        body = self._body(prompt, generation_config, stream)
+        if stream:
+            return self._stream(body)
+        status, data = self.pool.request("POST", "/chat/completions", body, self.headers)
+        if status != 200:
+            raise RuntimeError(f"{status}: {data[:500].decode('utf-8', 'replace')}")
+        response = json.loads(data)
+        return SimpleNamespace(
+            text=response["choices"][0]["message"].get("content") or "",
+            usage_metadata=_usage(response.get("usage"))
+        )
+
+    def _stream(self, body: bytes):
+        for raw in self.pool.stream_lines("POST", "/chat/completions", body, self.headers):
+            line = raw.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                continue   # read on to the end so the connection can be reused
+            event = json.loads(data)
+            choices = event.get("choices") or []
+            text = (choices[0].get("delta") or {}).get("content") or "" if choices else ""
+            yield SimpleNamespace(text=text, usage_metadata=_usage(event.get("usage")))
+
+    def count_tokens(self, prompt: str):
+        # Servers report usage with every response; this is only the fallback estimate
+        return SimpleNamespace(total_tokens=max(1, len(prompt) // 4))
+
+# --- FACTORY ---
+def uses_gemini() -> bool:
+    return config.LLM_BACKEND != "mock" and "gemini" in (
+        config.PROVIDER_CATALOGER, config.PROVIDER_ROUTER, config.PROVIDER_AUDITOR
+    )
+
+def configure_providers():
+    if uses_gemini():
+        import google.generativeai as genai
+        genai.configure(api_key=config.GOOGLE_API_KEY)
+
+def create_model(provider: str, model_name: str):
+    """Returns the generative model of `provider`; LLM_BACKEND = "mock" overrides every agent."""
+    if config.LLM_BACKEND == "mock" or provider == "mock":
+        from mock_llm import MockGenerativeModel
+        return MockGenerativeModel(
+            model_name, latency=config.MOCK_LLM_LATENCY, error_rate=config.MOCK_LLM_ERROR_RATE
+        )
+    if provider == "openai":
+        return OpenAICompatibleModel(model_name)
+    if provider == "gemini":
+        import google.generativeai as genai
+        return genai.GenerativeModel(model_name)
+    raise ValueError(f"Unknown LLM provider: {provider}")
@@ -1,7 +1,12 @@
 import csv
 import os
 import json
+import uuid
 import datetime
+import config
+from run_store import (
+    RunStore, export_detailed_rows, export_user_rows, export_catalog_rows, write_csv
+)
 
 # Pricing Constants (Feb 2026 - USD per 1 Million Tokens)
 PRICE_FLASH_INPUT = 0.30
@@ -9,35 +14,57 @@ PRICE_FLASH_OUTPUT = 2.50
 PRICE_PRO_INPUT = 1.25
 PRICE_PRO_OUTPUT = 10.00
 
+RUN_STORE_FILENAME = "audit_runs.db"
+
+def new_run_id() -> str:
+    """Sortable session id; microseconds plus a random suffix keep concurrent app jobs apart."""
+    return f"{datetime.datetime.now():%Y%m%d_%H%M%S_%f}_{uuid.uuid4().hex[:4]}"
+
 class AuditLogger:
-    def __init__(self, output_dir="./logs"):
+    def __init__(self, output_dir="./logs", store: RunStore = None, run_id: str = None):
         os.makedirs(output_dir, exist_ok=True)
-        
-        self.session_ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
+        self.output_dir = output_dir
+
+        # With run_id (work_queue.py task attempts) rows go to the run store only;
+        # the coordinator adopts them into its run and exports the CSVs
+        self.session_ts = run_id or new_run_id()
+        self.run_id = self.session_ts
+        self.write_csvs = run_id is None
+
+        # --- SQLite run store (source of truth; the CSVs are exports) ---
+        self.store = store or RunStore(
+            os.path.join(output_dir, RUN_STORE_FILENAME), journal_mode=config.SQLITE_JOURNAL_MODE
+        )
+        self.store.start_run(self.run_id, run_start=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
         self.file_detailed = os.path.join(output_dir, f"audit_detailed_{self.session_ts}.csv")
         self.file_user = os.path.join(output_dir, f"audit_report_USER_{self.session_ts}.csv")
         self.file_catalog = os.path.join(output_dir, f"audit_catalog_{self.session_ts}.csv")
         self.file_metadata = os.path.join(output_dir, f"run_metadata_{self.session_ts}.json")
-        
+        self.file_trace = os.path.join(output_dir, f"trace_{self.session_ts}.json")
+        self.file_metrics = os.path.join(output_dir, f"metrics_{self.session_ts}.prom")
+        self.file_changes = os.path.join(output_dir, f"audit_changes_{self.session_ts}.csv")
+
         self.headers_detailed = [
             "Req_ID", "Requirement_Text", "Duration_Seconds",
             "Router_Model", "Router_Input_Tokens", "Router_Output_Tokens", "Router_Cost", "Router_Files", "Router_Reasoning",
             "Auditor_Model", "Auditor_Input_Tokens", "Auditor_Output_Tokens", "Auditor_Cost",
-            "Audit_Status", "Audit_Reasoning", "Instruction", "Total_Req_Cost"
+            "Audit_Status", "Audit_Reasoning", "Instruction", "Total_Req_Cost", "Auditor_TTFT_Seconds",
+            "Reused_From"
         ]
-        
+
         self.headers_user = [
             "Req_ID", "Requirement_Text", "Duration_Seconds",
             "Selected_Files", "Audit_Status", "Audit_Reasoning", "Instruction"
         ]
 
         self.headers_catalog = [
-            "Timestamp", "Filename", "Status", "Model", 
-            "Input_Tokens", "Output_Tokens", "Cost"
+            "Timestamp", "Filename", "Status", "Model",
+            "Input_Tokens", "Output_Tokens", "Cost", "Compression_Ratio"
         ]
 
-        self._initialize_csvs()
+        if self.write_csvs:
+            self._initialize_csvs()
 
     def _initialize_csvs(self):
         with open(self.file_detailed, mode='w', newline='', encoding='utf-8') as f:
@@ -47,74 +74,133 @@ class AuditLogger:
         with open(self.file_catalog, mode='w', newline='', encoding='utf-8') as f:
             csv.writer(f).writerow(self.headers_catalog)
 
+    def _append_rows(self, path, rows):
+        if not self.write_csvs:
+            return
+        with open(path, mode='a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(rows)
+
     def log_metadata(self, data: dict):
         with open(self.file_metadata, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
+        self.store.finish_run(self.run_id, data)
+
+    def log_trace(self, tracer):
+        """Writes the span trace (JSON) and the Prometheus metrics file for this session."""
+        tracer.export_json(self.file_trace)
+        tracer.export_prometheus(self.file_metrics)
+
+    def log_profile(self, profiler):
+        """Writes the folded CPU stacks and the per-stage CPU/memory summary of a profiled session."""
+        return profiler.write(self.output_dir, self.session_ts)
+
+    def export_csvs(self, order=None):
+        """
+        Rewrites the three session CSVs from the run store. `order` (list of req_ids,
+        e.g. the checklist) sorts the results; others follow in logging order.
+        """
+        results = self.store.requirement_results(self.run_id)
+        if order:
+            position = {req_id: i for i, req_id in enumerate(order)}
+            results = sorted(results, key=lambda r: position.get(r["req_id"], len(position)))
+        write_csv(self.file_detailed, self.headers_detailed, export_detailed_rows(results))
+        write_csv(self.file_user, self.headers_user, export_user_rows(results))
+        write_csv(self.file_catalog, self.headers_catalog, export_catalog_rows(self.store.catalog_calls(self.run_id)))
+
+    def log_change_report(self, changes):
+        """Writes the verdict changes of a re-audit (see pipeline.compare_results)."""
+        write_csv(
+            self.file_changes,
+            ["Req_ID", "Change", "Previous_Status", "New_Status", "Carried_Forward"],
+            [[c["req_id"], c["change"], c["previous_status"], c["new_status"], c["carried"]] for c in changes]
+        )
 
     def calculate_cost(self, model_name, input_tok, output_tok):
+        if model_name in config.LOCAL_MODELS:
+            return 0.0
         in_m = input_tok / 1_000_000
         out_m = output_tok / 1_000_000
-        
+
         if "flash" in model_name.lower():
             cost = (in_m * PRICE_FLASH_INPUT) + (out_m * PRICE_FLASH_OUTPUT)
         else:
             cost = (in_m * PRICE_PRO_INPUT) + (out_m * PRICE_PRO_OUTPUT)
         return cost
 
-    def log_catalog(self, filename, status, model_name, input_tok, output_tok):
+    def log_catalog(self, filename, status, model_name, input_tok, output_tok, compression_ratio=None):
         cost = self.calculate_cost(model_name, input_tok, output_tok)
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        
-        row = [
-            timestamp, filename, status, model_name,
-            input_tok, output_tok, f"${cost:.6f}"
-        ]
-        
-        with open(self.file_catalog, mode='a', newline='', encoding='utf-8') as f:
-            csv.writer(f).writerow(row)
-        
-        return cost 
+        now = datetime.datetime.now()
+        timestamp = now.strftime("%H:%M:%S")
+
+        row_id = self.store.add_catalog_call(
+            self.run_id, timestamp, filename, status, model_name, input_tok, output_tok, cost, compression_ratio
+        )
+        self.store.add_llm_call(
+            self.run_id, now.isoformat(timespec="seconds"), "cataloger", model_name,
+            input_tok, output_tok, cost, filename=filename
+        )
+        self._append_rows(self.file_catalog, export_catalog_rows(self.store.catalog_call(row_id)))
 
-    def log_requirement(self, req_id, req_text, duration, router_data, auditor_data):
+        return cost
+
+    def log_llm_call(self, agent, model_name, input_tok, output_tok, req_id=None):
+        """Records a call that is not tied to a single result row (e.g. a failed grouped audit)."""
+        cost = self.calculate_cost(model_name, input_tok, output_tok)
+        self.store.add_llm_call(
+            self.run_id, datetime.datetime.now().isoformat(timespec="seconds"), agent, model_name,
+            input_tok, output_tok, cost, req_id=req_id
+        )
+        return cost
+
+    def log_requirement(self, req_id, req_text, duration, router_data, auditor_data, hashes=None, carried_from=None,
+                        reused_from=None, extra_cost=0.0):
+        # extra_cost: calls already in llm_calls that belong to this requirement (e.g. a rejected verdict check)
         r_cost = self.calculate_cost(router_data['model'], router_data['input'], router_data['output'])
         a_cost = self.calculate_cost(auditor_data['model'], auditor_data['input'], auditor_data['output'])
-        total_cost = r_cost + a_cost
-
-        row_detailed = [
-            req_id,
-            req_text,
-            f"{duration:.2f}",
-            router_data['model'],
-            router_data['input'],
-            router_data['output'],
-            f"${r_cost:.6f}",
-            router_data['files'],
-            router_data.get('reasoning', 'N/A'), 
-            auditor_data['model'],
-            auditor_data['input'],
-            auditor_data['output'],
-            f"${a_cost:.6f}",
-            auditor_data['status'],
-            auditor_data['reasoning'],
-            auditor_data.get('instruction', 'N/A'),
-            f"${total_cost:.6f}"
-        ]
+        total_cost = r_cost + a_cost + extra_cost
 
-        row_user = [
-            req_id,
-            req_text,
-            f"{duration:.2f}",
-            router_data['files'],
-            auditor_data['status'],
-            auditor_data['reasoning'],
-            auditor_data.get('instruction', 'N/A')
-        ]
+        row = {
+            "req_id": req_id,
+            "requirement_text": req_text,
+            "duration_seconds": duration,
+            "router_model": router_data['model'],
+            "router_input_tokens": router_data['input'],
+            "router_output_tokens": router_data['output'],
+            "router_cost_usd": r_cost,
+            "router_files": router_data['files'],
+            "router_reasoning": router_data.get('reasoning', 'N/A'),
+            "router_pages": json.dumps(router_data['pages'], ensure_ascii=False) if router_data.get('pages') else None,
+            "auditor_model": auditor_data['model'],
+            "auditor_input_tokens": auditor_data['input'],
+            "auditor_output_tokens": auditor_data['output'],
+            "auditor_cost_usd": a_cost,
+            "audit_status": auditor_data['status'],
+            "audit_reasoning": auditor_data['reasoning'],
+            "instruction": auditor_data.get('instruction', 'N/A'),
+            "total_cost_usd": total_cost,
+            "evidence_location": auditor_data.get('evidence_location'),
+            "auditor_ttft_seconds": auditor_data.get('ttft_seconds'),
+            "carried_from": carried_from,
+            "reused_from": reused_from
+        }
+        row.update(hashes or {})
+        row_id = self.store.add_requirement_result(self.run_id, row)
+
+        timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+        if router_data['input'] or router_data['output']:
+            self.store.add_llm_call(
+                self.run_id, timestamp, "router", router_data['model'],
+                router_data['input'], router_data['output'], r_cost, req_id=req_id
+            )
+        if auditor_data['input'] or auditor_data['output']:
+            self.store.add_llm_call(
+                self.run_id, timestamp, "auditor", auditor_data['model'],
+                auditor_data['input'], auditor_data['output'], a_cost, req_id=req_id
+            )
 
-        with open(self.file_detailed, mode='a', newline='', encoding='utf-8') as f:
-            csv.writer(f).writerow(row_detailed)
+        stored = self.store.requirement_result(row_id)
+        self._append_rows(self.file_detailed, export_detailed_rows(stored))
+        self._append_rows(self.file_user, export_user_rows(stored))
 
-        with open(self.file_user, mode='a', newline='', encoding='utf-8') as f:
-            csv.writer(f).writerow(row_user)
-            
         # --- FIX IS HERE: RETURN THE COST ---
-        return total_cost
\ No newline at end of file
+        return total_cost
@@ -12,17 +12,22 @@ import json
 import glob
 import csv
 import time
+import argparse
 import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.status import Status
+from rich.markup import escape
 from rich import box
 
 import config
-from agents import CatalogerAgent, RouterAgent, AuditorAgent, extract_text_from_pdf, configure_genai
+from agents import CatalogerAgent, RouterAgent, AuditorAgent, configure_genai
 from rag_engine import LegalRAG
 from logger import AuditLogger
+from tracing import tracer
+from profiler import Profiler
+from pipeline import ingest_legal_framework, catalog_files, skip_near_duplicates, audit_checklist, reaudit_checklist
 
 
 
@@ -84,64 +89,142 @@ def ensure_checklist_exists():
         return False
 
 # --- UPDATED: CATALOGING WITH LOGGING ---
-def load_or_build_index(cataloger: CatalogerAgent, pdf_dir: str) -> tuple[list, float]:
+def load_or_build_index(cataloger: CatalogerAgent, pdf_dir: str) -> tuple[list, float, list]:
     """
-    Returns (project_index, total_indexing_cost)
+    Returns (project_index, total_indexing_cost, duplicate_groups)
     """
-    total_indexing_cost = 0.0
-
     if os.path.exists(config.INDEX_FILE) and not config.FORCE_REINDEX:
         console.print("[green]✓ Index found. Loading from cache...[/green]")
         try:
             with open(config.INDEX_FILE, "r") as f:
                 data = json.load(f)
-                if data: return data, 0.0 # Cost is 0 if cached
+            if data:
+                duplicate_groups = []
+                if os.path.exists(config.DUPLICATES_FILE):
+                    with open(config.DUPLICATES_FILE, "r") as f:
+                        duplicate_groups = json.load(f)
+                return data, 0.0, duplicate_groups # Cost is 0 if cached
         except json.JSONDecodeError:
             pass 
 
     console.print("[yellow]! Index missing or refresh requested. Starting Deep Content Scan...[/yellow]")
     
     pdf_files = glob.glob(os.path.join(pdf_dir, "*.pdf"))
-    project_index = []
+    with console.status("[bold blue]Looking for duplicate files..."):
+        pdf_files, duplicate_groups = skip_near_duplicates(pdf_files)
+    print_duplicate_groups(duplicate_groups)
     
     with console.status("[bold blue]Cataloger Agent working...") as status:
-        for pdf in pdf_files:
-            filename = os.path.basename(pdf)
-            status.update(f"Scanning content of: {filename}")
-            
-            # --- UPDATE: Capture Usage ---
-            file_index, usage = cataloger.analyze_file(pdf)
-            
-            if file_index:
-                project_index.append(file_index.model_dump())
-                
-                # --- UPDATE: Log to CSV ---
-                cost = audit_logger.log_catalog(
-                    filename, "SUCCESS", config.MODEL_CATALOGER, 
-                    usage['input_tokens'], usage['output_tokens']
-                )
-                total_indexing_cost += cost
-                
-                # console.print(f"[green]✓ Indexed: {filename} (${cost:.4f})[/green]")
+        def on_file(filename, outcome):
+            if outcome == "SUCCESS":
                 console.print(f"[green]✓ Indexed: {filename}[/green]")
             else:
-                audit_logger.log_catalog(
-                    filename, "FAILED", config.MODEL_CATALOGER, 
-                    usage['input_tokens'], usage['output_tokens']
-                )
                 console.print(f"[red]x Failed to analyze: {filename}[/red]")
+            status.update(f"Scanning content of files... ({filename} done)")
+
+        project_index, total_indexing_cost = catalog_files(cataloger, pdf_files, audit_logger, on_file=on_file)
     
     with open(config.INDEX_FILE, "w") as f:
         json.dump(project_index, f, indent=2)
+    with open(config.DUPLICATES_FILE, "w") as f:
+        json.dump(duplicate_groups, f, indent=2)
     
-    return project_index, total_indexing_cost
+    return project_index, total_indexing_cost, duplicate_groups
+
+def print_duplicate_groups(groups: list):
+    for group in groups:
+        others = ", ".join(f"{d['filename']} ({d['similarity']:.0%})" for d in group["duplicates"])
+        console.print(f"[yellow]≈ Near-duplicates of {group['representative']} skipped: {others}[/yellow]")
 
-def main():
+STAGE_LABELS = {
+    "route": "[bold cyan]Router Agent...[/bold cyan]",
+    "evidence": "[bold cyan]Gathering evidence...[/bold cyan]",
+    "audit": "[bold red]Auditor Agent...[/bold red]"
+}
+
+def print_result(result: dict):
+    if result["status"] == "SKIPPED":
+        console.print("[red]Skipping: No relevant files found.[/red]")
+        return
+    if result["status"] == "ERROR":
+        if result["files_used"]:
+            console.print("[bold red]Auditor Error.[/bold red]")
+        return
+
+    color = "green" if result["status"] == "CUMPLE" else "red"
+
+    panel_content = (
+        f"[bold]Status:[/bold] [{color}]{result['status']}[/{color}]\n"
+        f"[bold]Evidence:[/bold] {result['evidence_location']}\n"
+        f"[italic]{result['reasoning']}[/italic]"
+    )
+    
+    if result["instruction"] and result["instruction"] != "Ninguna acción requerida":
+        panel_content += f"\n\n[bold white on blue] ACCIÓN REQUERIDA [/bold white on blue] [cyan]{result['instruction']}[/cyan]"
+
+    console.print(Panel(
+        panel_content,
+        title=f"Result {result['id']} ({result['duration']:.1f}s)", border_style=color
+    ))
+    console.print("\n")
+
+def print_change_report(changes: list, previous_run_id: str):
+    counts = {}
+    for c in changes:
+        counts[c["change"]] = counts.get(c["change"], 0) + 1
+    carried = sum(1 for c in changes if c["carried"])
+    console.rule(f"[bold]Changes vs run {previous_run_id}[/bold]")
+    console.print(f"Carried forward: {carried}  |  " + "  ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+
+    relevant = [c for c in changes if c["change"] in ("FLIPPED", "CHANGED", "NEW", "REMOVED")]
+    if not relevant:
+        return
+    table = Table(box=box.SIMPLE)
+    for col in ["Req ID", "Change", "Before", "After"]:
+        table.add_column(col)
+    for c in relevant:
+        style = "bold yellow" if c["change"] == "FLIPPED" else ""
+        table.add_row(c["req_id"], c["change"], str(c["previous_status"]), str(c["new_status"]), style=style)
+    console.print(table)
+
+def print_profile(profiler):
+    summary = profiler.summary()
+    table = Table(title=f"Profile (sampler overhead {summary['sampler_overhead']:.1%}, "
+                        f"heap peak {summary['tracemalloc_peak_mib']} MiB)", box=box.SIMPLE)
+    for col in ["Stage", "Samples", "Share", "Live KiB", "Top allocation site"]:
+        table.add_column(col)
+    for stage, data in summary["stages"].items():
+        sites = data["top_allocation_sites"]
+        table.add_row(stage, str(data["samples"]), f"{data['share']:.1%}", f"{data['live_kib']:.0f}",
+                      f"{sites[0]['site']} ({sites[0]['kib']:.0f} KiB)" if sites else "")
+    console.print(table)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tucana: environmental impact study auditor.")
+    parser.add_argument(
+        "--reaudit", metavar="RUN_ID", default=None,
+        help="Only re-audit requirements whose inputs changed since RUN_ID ('last' = latest run of the folder)"
+    )
+    parser.add_argument(
+        "--legal-version", metavar="VERSION", default=config.LEGAL_VERSION,
+        help="Audit against an imported legal corpus version (see legal_snapshot.py list)"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Sample CPU stacks and trace allocations per stage; writes profile_* files next to the logs"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     global_start_time = time.time()
     run_start_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     total_run_cost = 0.0 # Track overall money spent
     
     console.rule("[bold green]Tucana: Auditor Ambiental[/bold green]")
+    tracer.reset()
+    if config.METRICS_PORT:
+        tracer.serve_prometheus(config.METRICS_PORT)
     
     eia_folder = get_eia_folder_input()
     config.PDF_DIR = eia_folder 
@@ -149,22 +232,32 @@ def main():
     configure_genai()
     if not ensure_checklist_exists(): return
 
+    profiler = Profiler() if args.profile else None
+    if profiler:
+        profiler.start()
+
     # RAG Setup
-    rag = LegalRAG()
+    rag = LegalRAG(version=args.legal_version)
     legal_files = glob.glob(os.path.join(config.LEGAL_DIR, "*.pdf"))
     legal_filenames = [os.path.basename(f) for f in legal_files]
-    if not legal_files:
+    if rag.version:
+        legal_filenames = rag.sources()
+        console.print(f"[dim]Legal corpus version {rag.version} ({rag.count()} chunks).[/dim]")
+    elif rag.count() == 0 and config.LEGAL_SNAPSHOT:
+        with console.status("[bold blue]Loading legal index snapshot...[/bold blue]"):
+            legal_filenames = ingest_legal_framework(rag, config.LEGAL_DIR)
+    elif not legal_files:
         console.print(f"[yellow]Warning: No legal files found in {config.LEGAL_DIR}[/yellow]")
     else:
-        if rag.collection.count() == 0:
-            console.print(f"[blue]Ingesting {len(legal_files)} Legal Framework files...[/blue]")
+        # Files missing from the index (new, or failed on a previous run) are ingested
+        indexed = set(rag.sources()) if rag.count() else set()
+        missing = [f for f in legal_filenames if f not in indexed]
+        if missing:
+            console.print(f"[blue]Ingesting {len(missing)} Legal Framework files...[/blue]")
             with console.status("[bold blue]Indexing Legal Documents...[/bold blue]"):
-                for legal_path in legal_files:
-                    filename = os.path.basename(legal_path)
-                    legal_text_raw = extract_text_from_pdf(legal_path)
-                    if len(legal_text_raw) > 100:
-                        rag.ingest_text(legal_text_raw, source_name=filename)
-                        console.print(f"[green]✓ Indexed: {filename}[/green]")
+                ingest_legal_framework(
+                    rag, config.LEGAL_DIR, on_file=lambda f: console.print(f"[green]✓ Indexing: {f}[/green]")
+                )
         else:
             console.print("[dim]Legal DB already exists.[/dim]")
     
@@ -173,7 +266,8 @@ def main():
     auditor = AuditorAgent()
     
     # --- UPDATE: Capture Cataloging Cost ---
-    project_index, catalog_cost = load_or_build_index(cataloger, config.PDF_DIR)
+    with tracer.span("catalog.total"):
+        project_index, catalog_cost, duplicate_groups = load_or_build_index(cataloger, config.PDF_DIR)
     total_run_cost += catalog_cost
     
     with open(config.CHECKLIST_FILE, "r", encoding='utf-8') as f:
@@ -183,106 +277,53 @@ def main():
     
     console.print(f"\n[bold]Starting Audit of {len(checklist)} Requirements...[/bold]\n")
 
-    for item in checklist:
-        req_start_time = time.time()
-        
-        req_id = item['id']
-        req_text = item['requirement']
-        criteria = item.get('criteria', 'N/A')
-        evidence_hint = item.get('expected_evidence', 'N/A')
-        
-        console.rule(f"[bold]Auditing: {req_id}[/bold]")
-        console.print(f"Requirement: {req_text}")
-        
-        search_query = f"{req_text} (Evidence needed: {evidence_hint})"
-        
-        with console.status("[bold cyan]Router Agent...[/bold cyan]"):
-            routing_decision, router_usage = router.route(search_query, project_index)
-        
-        if not routing_decision or not routing_decision.selected_filenames:
-            console.print("[red]Skipping: No relevant files found.[/red]")
-            req_duration = time.time() - req_start_time
-            
-            # Log skipped
-            req_cost = audit_logger.log_requirement(
-                req_id, req_text, req_duration,
-                router_data={
-                    'model': config.MODEL_ROUTER,
-                    'input': router_usage.get('input_tokens', 0),
-                    'output': router_usage.get('output_tokens', 0),
-                    'files': "None", 'reasoning': "No relevant files found"
-                },
-                auditor_data={
-                    'model': config.MODEL_AUDITOR,
-                    'input': 0, 'output': 0, 'status': "SKIPPED", 'reasoning': "N/A", 'instruction': "N/A"
-                }
-            )
-            total_run_cost += req_cost
-            continue
+    def on_result(result):
+        console.rule(f"[bold]Audited: {result['id']}[/bold]")
+        console.print(f"Requirement: {result['requirement']}")
+        if "carried_from" in result:
+            console.print(f"[dim]Unchanged inputs: verdict carried forward from run {result['carried_from']}[/dim]")
+        if "reused_from" in result:
+            console.print(f"[dim]Same evidence as {result['reused_from']} (similarity {result['reuse_similarity']:.2f}): verdict reused[/dim]")
+        if result["files_used"]:
+            pages = result.get("pages_used") or {}
+            console.print(f"[dim]Selected: {result['files_used']}{f' (pages {pages})' if pages else ''}[/dim]")
+        print_result(result)
 
-        console.print(f"[dim]Selected: {routing_decision.selected_filenames}[/dim]")
+    previous_run_id = args.reaudit
+    if previous_run_id == "last":
+        previous_run_id = audit_logger.store.last_run(project=eia_folder, exclude=audit_logger.run_id)
+        if not previous_run_id:
+            console.print("[yellow]No previous run found for this folder. Running a full audit.[/yellow]")
 
-        legal_context = rag.retrieve_context(req_text)
-        file_contents = {}
-        for fname in routing_decision.selected_filenames:
-            path = os.path.join(config.PDF_DIR, fname)
-            if os.path.exists(path):
-                file_contents[fname] = extract_text_from_pdf(path)
-        
-        if not file_contents: continue
-
-        with console.status("[bold red]Auditor Agent...[/bold red]"):
-            rich_prompt = f"""
-            REQUIREMENT: {req_text}
-            STRICT COMPLIANCE CRITERIA: {criteria}
-            EXPECTED EVIDENCE DESCRIPTION: {evidence_hint}
-            """
-            audit_result, auditor_usage = auditor.audit(rich_prompt, legal_context, file_contents)
-
-        req_duration = time.time() - req_start_time
-
-        if not audit_result:
-             console.print("[bold red]Auditor Error.[/bold red]")
-             continue
-
-        # Log Success
-        req_cost = audit_logger.log_requirement(
-            req_id, req_text, req_duration,
-            router_data={
-                'model': config.MODEL_ROUTER,
-                'input': router_usage.get('input_tokens', 0),
-                'output': router_usage.get('output_tokens', 0),
-                'files': str(routing_decision.selected_filenames),
-                'reasoning': routing_decision.reasoning
-            },
-            auditor_data={
-                'model': config.MODEL_AUDITOR,
-                'input': auditor_usage.get('input_tokens', 0),
-                'output': auditor_usage.get('output_tokens', 0),
-                'status': audit_result.status,
-                'reasoning': audit_result.reasoning,
-                'instruction': audit_result.instruction
-            }
-        )
-        total_run_cost += req_cost
-
-        color = "green" if audit_result.status == "CUMPLE" else "red"
+    def on_stage(stage, req_id):
+        status.update(f"{STAGE_LABELS[stage]} [dim]{req_id}[/dim]")
 
-        
-        panel_content = (
-            f"[bold]Status:[/bold] [{color}]{audit_result.status}[/{color}]\n"
-            f"[bold]Evidence:[/bold] {audit_result.evidence_location}\n"
-            f"[italic]{audit_result.reasoning}[/italic]"
-        )
-        
-        if audit_result.instruction and audit_result.instruction != "Ninguna acción requerida":
-            panel_content += f"\n\n[bold white on blue] ACCIÓN REQUERIDA [/bold white on blue] [cyan]{audit_result.instruction}[/cyan]"
+    def on_partial(req_id, reasoning):
+        # Streamed reasoning (STREAM_AUDITOR): show the latest lines under the spinner
+        status.update(f"{STAGE_LABELS['audit']} [dim]{req_id}[/dim]\n[italic]{escape(reasoning[-300:])}[/italic]")
+
+    changes = None
+    with console.status(STAGE_LABELS["route"]) as status:
+        if previous_run_id:
+            results, changes = reaudit_checklist(
+                checklist, previous_run_id, project_index, router, auditor, rag, audit_logger, config.PDF_DIR,
+                on_stage=on_stage, on_result=on_result, on_partial=on_partial
+            )
+        else:
+            results = audit_checklist(
+                checklist, project_index, router, auditor, rag, audit_logger, config.PDF_DIR,
+                on_stage=on_stage, on_result=on_result, on_partial=on_partial
+            )
+    total_run_cost += sum(r["cost"] for r in results)
 
-        console.print(Panel(
-            panel_content,
-            title=f"Result {req_id} ({req_duration:.1f}s)", border_style=color
-        ))
-        console.print("\n")
+    if changes is not None:
+        audit_logger.log_change_report(changes)
+        print_change_report(changes, previous_run_id)
+
+    profile_files = None
+    if profiler:
+        profiler.stop()
+        profile_files = audit_logger.log_profile(profiler)
 
     # 7. Finalize Metadata Log
     global_end_time = time.time()
@@ -296,7 +337,12 @@ def main():
         "total_cost_estimated_usd": round(total_run_cost, 6), # <--- ADDED TOTAL COST
         "input_folder": eia_folder,
         "files_analyzed": processed_files,
+        "duplicate_groups": duplicate_groups,
         "legal_files_used": legal_filenames,
+        "legal_version": rag.version,
+        "reaudit_of": previous_run_id,
+        "carried_forward": sum(1 for r in results if "carried_from" in r),
+        "semantic_cache_hits": sum(1 for r in results if "reused_from" in r),
         "configuration": {
             "model_cataloger": config.MODEL_CATALOGER,
             "temp_cataloger": config.TEMP_CATALOGER,
@@ -304,11 +350,25 @@ def main():
             "temp_router": config.TEMP_ROUTER,
             "model_auditor": config.MODEL_AUDITOR,
             "temp_auditor": config.TEMP_AUDITOR,
-            "rate_limit": config.RATE_LIMIT_CALLS
-        }
+            "providers": {
+                "cataloger": config.PROVIDER_CATALOGER,
+                "router": config.PROVIDER_ROUTER,
+                "auditor": config.PROVIDER_AUDITOR
+            },
+            "rate_limit": config.RATE_LIMIT_CALLS,
+            "audit_mode": config.AUDIT_MODE,
+            "stream_auditor": config.STREAM_AUDITOR,
+            "semantic_cache": config.SEMANTIC_CACHE and config.SEMANTIC_CACHE_MODE,
+            "semantic_cache_threshold": config.SEMANTIC_CACHE_THRESHOLD
+        },
+        "stage_latency_seconds": tracer.summary(),
+        "profile_files": profile_files
     }
     
     audit_logger.log_metadata(metadata)
+    audit_logger.log_trace(tracer)
+    if profile_files:
+        print_profile(profiler)
     console.print(f"[bold green]Audit Complete. Logs saved to ./logs/[/bold green]")
     console.print(f"Total Time: {total_duration:.2f} seconds")
     console.print(f"Total Cost: ${total_run_cost:.4f}")
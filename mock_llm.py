@@ -0,0 +1,264 @@
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline stand-in for genai.GenerativeModel, selected with LLM_BACKEND = "mock".
+# It recognises the Cataloger / Router / Auditor prompts from agents.py and
+# answers with schema-valid JSON, so the full pipeline can run without the API.
+
+TOPIC_PATTERN = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*\.?\s+)?((?:Plan|Programa|Componente|L[íi]nea Base|Cap[íi]tulo|Estudio|Monitoreo)\b.{3,80})$",
+    re.IGNORECASE | re.MULTILINE
+)
+TABLE_PATTERN = re.compile(r"^\s*((?:Tabla|Table|Figura|Figure|Mapa)\s+\d+[^\n]{0,80})$", re.IGNORECASE | re.MULTILINE)
+PAGE_MARKER = re.compile(r"\[Página (\d+)\]")
+GROUP_ID_PATTERN = re.compile(r"^\s*\[([^\]\n]+)\]\s*$", re.MULTILINE)
+WORD_PATTERN = re.compile(r"[a-záéíóúñ]{5,}", re.IGNORECASE)
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class MockStats:
+    """Process-wide call and error counters (read by the benchmark)."""
+    lock = threading.Lock()
+    calls = 0
+    errors = 0
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.calls = 0
+            cls.errors = 0
+
+class MockGenerativeModel:
+    def __init__(self, model_name: str, latency: float = 0.0, error_rate: float = 0.0, seed: int = 42):
+        self.model_name = model_name
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def count_tokens(self, prompt: str):
+        return SimpleNamespace(total_tokens=estimate_tokens(prompt))
+
+    def generate_content(self, prompt: str, generation_config=None, stream: bool = False, **kwargs):
+        with MockStats.lock:
+            MockStats.calls += 1
+
+        # +/-25% jitter around the configured latency
+        latency = self.latency * (0.75 + 0.5 * self._random()) if self.latency else 0.0
+        if latency and not stream:
+            time.sleep(latency)
+
+        if self._random() < self.error_rate:
+            with MockStats.lock:
+                MockStats.errors += 1
+            raise RuntimeError("503 Mock backend: service unavailable")
+
+        if "Forensic Document Analyst" in prompt:
+            payload = self._catalog(prompt)
+        elif "Strategic Legal Librarian" in prompt:
+            payload = self._route(prompt)
+        elif "**Requirements to verify**" in prompt:
+            payload = self._audit_group(prompt)
+        elif "Verdict Reuse Reviewer" in prompt:
+            payload = {"same_verdict": True, "reasoning": "Mismo requisito redactado de otra forma (mock)."}
+        else:
+            payload = self._audit(prompt)
+
+        text = json.dumps(payload, ensure_ascii=False)
+        usage = SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt),
+            candidates_token_count=estimate_tokens(text)
+        )
+        if stream:
+            return self._stream(text, usage, latency)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    @staticmethod
+    def _stream(text: str, usage, latency: float, pieces: int = 8):
+        """Chunks like a streamed response: 30% of the latency before the first one."""
+        if latency:
+            time.sleep(latency * 0.3)
+        size = max(1, -(-len(text) // pieces))
+        starts = range(0, len(text), size)
+        for i, start in enumerate(starts):
+            if latency and i:
+                time.sleep(latency * 0.7 / (len(starts) - 1))
+            last = start + size >= len(text)
+            yield SimpleNamespace(text=text[start:start + size], usage_metadata=usage if last else None)
+
+    # --- RESPONSES PER AGENT ---
+    def _catalog(self, prompt: str) -> dict:
+        filename = re.search(r"Target File:\s*(.+)", prompt).group(1).strip()
+        body = prompt.split("Input Text:", 1)[-1].split("**STRICT JSON OUTPUT**", 1)[0]
+
+        topics = list(dict.fromkeys(m.strip() for m in TOPIC_PATTERN.findall(body)))[:15]
+        tables = list(dict.fromkeys(m.strip() for m in TABLE_PATTERN.findall(body)))[:25]
+
+        # Page of each topic from the [Página N] markers of chunked prompts
+        page_ranges = {}
+        for match in TOPIC_PATTERN.finditer(body):
+            topic = match.group(1).strip()
+            if topic in topics and topic not in page_ranges:
+                markers = PAGE_MARKER.findall(body, 0, match.start())
+                page_ranges[topic] = markers[-1] if markers else "1"
+
+        return {
+            "filename": filename,
+            "topics_detected": topics,
+            "tables_and_figures": tables,
+            "content_summary": " ".join(body.split()[:60]),
+            "page_ranges": page_ranges
+        }
+
+    def _route(self, prompt: str) -> dict:
+        match = re.search(r'Requirement/Query:\s*"(.*?)"\s*\*\*Project Index\*\*', prompt, re.DOTALL)
+        requirement = match.group(1) if match else ""
+        index_text = prompt.split("**Project Index**:", 1)[-1].split("**Logic**", 1)[0]
+        try:
+            index = json.loads(index_text)
+        except json.JSONDecodeError:
+            index = []
+
+        wanted = {w.lower() for w in WORD_PATTERN.findall(requirement)}
+        scored = []
+        pages = {}
+        for entry in index:
+            haystack = " ".join(entry.get("topics_detected", []) + entry.get("tables_and_figures", []))
+            haystack += " " + entry.get("content_summary", "")
+            score = len(wanted & {w.lower() for w in WORD_PATTERN.findall(haystack)})
+            if score:
+                scored.append((score, entry["filename"]))
+            # Pages of the catalogued topics that share a word with the requirement
+            matching = [
+                ranges for topic, ranges in entry.get("page_ranges", {}).items()
+                if wanted & {w.lower() for w in WORD_PATTERN.findall(topic)}
+            ]
+            if matching:
+                pages[entry["filename"]] = ", ".join(matching)
+        scored.sort(reverse=True)
+        selected = [name for _, name in scored[:3]]
+
+        response = {
+            "selected_filenames": selected,
+            "reasoning": "Seleccion por coincidencia de terminos (mock)."
+        }
+        if '"page_ranges"' in prompt.split("**OUTPUT FORMAT**", 1)[-1]:
+            response["page_ranges"] = {name: pages[name] for name in selected if name in pages}
+        return response
+
+    def _audit(self, prompt: str) -> dict:
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        complies = digest % 3 != 0
+        return {
+            "status": "CUMPLE" if complies else "NO CUMPLE",
+            "reasoning": "Evaluacion simulada por el backend mock.",
+            "legal_base": "Art. 1 (mock)",
+            "evidence_location": "Pagina 1",
+            "instruction": "Ninguna acción requerida" if complies else "Incluir la evidencia requerida."
+        }
+
+    def _audit_group(self, prompt: str) -> dict:
+        block = prompt.split("**Requirements to verify**", 1)[-1].split("**Legal Context", 1)[0]
+        results = []
+        for req_id in dict.fromkeys(m.strip() for m in GROUP_ID_PATTERN.findall(block)):
+            verdict = self._audit(f"{req_id}\n{prompt}")
+            verdict["req_id"] = req_id
+            results.append(verdict)
+        return {"results": results}
+
+# --- OPENAI-COMPATIBLE STAND-IN SERVER ---
+# Serves the mock responses over POST /v1/chat/completions (plain and SSE
+# streaming) so the "openai" provider in llm_providers.py can be exercised
+# without a real llama.cpp server:
+#   python mock_llm.py --port 8080 --latency 0.5
+class OpenAIStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like llama-server
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+        with self.server.stats_lock:
+            self.server.connections.add(self.client_address)
+
+        request = json.loads(body)
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        stream = bool(request.get("stream"))
+        try:
+            response = self.server.model.generate_content(prompt, stream=stream)
+        except RuntimeError as e:
+            return self._send_json(503, {"error": {"message": str(e)}})
+
+        if not stream:
+            return self._send_json(200, {
+                "object": "chat.completion",
+                "model": request.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": response.text}, "finish_reason": "stop"}],
+                "usage": self._usage(response.usage_metadata)
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        usage = None
+        for chunk in response:
+            usage = chunk.usage_metadata or usage
+            self._send_event({"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": chunk.text}}]})
+        self._send_event({"object": "chat.completion.chunk", "choices": [], "usage": self._usage(usage)})
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    @staticmethod
+    def _usage(usage) -> dict:
+        return {"prompt_tokens": usage.prompt_token_count, "completion_tokens": usage.candidates_token_count}
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, payload: dict):
+        self._send_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_openai(host: str = "127.0.0.1", port: int = 8080, latency: float = 0.0, error_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Returns the (not yet started) server; server.connections records the client sockets seen."""
+    server = ThreadingHTTPServer((host, port), OpenAIStandInHandler)
+    server.daemon_threads = True
+    server.model = MockGenerativeModel("mock-openai", latency=latency, error_rate=error_rate)
+    server.connections = set()
+    server.stats_lock = threading.Lock()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server backed by the mock LLM.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    args = parser.parse_args()
+    server = serve_openai(args.host, args.port, args.latency, args.error_rate)
+    print(f"Serving http://{args.host}:{args.port}/v1/chat/completions")
+    server.serve_forever()
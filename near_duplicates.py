@@ -0,0 +1,94 @@
+import re
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+
+# Near-duplicate detection for EIA files (the same annex uploaded as a scanned
+# copy, a signed copy, "v2", ...). Each text is reduced to a MinHash signature
+# over word shingles; the fraction of equal signature slots estimates the
+# Jaccard similarity of the shingle sets. Files at or above DEDUP_THRESHOLD
+# are grouped (transitively) and only one representative per group is cataloged.
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+PRIME = (1 << 31) - 1          # hash values stay below 2**31, so a*x + b fits in int64
+BLOCK = 8192                   # shingles hashed per step (bounds memory on long files)
+
+def _permutations(num_perm: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, PRIME, size=(num_perm, 1), dtype=np.int64)
+    b = rng.integers(0, PRIME, size=(num_perm, 1), dtype=np.int64)
+    return a, b
+
+def word_count(text: str) -> int:
+    return len(WORD_PATTERN.findall(text))
+
+def shingle_hashes(text: str, size: int = config.DEDUP_SHINGLE_WORDS) -> np.ndarray:
+    """Distinct hashes of the `size`-word shingles of the lowercased text."""
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") % PRIME
+              for s in shingles]
+    return np.array(hashes, dtype=np.int64)
+
+def minhash(text: str, num_perm: int = config.DEDUP_NUM_PERM) -> Optional[np.ndarray]:
+    """MinHash signature, or None if the text is too short to compare (e.g. a scan without OCR)."""
+    if word_count(text) < config.DEDUP_MIN_WORDS:
+        return None
+    hashes = shingle_hashes(text)
+    a, b = _permutations(num_perm)
+    signature = np.full(num_perm, PRIME, dtype=np.int64)
+    for start in range(0, len(hashes), BLOCK):
+        block = hashes[start:start + BLOCK][None, :]
+        signature = np.minimum(signature, ((a * block + b) % PRIME).min(axis=1))
+    return signature
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+def find_duplicate_groups(signatures: Dict[str, Optional[np.ndarray]], sizes: Dict[str, int],
+                          threshold: float = config.DEDUP_THRESHOLD) -> List[dict]:
+    """
+    Groups files whose signatures are at least `threshold` similar.
+    sizes (e.g. word counts) pick the representative: the most complete text,
+    then the first name. Returns
+    [{"representative": name, "duplicates": [{"filename": name, "similarity": s}, ...]}, ...].
+    """
+    names = sorted(name for name, sig in signatures.items() if sig is not None)
+    if len(names) < 2:
+        return []
+    matrix = np.stack([signatures[name] for name in names])
+
+    parent = list(range(len(names)))
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # All pairs, one vectorized row at a time (a submission has at most a few hundred files)
+    for i in range(len(names) - 1):
+        scores = np.mean(matrix[i + 1:] == matrix[i], axis=1)
+        for j in np.nonzero(scores >= threshold)[0]:
+            parent[find(i + 1 + int(j))] = find(i)
+
+    members: Dict[int, List[int]] = {}
+    for i in range(len(names)):
+        members.setdefault(find(i), []).append(i)
+
+    groups = []
+    for indexes in members.values():
+        if len(indexes) < 2:
+            continue
+        rep = min(indexes, key=lambda i: (-sizes.get(names[i], 0), names[i]))
+        groups.append({
+            "representative": names[rep],
+            "duplicates": [
+                {"filename": names[i], "similarity": round(similarity(matrix[rep], matrix[i]), 3)}
+                for i in indexes if i != rep
+            ]
+        })
+    return sorted(groups, key=lambda g: g["representative"])
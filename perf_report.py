@@ -0,0 +1,278 @@
+import os
+import csv
+import glob
+import json
+import math
+import argparse
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from tracing import percentile
+
+# Cross-run regression report built from the files every run leaves in logs/:
+#   run_metadata_<ts>.json, audit_detailed_<ts>.csv, audit_catalog_<ts>.csv, trace_<ts>.json
+# A run is compared against a baseline run metric by metric; a metric is flagged
+# when its distribution moved (Mann-Whitney U) and its median moved enough to matter.
+
+console = Console()
+
+# --- LOADING ---
+def _number(value) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(str(value).replace("$", ""))
+    except ValueError:
+        return None
+
+def _read_csv(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def list_runs(logs_dir: str) -> List[str]:
+    """Session timestamps with a run_metadata file, oldest first."""
+    paths = glob.glob(os.path.join(logs_dir, "run_metadata_*.json"))
+    return sorted(os.path.basename(p)[len("run_metadata_"):-len(".json")] for p in paths)
+
+def load_run(logs_dir: str, ts: str) -> dict:
+    """Metadata plus raw samples (lists of floats) per metric for one run."""
+    with open(os.path.join(logs_dir, f"run_metadata_{ts}.json"), encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    samples: Dict[str, List[float]] = {}
+    def add(metric: str, value):
+        value = _number(value)
+        if value is not None:
+            samples.setdefault(metric, []).append(value)
+
+    requirements = {}
+    for row in _read_csv(os.path.join(logs_dir, f"audit_detailed_{ts}.csv")):
+        requirements[row["Req_ID"]] = row
+        if row["Audit_Status"] == "SKIPPED":
+            continue
+        add("requirement.duration_seconds", row["Duration_Seconds"])
+        add("requirement.total_cost_usd", row["Total_Req_Cost"])
+        # Carried-forward rows make no calls; only real calls count for token metrics
+        if _number(row["Router_Input_Tokens"]):
+            add("router.input_tokens", row["Router_Input_Tokens"])
+            add("router.output_tokens", row["Router_Output_Tokens"])
+        if _number(row["Auditor_Input_Tokens"]):
+            add("auditor.input_tokens", row["Auditor_Input_Tokens"])
+            add("auditor.output_tokens", row["Auditor_Output_Tokens"])
+            add("auditor.ttft_seconds", row.get("Auditor_TTFT_Seconds"))
+
+    for row in _read_csv(os.path.join(logs_dir, f"audit_catalog_{ts}.csv")):
+        add("catalog.input_tokens", row["Input_Tokens"])
+        add("catalog.output_tokens", row["Output_Tokens"])
+        add("catalog.cost_usd", row["Cost"])
+        add("catalog.compression_ratio", row.get("Compression_Ratio"))
+
+    trace_path = os.path.join(logs_dir, f"trace_{ts}.json")
+    if os.path.exists(trace_path):
+        with open(trace_path, encoding="utf-8") as f:
+            for event in json.load(f).get("traceEvents", []):
+                add(f"stage.{event['name']}", event["dur"] / 1_000_000)
+
+    return {"ts": ts, "metadata": metadata, "samples": samples, "requirements": requirements}
+
+# --- STATISTICS ---
+def mann_whitney_u(a: List[float], b: List[float]) -> Optional[float]:
+    """
+    Two-sided p-value of the Mann-Whitney U test (normal approximation with tie
+    and continuity correction). None when either sample is too small.
+    """
+    n1, n2 = len(a), len(b)
+    if n1 < 3 or n2 < 3:
+        return None
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+
+    r1 = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u1 = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+    z = (abs(u1 - n1 * n2 / 2) - 0.5) / sigma
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+def compare_metric(base: List[float], run: List[float], alpha: float, min_change: float) -> dict:
+    base, run = sorted(base), sorted(run)
+    median_base = percentile(base, 0.5)
+    median_run = percentile(run, 0.5)
+    change = (median_run - median_base) / median_base if median_base else None
+    p_value = mann_whitney_u(base, run)
+
+    verdict = "ok"
+    if p_value is None:
+        verdict = "n/a"
+    elif p_value < alpha and change is not None and abs(change) >= min_change:
+        verdict = "REGRESSION" if change > 0 else "improved"
+    return {
+        "n_base": len(base), "n_run": len(run),
+        "median_base": median_base, "median_run": median_run,
+        "p95_base": percentile(base, 0.95), "p95_run": percentile(run, 0.95),
+        "change": change, "p_value": p_value, "verdict": verdict
+    }
+
+def compare_runs(baseline: dict, run: dict, alpha: float, min_change: float) -> List[dict]:
+    """Every metric (higher is worse for all of them) present in both runs."""
+    metrics = []
+    for metric in sorted(set(baseline["samples"]) & set(run["samples"])):
+        result = compare_metric(baseline["samples"][metric], run["samples"][metric], alpha, min_change)
+        metrics.append({"metric": metric, **result})
+    return metrics
+
+def requirement_deltas(baseline: dict, run: dict, top: int) -> List[dict]:
+    """Requirements audited in both runs, ordered by the largest auditor input token increase."""
+    deltas = []
+    for req_id, row in run["requirements"].items():
+        before = baseline["requirements"].get(req_id)
+        if before is None:
+            continue
+        tokens_base = _number(before["Auditor_Input_Tokens"]) or 0
+        tokens_run = _number(row["Auditor_Input_Tokens"]) or 0
+        if not tokens_base or not tokens_run:
+            continue
+        deltas.append({
+            "req_id": req_id,
+            "auditor_input_tokens_base": tokens_base, "auditor_input_tokens_run": tokens_run,
+            "token_change": (tokens_run - tokens_base) / tokens_base,
+            "duration_base": _number(before["Duration_Seconds"]), "duration_run": _number(row["Duration_Seconds"])
+        })
+    deltas.sort(key=lambda d: d["token_change"], reverse=True)
+    return deltas[:top]
+
+def history(logs_dir: str, runs: List[str]) -> List[dict]:
+    rows = []
+    for ts in runs:
+        run = load_run(logs_dir, ts)
+        meta, samples = run["metadata"], run["samples"]
+        durations = sorted(samples.get("requirement.duration_seconds", []))
+        tokens = samples.get("auditor.input_tokens", [])
+        rows.append({
+            "run": ts,
+            "duration_seconds": meta.get("total_duration_seconds"),
+            "cost_usd": meta.get("total_cost_estimated_usd"),
+            "requirements": len(run["requirements"]),
+            "requirement_p50_seconds": percentile(durations, 0.5) if durations else None,
+            "auditor_input_tokens_mean": sum(tokens) / len(tokens) if tokens else None
+        })
+    return rows
+
+# --- OUTPUT ---
+def _fmt(value, digits: int = 4) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.{digits}g}"
+    return str(value)
+
+def print_report(report: dict):
+    table = Table(title="Run History", box=box.SIMPLE)
+    for col in ["Run", "Duration (s)", "Cost (USD)", "Requirements", "Req p50 (s)", "Auditor In Tokens (mean)"]:
+        table.add_column(col)
+    for row in report["history"]:
+        table.add_row(
+            row["run"], _fmt(row["duration_seconds"]), _fmt(row["cost_usd"]), str(row["requirements"]),
+            _fmt(row["requirement_p50_seconds"]), _fmt(row["auditor_input_tokens_mean"], 6)
+        )
+    console.print(table)
+
+    if not report.get("baseline"):
+        return
+
+    table = Table(title=f"Run {report['run']} vs baseline {report['baseline']}", box=box.SIMPLE)
+    for col in ["Metric", "n (base/run)", "Median base", "Median run", "p95 base", "p95 run", "Change", "p-value", "Verdict"]:
+        table.add_column(col)
+    styles = {"REGRESSION": "bold red", "improved": "green"}
+    for m in report["metrics"]:
+        change = f"{m['change']:+.1%}" if m["change"] is not None else "-"
+        table.add_row(
+            m["metric"], f"{m['n_base']}/{m['n_run']}", _fmt(m["median_base"]), _fmt(m["median_run"]),
+            _fmt(m["p95_base"]), _fmt(m["p95_run"]), change, _fmt(m["p_value"], 3), m["verdict"],
+            style=styles.get(m["verdict"])
+        )
+    console.print(table)
+
+    if report["requirements"]:
+        table = Table(title="Largest Auditor Input Token Changes per Requirement", box=box.SIMPLE)
+        for col in ["Req ID", "Tokens base", "Tokens run", "Change", "Duration base (s)", "Duration run (s)"]:
+            table.add_column(col)
+        for d in report["requirements"]:
+            table.add_row(
+                d["req_id"], _fmt(d["auditor_input_tokens_base"], 8), _fmt(d["auditor_input_tokens_run"], 8),
+                f"{d['token_change']:+.1%}", _fmt(d["duration_base"]), _fmt(d["duration_run"])
+            )
+        console.print(table)
+
+    regressions = [m["metric"] for m in report["metrics"] if m["verdict"] == "REGRESSION"]
+    if regressions:
+        console.print(f"[bold red]{len(regressions)} regression(s): {', '.join(regressions)}[/bold red]")
+    else:
+        console.print("[green]No significant regressions.[/green]")
+
+def build_report(logs_dir: str, run_ts: Optional[str], baseline_ts: Optional[str],
+                 alpha: float, min_change: float, top: int) -> dict:
+    runs = list_runs(logs_dir)
+    if not runs:
+        raise SystemExit(f"No run_metadata_*.json found in {logs_dir}")
+
+    run_ts = run_ts or runs[-1]
+    if baseline_ts is None:
+        earlier = [ts for ts in runs if ts < run_ts]
+        baseline_ts = earlier[-1] if earlier else None
+
+    report = {
+        "logs_dir": logs_dir, "run": run_ts, "baseline": baseline_ts,
+        "alpha": alpha, "min_change": min_change,
+        "history": history(logs_dir, runs), "metrics": [], "requirements": []
+    }
+    if baseline_ts:
+        run = load_run(logs_dir, run_ts)
+        baseline = load_run(logs_dir, baseline_ts)
+        report["metrics"] = compare_runs(baseline, run, alpha, min_change)
+        report["requirements"] = requirement_deltas(baseline, run, top)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-run latency, token and cost regression report.")
+    parser.add_argument("--logs", default="./logs", help="Folder with run_metadata/CSV/trace files")
+    parser.add_argument("--run", default=None, help="Run timestamp to check (default: latest)")
+    parser.add_argument("--baseline", default=None, help="Baseline run timestamp (default: the run before --run)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level of the Mann-Whitney U test")
+    parser.add_argument("--min-change", type=float, default=0.10, help="Minimum relative median change to flag")
+    parser.add_argument("--top", type=int, default=10, help="Requirements listed in the per-requirement table")
+    parser.add_argument("--json", default=None, help="Report JSON path (default: logs/perf_report_<run>.json)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a regression is flagged")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.logs, args.run, args.baseline, args.alpha, args.min_change, args.top)
+    print_report(report)
+
+    output = args.json or os.path.join(args.logs, f"perf_report_{report['run']}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    console.print(f"[dim]Report written to {output}[/dim]")
+
+    if args.fail_on_regression and any(m["verdict"] == "REGRESSION" for m in report["metrics"]):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
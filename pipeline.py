@@ -0,0 +1,781 @@
+import os
+import re
+import ast
+import glob
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Optional, Callable, Tuple, Iterator
+
+import config
+from agents import CatalogerAgent, RouterAgent, AuditorAgent, VerdictCheckerAgent, extract_text_from_pdf, read_raw_pages, extract_pages_from_pdf, iter_pdf_pages
+from near_duplicates import minhash, find_duplicate_groups, word_count
+from verdict_cache import VerdictCache
+from text_normalizer import normalize_page_stream
+from rag_engine import LegalRAG
+from logger import AuditLogger
+from tracing import tracer, bind_context
+
+# Shared catalog -> route -> audit steps used by main_cli, app and the benchmark.
+# UI layers observe progress through the optional `on_*` callbacks.
+
+def ingest_legal_framework(rag: LegalRAG, legal_dir: str, on_file: Optional[Callable[[str], None]] = None) -> List[str]:
+    """
+    Indexes the legal PDFs of legal_dir that are not in the collection yet, so a
+    file that failed to ingest is retried on the next start. An empty collection
+    is loaded from config.LEGAL_SNAPSHOT when set. Returns the legal filenames.
+    """
+    if rag.version:
+        # A pinned corpus version is already complete
+        return rag.sources()
+    if rag.count() == 0 and config.LEGAL_SNAPSHOT:
+        from legal_snapshot import import_snapshot
+        with tracer.span("legal.snapshot", file=os.path.basename(config.LEGAL_SNAPSHOT)):
+            manifest = import_snapshot(config.LEGAL_SNAPSHOT, rag=rag)
+        return sorted(manifest["sources"])
+    legal_files = glob.glob(os.path.join(legal_dir, "*.pdf"))
+    if legal_files:
+        indexed = set(rag.sources()) if rag.count() else set()
+        for legal_path in legal_files:
+            filename = os.path.basename(legal_path)
+            if filename in indexed:
+                continue
+            if on_file:
+                on_file(filename)
+            with tracer.span("legal.ingest", file=filename) as attrs:
+                try:
+                    attrs["chunks"] = rag.ingest_pages(legal_pages(legal_path), source_name=filename)
+                except Exception as e:
+                    # An unreadable law should not block the others
+                    attrs["error"] = str(e)
+    return [os.path.basename(f) for f in legal_files]
+
+def legal_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """(page_number, text) of the whole legal PDF, read one page at a time and normalized when NORMALIZE_TEXT is on."""
+    pages = iter_pdf_pages(path)
+    if config.NORMALIZE_TEXT:
+        pages = normalize_page_stream(pages)
+    return enumerate(pages, start=1)
+
+def skip_near_duplicates(pdf_paths: List[str]) -> Tuple[List[str], List[dict]]:
+    """
+    Drops near-duplicate files (config.DEDUP_THRESHOLD) before cataloging.
+    Returns (paths to catalog, duplicate groups); each group keeps its
+    representative in the returned paths (see near_duplicates.find_duplicate_groups).
+    """
+    if not config.DEDUP_DOCUMENTS or len(pdf_paths) < 2:
+        return list(pdf_paths), []
+    signatures, sizes = {}, {}
+    with tracer.span("catalog.dedup", files=len(pdf_paths)):
+        for path in pdf_paths:
+            filename = os.path.basename(path)
+            try:
+                text = "\n".join(extract_pages_from_pdf(path))
+            except Exception:
+                continue  # unreadable: cataloged (and reported) as before
+            signatures[filename] = minhash(text)
+            sizes[filename] = word_count(text)
+        groups = find_duplicate_groups(signatures, sizes)
+    skipped = {d["filename"] for group in groups for d in group["duplicates"]}
+    return [p for p in pdf_paths if os.path.basename(p) not in skipped], groups
+
+def catalog_files(cataloger: CatalogerAgent, pdf_paths: List[str], audit_logger: AuditLogger,
+                  cache: Optional[Dict[str, dict]] = None,
+                  on_file: Optional[Callable[[str, str], None]] = None) -> Tuple[List[dict], float]:
+    """
+    Catalogs each PDF (or takes it from `cache`, keyed by filename).
+    on_file(filename, outcome) is called with outcome in {"CACHED", "SUCCESS", "FAILED"}.
+    Returns (project_index, total_indexing_cost)
+    """
+    cache = cache or {}
+    project_index = []
+    total_cost = 0.0
+
+    for pdf in pdf_paths:
+        filename = os.path.basename(pdf)
+        if filename in cache:
+            project_index.append(cache[filename])
+            if on_file:
+                on_file(filename, "CACHED")
+            continue
+
+        with tracer.span("catalog.file", file=filename):
+            file_index, usage = cataloger.analyze_file(pdf)
+
+        outcome = "SUCCESS" if file_index else "FAILED"
+        cost = audit_logger.log_catalog(
+            filename, outcome, config.MODEL_CATALOGER,
+            usage['input_tokens'], usage['output_tokens'], usage.get('compression_ratio')
+        )
+        if file_index:
+            project_index.append(file_index.model_dump())
+            total_cost += cost
+        if on_file:
+            on_file(filename, outcome)
+
+    return project_index, total_cost
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for grouping budgets (~4 characters per token)."""
+    return len(text) // 4
+
+def build_audit_prompt(item: dict) -> str:
+    return f"""
+        REQUIREMENT: {item['requirement']}
+        STRICT COMPLIANCE CRITERIA: {item.get('criteria', 'N/A')}
+        EXPECTED EVIDENCE DESCRIPTION: {item.get('expected_evidence', 'N/A')}
+        """
+
+def new_result(item: dict) -> dict:
+    return {
+        "id": item['id'], "requirement": item['requirement'], "chapter": item.get('chapter', ''),
+        "status": "ERROR", "reasoning": "N/A", "instruction": "N/A",
+        "evidence_location": "N/A", "files_used": [], "pages_used": {}, "duration": 0.0, "cost": 0.0
+    }
+
+# --- INPUT HASHES (differential re-audit) ---
+HASH_KEYS = ("requirement_hash", "criteria_hash", "evidence_hash", "legal_hash")
+VERDICTS = ("CUMPLE", "NO CUMPLE")
+
+_digest_cache: Dict[tuple, str] = {}
+_digest_lock = threading.Lock()
+
+def hash_text(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's bytes, memoized by (path, size, mtime)."""
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if key in _digest_cache:
+            return _digest_cache[key]
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    with _digest_lock:
+        _digest_cache[key] = sha.hexdigest()
+    return _digest_cache[key]
+
+def input_hashes(item: dict, filenames: List[str], pdf_dir: str, legal_context: Optional[str],
+                 page_ranges: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Hashes of everything a verdict depends on: requirement, criteria, routed files (and pages) and legal context."""
+    page_ranges = page_ranges or {}
+    files = []
+    for fname in sorted(filenames):
+        path = os.path.join(pdf_dir, fname)
+        entry = f"{fname}:{file_digest(path) if os.path.exists(path) else 'missing'}"
+        if page_ranges.get(fname):
+            entry += f":{page_ranges[fname]}"
+        files.append(entry)
+    return {
+        "requirement_hash": hash_text(item['requirement'], item.get('expected_evidence', '')),
+        "criteria_hash": hash_text(item.get('criteria', '')),
+        "evidence_hash": hash_text(*files),
+        "legal_hash": hash_text(legal_context or "")
+    }
+
+# --- PREFETCH ---
+# While the Router call is in flight, legal retrieval runs and the files the
+# catalog rates closest to the requirement are parsed in the background, so a
+# requirement's critical path is roughly Router latency + Auditor latency.
+# Extraction caches (agents.SharedLRU) make a reader wait for a prefetch of the
+# same file instead of parsing it twice.
+WORD_PATTERN = re.compile(r"[a-záéíóúñü]{5,}")
+
+_prefetch_pool: Optional[ThreadPoolExecutor] = None
+_prefetch_pool_lock = threading.Lock()
+
+def prefetch_pool() -> ThreadPoolExecutor:
+    global _prefetch_pool
+    with _prefetch_pool_lock:
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(max_workers=max(1, config.PREFETCH_WORKERS), thread_name_prefix="prefetch")
+        return _prefetch_pool
+
+def candidate_files(item: dict, project_index: List[dict], k: int) -> List[str]:
+    """The k catalog entries sharing the most words with the requirement and its expected evidence."""
+    query = set(WORD_PATTERN.findall(f"{item['requirement']} {item.get('expected_evidence', '')}".lower()))
+    scored = []
+    for entry in project_index:
+        words = set(WORD_PATTERN.findall(json.dumps(entry, ensure_ascii=False).lower()))
+        overlap = len(query & words)
+        if overlap:
+            scored.append((overlap, entry['filename']))
+    scored.sort(key=lambda s: -s[0])
+    return [filename for _, filename in scored[:k]]
+
+def _prefetch_file(path: str):
+    try:
+        if config.ROUTE_PAGE_RANGES:
+            read_raw_pages(path)          # the routed page ranges are sliced from it
+        else:
+            extract_text_from_pdf(path)
+    except Exception:
+        pass  # speculative: the real read reports the error
+
+def prefetch_files(filenames: List[str], pdf_dir: str):
+    for fname in filenames:
+        path = os.path.join(pdf_dir, fname)
+        if os.path.exists(path):
+            prefetch_pool().submit(bind_context(_prefetch_file), path)
+
+def start_prefetch(item: dict, project_index: List[dict], rag: LegalRAG, pdf_dir: str) -> Optional[Future]:
+    """Starts legal retrieval and speculative extraction for `item`; returns the legal context future."""
+    if not config.PREFETCH_EVIDENCE:
+        return None
+    legal_future = prefetch_pool().submit(bind_context(retrieve_legal_context), rag, item)
+    prefetch_files(candidate_files(item, project_index, config.PREFETCH_CANDIDATES), pdf_dir)
+    return legal_future
+
+# --- STEPS ---
+def route_requirement(item: dict, project_index: List[dict], router: RouterAgent) -> dict:
+    """Returns {"decision", "usage", "seconds"} for one checklist item."""
+    start = time.time()
+    evidence_hint = item.get('expected_evidence', 'N/A')
+    search_query = f"{item['requirement']} (Evidence needed: {evidence_hint})"
+    with tracer.span("requirement.route", req_id=item['id']):
+        decision, usage = router.route(search_query, project_index)
+    return {"decision": decision, "usage": usage, "seconds": time.time() - start}
+
+def selected_pages(decision) -> Dict[str, str]:
+    """Router page ranges of the selected files (empty when ROUTE_PAGE_RANGES is off)."""
+    if not config.ROUTE_PAGE_RANGES:
+        return {}
+    return {f: pages for f, pages in decision.page_ranges.items() if pages and f in decision.selected_filenames}
+
+def evidence_key(decision) -> tuple:
+    """Identifies the evidence a routing decision reads: its file set and page ranges."""
+    return frozenset(decision.selected_filenames), frozenset(selected_pages(decision).items())
+
+def stored_pages(row) -> Dict[str, str]:
+    return json.loads(row["router_pages"]) if row["router_pages"] else {}
+
+def gather_evidence(filenames: List[str], pdf_dir: str, req_id: str = "",
+                    page_ranges: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Text per file; files in page_ranges are read only on those pages."""
+    page_ranges = page_ranges or {}
+    existing = [f for f in filenames if os.path.exists(os.path.join(pdf_dir, f))]
+    with tracer.span("requirement.evidence", req_id=req_id):
+        if len(existing) > 1 and config.PREFETCH_WORKERS > 1:
+            # Files are read in parallel; the dict keeps the routed order
+            futures = [
+                prefetch_pool().submit(bind_context(extract_text_from_pdf), os.path.join(pdf_dir, f), page_ranges.get(f))
+                for f in existing
+            ]
+            return {f: future.result() for f, future in zip(existing, futures)}
+        return {f: extract_text_from_pdf(os.path.join(pdf_dir, f), page_ranges.get(f)) for f in existing}
+
+def retrieve_legal_context(rag: LegalRAG, item: dict) -> str:
+    with tracer.span("requirement.legal_context", req_id=item['id']):
+        return rag.retrieve_context(item['requirement'])
+
+def log_skipped(item: dict, routed: dict, audit_logger: AuditLogger, pdf_dir: str = "") -> dict:
+    result = new_result(item)
+    router_usage = routed["usage"]
+    result["cost"] = audit_logger.log_requirement(
+        item['id'], item['requirement'], routed["seconds"],
+        router_data={
+            'model': config.MODEL_ROUTER,
+            'input': router_usage.get('input_tokens', 0),
+            'output': router_usage.get('output_tokens', 0),
+            'files': "None", 'reasoning': "No relevant files found"
+        },
+        auditor_data={
+            'model': config.MODEL_AUDITOR,
+            'input': 0, 'output': 0, 'status': "SKIPPED", 'reasoning': "N/A", 'instruction': "N/A"
+        },
+        hashes=input_hashes(item, [], pdf_dir, None)
+    )
+    result.update(status="SKIPPED", duration=routed["seconds"])
+    return result
+
+def log_audited(item: dict, routed: dict, audit_result, auditor_usage: Dict, duration: float,
+                audit_logger: AuditLogger, hashes: Optional[Dict[str, str]] = None,
+                pages: Optional[Dict[str, str]] = None, extra_cost: float = 0.0) -> dict:
+    """
+    Logs a finished audit and returns its result dict (status ERROR if audit_result is None).
+    pages: the page ranges the evidence was read from (None = whole files).
+    extra_cost: already-logged calls of this requirement (see AuditLogger.log_requirement).
+    """
+    result = new_result(item)
+    decision = routed["decision"]
+    result.update(files_used=decision.selected_filenames, pages_used=pages or {}, duration=duration, cost=extra_cost)
+    tracer.record("requirement.total", duration, start=time.time() - duration, req_id=item['id'])
+    if not audit_result:
+        return result
+
+    router_usage = routed["usage"]
+    with tracer.span("requirement.log", req_id=item['id']):
+        result["cost"] = audit_logger.log_requirement(
+            item['id'], item['requirement'], duration,
+            router_data={
+                'model': config.MODEL_ROUTER,
+                'input': router_usage.get('input_tokens', 0),
+                'output': router_usage.get('output_tokens', 0),
+                'files': str(decision.selected_filenames),
+                'reasoning': decision.reasoning,
+                'pages': pages
+            },
+            auditor_data={
+                'model': config.MODEL_AUDITOR,
+                'input': auditor_usage.get('input_tokens', 0),
+                'output': auditor_usage.get('output_tokens', 0),
+                'status': audit_result.status,
+                'reasoning': audit_result.reasoning,
+                'instruction': audit_result.instruction,
+                'evidence_location': audit_result.evidence_location,
+                'ttft_seconds': auditor_usage.get('ttft_seconds')
+            },
+            hashes=hashes, extra_cost=extra_cost
+        )
+
+    result.update(
+        status=audit_result.status,
+        reasoning=audit_result.reasoning,
+        instruction=audit_result.instruction,
+        evidence_location=audit_result.evidence_location
+    )
+    return result
+
+# --- SEMANTIC VERDICT CACHE ---
+def new_verdict_cache(rag: LegalRAG) -> Optional[VerdictCache]:
+    """Per-run cache of single-mode verdicts (None when SEMANTIC_CACHE is off)."""
+    if not config.SEMANTIC_CACHE:
+        return None
+    checker = VerdictCheckerAgent() if config.SEMANTIC_CACHE_MODE == "confirm" else None
+    return VerdictCache(rag.ef, checker)
+
+def reuse_verdict(item: dict, routed: dict, hashes: Dict[str, str], pages: Dict[str, str],
+                  verdict_cache: VerdictCache, audit_logger: AuditLogger, start: float) -> Tuple[Optional[dict], float]:
+    """
+    Logs and returns the cached verdict of a similar requirement on the same
+    evidence, or None if there is none (or the checker rejects it), plus the
+    cost of a rejected check, which the caller adds to the requirement.
+    """
+    with tracer.span("requirement.verdict_cache", req_id=item['id']):
+        match = verdict_cache.lookup(item, hashes["evidence_hash"], hashes["legal_hash"])
+        if match is None:
+            return None, 0.0
+        cached_item, cached, score = match
+
+        check_usage = {"input_tokens": 0, "output_tokens": 0}
+        if verdict_cache.checker is not None:
+            check, check_usage = verdict_cache.checker.confirm(item, cached_item, cached)
+            if not check or not check.same_verdict:
+                return None, audit_logger.log_llm_call(
+                    "verdict_check", config.MODEL_VERDICT_CHECK,
+                    check_usage.get('input_tokens', 0), check_usage.get('output_tokens', 0), req_id=item['id']
+                )
+
+    result = new_result(item)
+    decision = routed["decision"]
+    duration = routed["seconds"] + time.time() - start
+    router_usage = routed["usage"]
+    result["cost"] = audit_logger.log_requirement(
+        item['id'], item['requirement'], duration,
+        router_data={
+            'model': config.MODEL_ROUTER,
+            'input': router_usage.get('input_tokens', 0),
+            'output': router_usage.get('output_tokens', 0),
+            'files': str(decision.selected_filenames),
+            'reasoning': decision.reasoning,
+            'pages': pages
+        },
+        auditor_data={
+            'model': config.MODEL_VERDICT_CHECK if verdict_cache.checker is not None else config.MODEL_AUDITOR,
+            'input': check_usage.get('input_tokens', 0),
+            'output': check_usage.get('output_tokens', 0),
+            'status': cached['status'],
+            'reasoning': cached['reasoning'],
+            'instruction': cached['instruction'],
+            'evidence_location': cached['evidence_location']
+        },
+        hashes=hashes, reused_from=cached_item['id']
+    )
+    tracer.record("requirement.total", duration, start=time.time() - duration, req_id=item['id'])
+    result.update(
+        status=cached['status'], reasoning=cached['reasoning'], instruction=cached['instruction'],
+        evidence_location=cached['evidence_location'], files_used=decision.selected_filenames,
+        pages_used=pages, duration=duration, reused_from=cached_item['id'], reuse_similarity=round(score, 3)
+    )
+    return result, 0.0
+
+def audit_routed(item: dict, routed: dict, auditor: AuditorAgent, rag: LegalRAG,
+                 audit_logger: AuditLogger, pdf_dir: str,
+                 on_stage: Optional[Callable[[str, str], None]] = None,
+                 legal_context: Optional[str] = None,
+                 on_partial: Optional[Callable[[str, str], None]] = None,
+                 verdict_cache: Optional[VerdictCache] = None) -> dict:
+    """
+    Evidence + single Auditor call for an item that already has a routing decision.
+    on_partial(req_id, reasoning) receives the streamed reasoning (config.STREAM_AUDITOR).
+    With verdict_cache, a similar requirement's verdict on the same evidence and legal context is reused.
+    """
+    start = time.time()
+    if on_stage:
+        on_stage("evidence", item['id'])
+    if legal_context is None:
+        legal_context = retrieve_legal_context(rag, item)
+    pages = selected_pages(routed["decision"])
+    hashes = input_hashes(item, routed["decision"].selected_filenames, pdf_dir, legal_context, pages)
+    check_cost = 0.0   # a verdict check that rejected the cached match
+    if verdict_cache is not None:
+        reused, check_cost = reuse_verdict(item, routed, hashes, pages, verdict_cache, audit_logger, start)
+        if reused:
+            return reused
+    file_contents = gather_evidence(routed["decision"].selected_filenames, pdf_dir, item['id'], pages)
+
+    if not file_contents:
+        result = new_result(item)
+        result.update(files_used=routed["decision"].selected_filenames, duration=routed["seconds"] + time.time() - start,
+                      cost=check_cost)
+        return result
+
+    if on_stage:
+        on_stage("audit", item['id'])
+    with tracer.span("requirement.audit", req_id=item['id']):
+        audit_result, auditor_usage = auditor.audit(
+            build_audit_prompt(item), legal_context, file_contents,
+            on_partial=(lambda text: on_partial(item['id'], text)) if on_partial else None
+        )
+
+    duration = routed["seconds"] + time.time() - start
+    result = log_audited(item, routed, audit_result, auditor_usage, duration, audit_logger, hashes, pages, check_cost)
+    if verdict_cache is not None and result["status"] in VERDICTS:
+        verdict_cache.add(item, hashes["evidence_hash"], hashes["legal_hash"], result)
+    return result
+
+def audit_requirement(item: dict, project_index: List[dict], router: RouterAgent, auditor: AuditorAgent,
+                      rag: LegalRAG, audit_logger: AuditLogger, pdf_dir: str,
+                      on_stage: Optional[Callable[[str, str], None]] = None,
+                      on_partial: Optional[Callable[[str, str], None]] = None,
+                      verdict_cache: Optional[VerdictCache] = None) -> dict:
+    """
+    Routes, gathers evidence and audits a single checklist item, logging it to audit_logger.
+    Returns a result dict; `status` is "SKIPPED" when no file was routed and
+    "ERROR" when the auditor produced no valid result (not logged, as before).
+    """
+    legal_future = start_prefetch(item, project_index, rag, pdf_dir)
+    if on_stage:
+        on_stage("route", item['id'])
+    routed = route_requirement(item, project_index, router)
+    if not routed["decision"] or not routed["decision"].selected_filenames:
+        return log_skipped(item, routed, audit_logger, pdf_dir)
+    legal_context = legal_future.result() if legal_future else None
+    return audit_routed(item, routed, auditor, rag, audit_logger, pdf_dir, on_stage, legal_context, on_partial, verdict_cache)
+
+# --- GROUPED AUDITING ---
+def build_audit_groups(routed_items: List[Tuple[dict, dict]], evidence_tokens: Dict[tuple, int]) -> List[List[Tuple[dict, dict]]]:
+    """
+    Groups routed items by (chapter, evidence_key), preserving checklist order,
+    and splits each group so evidence + requirements stay within AUDIT_GROUP_TOKEN_BUDGET.
+    """
+    buckets: Dict[tuple, List[Tuple[dict, dict]]] = {}
+    for item, routed in routed_items:
+        key = (item.get('chapter', ''), evidence_key(routed["decision"]))
+        buckets.setdefault(key, []).append((item, routed))
+
+    groups = []
+    for (_, evidence), members in buckets.items():
+        budget = config.AUDIT_GROUP_TOKEN_BUDGET - evidence_tokens.get(evidence, 0)
+        current, used = [], 0
+        for item, routed in members:
+            cost = estimate_tokens(build_audit_prompt(item)) + config.AUDIT_GROUP_OUTPUT_TOKENS_PER_ITEM
+            if current and (used + cost > budget or len(current) >= config.AUDIT_GROUP_MAX_ITEMS):
+                groups.append(current)
+                current, used = [], 0
+            current.append((item, routed))
+            used += cost
+        if current:
+            groups.append(current)
+    return groups
+
+def audit_group(group: List[Tuple[dict, dict]], auditor: AuditorAgent, rag: LegalRAG,
+                audit_logger: AuditLogger, pdf_dir: str, file_contents: Dict[str, str],
+                on_stage: Optional[Callable[[str, str], None]] = None,
+                legal_contexts: Optional[Dict[str, str]] = None) -> List[dict]:
+    """One Auditor call for the whole group; falls back to per-item calls if it fails."""
+    legal_contexts = legal_contexts or {}
+    if len(group) == 1:
+        item, routed = group[0]
+        return [audit_routed(item, routed, auditor, rag, audit_logger, pdf_dir, on_stage, legal_contexts.get(item['id']))]
+
+    start = time.time()
+    items = [item for item, _ in group]
+    group_label = f"{items[0]['id']}..{items[-1]['id']}"
+    if on_stage:
+        on_stage("evidence", group_label)
+
+    # Shared evidence; legal contexts of all members, without repeats
+    contexts = [legal_contexts.get(item['id']) or retrieve_legal_context(rag, item) for item in items]
+    legal_context = "\n\n".join(dict.fromkeys(contexts))
+
+    if not file_contents:
+        return [
+            audit_routed(item, routed, auditor, rag, audit_logger, pdf_dir, on_stage, context)
+            for (item, routed), context in zip(group, contexts)
+        ]
+
+    if on_stage:
+        on_stage("audit", group_label)
+    with tracer.span("requirement.audit_group", req_ids=group_label, size=len(group)):
+        verdicts, usage = auditor.audit_group(items, legal_context, file_contents)
+
+    if verdicts is None:
+        tracer.record("requirement.audit_group_fallback", 0.0, req_ids=group_label)
+        # Tokens of the failed call are attributed to the first item
+        results = []
+        for i, ((item, routed), context) in enumerate(zip(group, contexts)):
+            result = audit_routed(item, routed, auditor, rag, audit_logger, pdf_dir, on_stage, context)
+            if i == 0:
+                result["cost"] += audit_logger.log_llm_call(
+                    "auditor_group", config.MODEL_AUDITOR,
+                    usage.get("input_tokens", 0), usage.get("output_tokens", 0), req_id=item['id']
+                )
+            results.append(result)
+        return results
+
+    # Split the shared call evenly across the group for per-requirement cost and time
+    n = len(group)
+    pages = selected_pages(group[0][1]["decision"])
+    elapsed = time.time() - start
+    share = {
+        "input_tokens": usage.get("input_tokens", 0) // n,
+        "output_tokens": usage.get("output_tokens", 0) // n
+    }
+    return [
+        log_audited(
+            item, routed, verdict, share, routed["seconds"] + elapsed / n, audit_logger,
+            input_hashes(item, routed["decision"].selected_filenames, pdf_dir, context, pages), pages
+        )
+        for (item, routed), verdict, context in zip(group, verdicts, contexts)
+    ]
+
+# --- SCHEDULING ---
+def chapter_priority(item: dict) -> int:
+    """Position of the first PRIORITY_CHAPTERS entry found in the item's chapter (lower runs first)."""
+    chapter = item.get('chapter', '').lower()
+    for i, hint in enumerate(config.PRIORITY_CHAPTERS):
+        if hint.lower() in chapter:
+            return i
+    return len(config.PRIORITY_CHAPTERS)
+
+def schedule_requirements(routed_items: List[Tuple[dict, dict]],
+                          legal_ids: Dict[str, List[str]]) -> List[Tuple[dict, dict]]:
+    """
+    Orders routed items so consecutive Auditor calls reuse the same evidence:
+    priority tier first, then clusters of identical file sets (each cluster followed
+    by the one sharing most files with it), and inside a cluster items sharing
+    legal chunks next to each other. Ties keep checklist order.
+    """
+    tiers: Dict[int, Dict[frozenset, List[Tuple[dict, dict]]]] = {}
+    for item, routed in routed_items:
+        files = frozenset(routed["decision"].selected_filenames)
+        tiers.setdefault(chapter_priority(item), {}).setdefault(files, []).append((item, routed))
+
+    ordered = []
+    for tier in sorted(tiers):
+        clusters = tiers[tier]
+        remaining = list(clusters)  # first-appearance order
+        previous = frozenset()
+        while remaining:
+            files = max(remaining, key=lambda f: (len(f & previous) / len(f | previous), -remaining.index(f)))
+            remaining.remove(files)
+            members = clusters[files]
+            ordered.extend(sorted(members, key=lambda m: tuple(sorted(legal_ids.get(m[0]['id'], [])))))
+            previous = files
+    return ordered
+
+def audit_checklist(checklist: List[dict], project_index: List[dict], router: RouterAgent, auditor: AuditorAgent,
+                    rag: LegalRAG, audit_logger: AuditLogger, pdf_dir: str,
+                    on_stage: Optional[Callable[[str, str], None]] = None,
+                    on_result: Optional[Callable[[dict], None]] = None,
+                    mode: Optional[str] = None,
+                    on_partial: Optional[Callable[[str, str], None]] = None) -> List[dict]:
+    """
+    Audits the whole checklist. mode (default config.AUDIT_MODE):
+      "single"  - one Auditor call per requirement.
+      "grouped" - one Auditor call per group of requirements sharing chapter and routed files.
+    With SCHEDULE_REQUIREMENTS (always for "grouped") every item is routed first and
+    audits run in schedule_requirements order; otherwise items run in checklist order.
+    on_result gets each result as it finishes; the returned list and the session
+    CSVs follow checklist order. on_partial streams single-mode reasoning (see audit_routed).
+    In single mode, SEMANTIC_CACHE reuses verdicts of similar requirements on the same evidence and legal context.
+    """
+    mode = mode or config.AUDIT_MODE
+    order = [item['id'] for item in checklist]
+
+    def emit(result: dict) -> dict:
+        if on_result:
+            on_result(result)
+        return result
+
+    verdict_cache = new_verdict_cache(rag) if mode == "single" else None
+
+    if mode == "single" and not config.SCHEDULE_REQUIREMENTS:
+        results = [
+            emit(audit_requirement(
+                item, project_index, router, auditor, rag, audit_logger, pdf_dir, on_stage, on_partial, verdict_cache
+            ))
+            for item in checklist
+        ]
+        audit_logger.export_csvs(order)
+        return results
+
+    def retrieve_all(items: List[dict]):
+        with tracer.span("requirement.legal_context", items=len(items)):
+            return rag.retrieve_many([item['requirement'] for item in items])
+
+    # Legal retrieval for the whole checklist runs while the items are routed
+    legal_future = prefetch_pool().submit(bind_context(retrieve_all), checklist) if config.PREFETCH_EVIDENCE else None
+
+    results_by_id: Dict[str, dict] = {}
+    routed_items = []
+    for item in checklist:
+        if on_stage:
+            on_stage("route", item['id'])
+        routed = route_requirement(item, project_index, router)
+        if not routed["decision"] or not routed["decision"].selected_filenames:
+            results_by_id[item['id']] = emit(log_skipped(item, routed, audit_logger, pdf_dir))
+        else:
+            routed_items.append((item, routed))
+            if config.PREFETCH_EVIDENCE and mode == "single":
+                # Parsed while the remaining items are routed
+                prefetch_files(routed["decision"].selected_filenames, pdf_dir)
+
+    legal_ids, legal_contexts = {}, {}
+    if legal_future:
+        by_id = dict(zip([item['id'] for item in checklist], legal_future.result()))
+        retrieved = [by_id[item['id']] for item, _ in routed_items]
+    else:
+        retrieved = retrieve_all([item for item, _ in routed_items])
+    for (item, _), (ids, documents) in zip(routed_items, retrieved):
+        legal_ids[item['id']] = ids
+        legal_contexts[item['id']] = "\n\n".join(documents) if documents else "No legal context found."
+    with tracer.span("requirement.schedule", items=len(routed_items)):
+        routed_items = schedule_requirements(routed_items, legal_ids)
+
+    if mode == "single":
+        for item, routed in routed_items:
+            results_by_id[item['id']] = emit(audit_routed(
+                item, routed, auditor, rag, audit_logger, pdf_dir, on_stage, legal_contexts[item['id']], on_partial,
+                verdict_cache
+            ))
+    else:
+        # Evidence is read once per distinct file set and page ranges, and shared by its groups
+        evidence: Dict[tuple, Dict[str, str]] = {}
+        for _, routed in routed_items:
+            key = evidence_key(routed["decision"])
+            if key not in evidence:
+                decision = routed["decision"]
+                evidence[key] = gather_evidence(decision.selected_filenames, pdf_dir, page_ranges=selected_pages(decision))
+        evidence_tokens = {
+            key: sum(estimate_tokens(text) for text in contents.values()) for key, contents in evidence.items()
+        }
+
+        for group in build_audit_groups(routed_items, evidence_tokens):
+            key = evidence_key(group[0][1]["decision"])
+            for result in audit_group(group, auditor, rag, audit_logger, pdf_dir, evidence[key], on_stage, legal_contexts):
+                results_by_id[result["id"]] = emit(result)
+
+    audit_logger.export_csvs(order)
+    return [results_by_id[req_id] for req_id in order]
+
+# --- DIFFERENTIAL RE-AUDIT ---
+def log_carried(item: dict, row, hashes: Dict[str, str], previous_run_id: str, audit_logger: AuditLogger) -> dict:
+    """Copies a previous verdict into the current run (no LLM calls, zero cost)."""
+    result = new_result(item)
+    files = ast.literal_eval(row["router_files"])
+    audit_logger.log_requirement(
+        item['id'], item['requirement'], 0.0,
+        router_data={
+            'model': row["router_model"], 'input': 0, 'output': 0,
+            'files': row["router_files"], 'reasoning': row["router_reasoning"], 'pages': stored_pages(row)
+        },
+        auditor_data={
+            'model': row["auditor_model"], 'input': 0, 'output': 0,
+            'status': row["audit_status"], 'reasoning': row["audit_reasoning"],
+            'instruction': row["instruction"], 'evidence_location': row["evidence_location"]
+        },
+        hashes=hashes, carried_from=previous_run_id
+    )
+    result.update(
+        status=row["audit_status"], reasoning=row["audit_reasoning"], instruction=row["instruction"],
+        evidence_location=row["evidence_location"] or "N/A", files_used=files, pages_used=stored_pages(row),
+        carried_from=previous_run_id
+    )
+    return result
+
+def reaudit_checklist(checklist: List[dict], previous_run_id: str, project_index: List[dict],
+                      router: RouterAgent, auditor: AuditorAgent, rag: LegalRAG,
+                      audit_logger: AuditLogger, pdf_dir: str,
+                      on_stage: Optional[Callable[[str, str], None]] = None,
+                      on_result: Optional[Callable[[dict], None]] = None,
+                      mode: Optional[str] = None,
+                      on_partial: Optional[Callable[[str, str], None]] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Re-runs only the requirements whose inputs changed since `previous_run_id`.
+    A verdict is carried forward when the requirement text, criteria, contents of
+    the files it was routed to and the retrieved legal context all hash the same.
+    Skipped or failed requirements are always re-run (a new file might match now).
+    Returns (results in checklist order, change report from compare_results).
+    """
+    previous = {row["req_id"]: row for row in audit_logger.store.requirement_results(previous_run_id)}
+
+    carried: Dict[str, dict] = {}
+    changed = []
+    for item in checklist:
+        row = previous.get(item['id'])
+        if row is not None and row["audit_status"] in VERDICTS and row["evidence_hash"]:
+            with tracer.span("reaudit.check", req_id=item['id']):
+                files = ast.literal_eval(row["router_files"])
+                hashes = input_hashes(item, files, pdf_dir, retrieve_legal_context(rag, item), stored_pages(row))
+            if all(hashes[key] == row[key] for key in HASH_KEYS):
+                carried[item['id']] = log_carried(item, row, hashes, previous_run_id, audit_logger)
+                if on_result:
+                    on_result(carried[item['id']])
+                continue
+        changed.append(item)
+
+    audited = audit_checklist(
+        changed, project_index, router, auditor, rag, audit_logger, pdf_dir, on_stage, on_result, mode, on_partial
+    )
+    results_by_id = {**carried, **{r["id"]: r for r in audited}}
+    results = [results_by_id[item['id']] for item in checklist]
+    audit_logger.export_csvs([item['id'] for item in checklist])
+    return results, compare_results(previous, results)
+
+def compare_results(previous: Dict[str, object], results: List[dict]) -> List[dict]:
+    """
+    Verdict changes against the previous run's rows (keyed by req_id). change is
+    FLIPPED (CUMPLE <-> NO CUMPLE), CHANGED (any other status change), NEW,
+    REMOVED or UNCHANGED.
+    """
+    changes = []
+    for result in results:
+        row = previous.get(result["id"])
+        before = row["audit_status"] if row is not None else None
+        if before is None:
+            change = "NEW"
+        elif before == result["status"]:
+            change = "UNCHANGED"
+        elif {before, result["status"]} == set(VERDICTS):
+            change = "FLIPPED"
+        else:
+            change = "CHANGED"
+        changes.append({
+            "req_id": result["id"], "change": change, "previous_status": before,
+            "new_status": result["status"], "carried": "carried_from" in result
+        })
+    current = {r["id"] for r in results}
+    for req_id, row in previous.items():
+        if req_id not in current:
+            changes.append({
+                "req_id": req_id, "change": "REMOVED", "previous_status": row["audit_status"],
+                "new_status": None, "carried": False
+            })
+    return changes
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import config
+from tracing import tracer
+
+# Profiling mode (main_cli.py --profile, "Perfilar ejecución" in app.py).
+#
+# CPU: a daemon thread samples the Python stack of every busy thread every
+# PROFILE_INTERVAL seconds (sys._current_frames) and tags each sample with the
+# thread's innermost tracer span, mapped to a pipeline stage below. Samples are
+# wall-clock: a thread waiting on the LLM API counts in its stage, idle pool
+# threads are skipped.
+#
+# Memory: tracemalloc with PROFILE_TRACEMALLOC_FRAMES frames per allocation.
+# At the end, live allocation sites are attributed to the innermost pipeline
+# function in their traceback (STAGE_OF_CODE).
+#
+# Output, next to the run logs:
+#   profile_<session>.folded     "stage;file:function;... count" lines, for
+#                                flamegraph.pl, speedscope or inferno
+#   profile_<session>_stages.json  samples and top allocation sites per stage
+
+# Tracer span -> stage (first matching prefix of the innermost span that has one)
+STAGE_OF_SPAN = [
+    ("pdf.", "extract"), ("requirement.evidence", "extract"), ("catalog.dedup", "extract"),
+    ("rag.embed", "embed"), ("legal.ingest", "embed"),
+    ("rag.query", "query"), ("requirement.legal_context", "query"),
+    ("llm.rate_limit_wait", "rate_limit"),
+    ("requirement.route", "route"),
+    ("requirement.audit", "audit"), ("requirement.verdict_cache", "audit"),
+    ("requirement.log", "log"),
+    ("catalog.", "catalog"),
+]
+
+# (file, function or None for the whole file) -> stage, for allocation sites
+STAGE_OF_CODE = {
+    ("agents.py", "_parse_pages"): "extract",
+    ("agents.py", "extract_selected_pages"): "extract",
+    ("agents.py", "extract_pages_with_stats"): "extract",
+    ("agents.py", "extract_text_from_pdf"): "extract",
+    ("agents.py", "iter_pdf_pages"): "extract",
+    ("rag_engine.py", "chunk_page_stream"): "extract",
+    ("text_normalizer.py", None): "extract",
+    ("near_duplicates.py", None): "extract",
+    ("embeddings.py", None): "embed",
+    ("rag_engine.py", "ingest_pages"): "embed",
+    ("vector_index.py", "commit"): "embed",
+    ("vector_index.py", "upsert"): "embed",
+    ("vector_index.py", None): "query",
+    ("rag_engine.py", "retrieve_many"): "query",
+    ("agents.py", "route"): "route",
+    ("agents.py", "audit"): "audit",
+    ("agents.py", "audit_group"): "audit",
+    ("agents.py", "analyze_file"): "catalog",
+    ("logger.py", None): "log",
+    ("run_store.py", None): "log",
+}
+
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "socketserver.py", "thread.py")
+
+def stage_of_spans(stack: tuple) -> str:
+    for span in reversed(stack):
+        for prefix, stage in STAGE_OF_SPAN:
+            if span.startswith(prefix):
+                return stage
+    return stack[-1] if stack else "untagged"
+
+def stage_of_traceback(frames) -> str:
+    """frames: (filename, function) pairs, innermost first."""
+    for filename, function in frames:
+        name = os.path.basename(filename)
+        stage = STAGE_OF_CODE.get((name, function)) or STAGE_OF_CODE.get((name, None))
+        if stage:
+            return stage
+    return "other"
+
+def _frame_label(frame) -> str:
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+class Profiler:
+    """Process-wide: only one profile can run at a time (see Profiler.start)."""
+    _active_lock = threading.Lock()
+    _active: Optional["Profiler"] = None
+
+    def __init__(self, interval: float = config.PROFILE_INTERVAL,
+                 memory_frames: int = config.PROFILE_TRACEMALLOC_FRAMES, top_sites: int = config.PROFILE_TOP_SITES):
+        self.interval = interval
+        self.memory_frames = memory_frames
+        self.top_sites = top_sites
+        self.stacks: Counter = Counter()           # folded stack -> samples
+        self.stage_samples: Counter = Counter()
+        self.ticks = 0
+        self.sampler_seconds = 0.0
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> bool:
+        """Starts sampling; False if another profile is already running in this process."""
+        with Profiler._active_lock:
+            if Profiler._active is not None:
+                return False
+            Profiler._active = self
+        if self.memory_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+            self._started_tracemalloc = True
+        self.start_time = time.time()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.end_time = time.time()
+        if tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        with Profiler._active_lock:
+            if Profiler._active is self:
+                Profiler._active = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- CPU SAMPLING ---
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            t0 = time.perf_counter()
+            stages = tracer.stage_stacks()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                spans = stages.get(ident, ())
+                if not spans and os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue  # idle worker thread outside any stage
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stage = stage_of_spans(spans)
+                self.stacks[";".join([stage] + labels[::-1])] += 1
+                self.stage_samples[stage] += 1
+            self.ticks += 1
+            self.sampler_seconds += time.perf_counter() - t0
+
+    # --- MEMORY ---
+    def allocation_sites(self) -> Dict[str, dict]:
+        """Live memory and its top allocation sites (file:line) per stage at the end of the profile."""
+        if self.snapshot is None:
+            return {}
+        snapshot = self.snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),      # the profiler's own sample counters
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        by_stage: Dict[str, Dict[str, list]] = defaultdict(dict)
+        for trace in snapshot.traces:
+            stage = self._stage_of_trace(trace.traceback)
+            top = trace.traceback[-1] if trace.traceback else None   # most recent frame
+            site = f"{os.path.basename(top.filename)}:{top.lineno}" if top else "?"
+            entry = by_stage[stage].setdefault(site, [0, 0])
+            entry[0] += trace.size
+            entry[1] += 1
+        sites = {}
+        for stage, entries in by_stage.items():
+            ordered = sorted(entries.items(), key=lambda e: -e[1][0])[:self.top_sites]
+            sites[stage] = {
+                "live_kib": round(sum(size for size, _ in entries.values()) / 1024, 1),
+                "top_allocation_sites": [
+                    {"site": site, "kib": round(size / 1024, 1), "blocks": count} for site, (size, count) in ordered
+                ]
+            }
+        return sites
+
+    def _stage_of_trace(self, traceback) -> str:
+        # tracemalloc keeps file and line only: resolve the function once per code location
+        frames = []
+        for frame in reversed(traceback):
+            frames.append((frame.filename, _function_at(frame.filename, frame.lineno)))
+        return stage_of_traceback(frames)
+
+    # --- OUTPUT ---
+    def summary(self) -> dict:
+        total = sum(self.stage_samples.values()) or 1
+        duration = (self.end_time or time.time()) - self.start_time
+        sites = self.allocation_sites()
+        stages = {}
+        for stage in sorted(set(self.stage_samples) | set(sites), key=lambda s: -self.stage_samples.get(s, 0)):
+            stages[stage] = {
+                "samples": self.stage_samples.get(stage, 0),
+                "share": round(self.stage_samples.get(stage, 0) / total, 4),
+                **sites.get(stage, {"live_kib": 0.0, "top_allocation_sites": []})
+            }
+        return {
+            "duration_seconds": round(duration, 2),
+            "interval_seconds": self.interval,
+            "ticks": self.ticks,
+            "sampler_overhead": round(self.sampler_seconds / duration, 4) if duration else 0.0,
+            "tracemalloc_frames": self.memory_frames,
+            "tracemalloc_peak_mib": round(self.peak_bytes / 1024 ** 2, 1),
+            "stages": stages
+        }
+
+    def write(self, output_dir: str, session: str) -> Tuple[str, str]:
+        """Writes the folded stacks and the per-stage summary; returns both paths."""
+        folded_path = os.path.join(output_dir, f"profile_{session}.folded")
+        summary_path = os.path.join(output_dir, f"profile_{session}_stages.json")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return folded_path, summary_path
+
+# --- SOURCE LOOKUP (allocation sites) ---
+_functions: Dict[Tuple[str, int], Optional[str]] = {}
+
+def _function_at(filename: str, lineno: int) -> Optional[str]:
+    """Name of the innermost function defined around filename:lineno (own modules only)."""
+    key = (filename, lineno)
+    if key not in _functions:
+        name = None
+        if os.path.basename(filename) in {f for f, _ in STAGE_OF_CODE}:
+            name = _enclosing_function(filename, lineno)
+        _functions[key] = name
+    return _functions[key]
+
+_definitions: Dict[str, List[Tuple[int, int, str]]] = {}
+
+def _enclosing_function(filename: str, lineno: int) -> Optional[str]:
+    if filename not in _definitions:
+        import ast
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError):
+            tree = None
+        _definitions[filename] = [
+            (node.lineno, node.end_lineno, node.name) for node in ast.walk(tree)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ] if tree else []
+    matches = [d for d in _definitions[filename] if d[0] <= lineno <= d[1]]
+    return max(matches, key=lambda d: d[0])[2] if matches else None
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import subprocess
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from tracing import percentile
+from vector_index import create_vector_store, normalize_rows
+
+# Compares the LegalRAG vector stores (Chroma vs memory-mapped NumPy) on the
+# same synthetic embeddings, so the embedding model cost is left out.
+
+console = Console()
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def bench_backend(backend: str, db_dir: str, vectors: np.ndarray, queries: np.ndarray,
+                  k: int, batch: int) -> dict:
+    ids = [f"legal_{i}" for i in range(len(vectors))]
+    documents = [f"Art. {i}" for i in range(len(vectors))]
+    metadatas = [{"source": "synthetic", "chunk_id": i} for i in range(len(vectors))]
+
+    store = create_vector_store(backend, db_dir)
+    t0 = time.perf_counter()
+    for start in range(0, len(vectors), batch):
+        end = start + batch
+        store.upsert(ids[start:end], documents[start:end], vectors[start:end].tolist(), metadatas[start:end])
+    build_seconds = time.perf_counter() - t0
+    del store
+
+    # Cold open of the persisted index, as on process start
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    store = create_vector_store(backend, db_dir)
+    count = store.count()
+    open_seconds = time.perf_counter() - t0
+    open_rss_mb = rss_mb() - rss_before
+
+    single = []
+    results = []
+    for q in queries:
+        t0 = time.perf_counter()
+        found, _, _ = store.query([q.tolist()], n_results=k)
+        single.append(time.perf_counter() - t0)
+        results.append(found[0])
+    single.sort()
+
+    t0 = time.perf_counter()
+    store.query(queries.tolist(), n_results=k)
+    batch_seconds = time.perf_counter() - t0
+
+    return {
+        "backend": backend, "chunks": count,
+        "build_seconds": round(build_seconds, 4),
+        "open_seconds": round(open_seconds, 4),
+        "open_rss_mb": round(open_rss_mb, 1),
+        "query_p50_ms": round(percentile(single, 0.5) * 1000, 3),
+        "query_p95_ms": round(percentile(single, 0.95) * 1000, 3),
+        "batch_query_ms_per_query": round(batch_seconds / len(queries) * 1000, 3),
+        "_results": results
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy vector store benchmark for LegalRAG.")
+    parser.add_argument("--chunks", type=int, default=5000, help="Legal chunks in the index")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (all-MiniLM-L6-v2 = 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=2, help="n_results per query (LegalRAG uses 2)")
+    parser.add_argument("--batch", type=int, default=1000, help="Chunks per upsert call")
+    parser.add_argument("--backends", default="numpy,chroma")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: logs/benchmarks/)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    vectors = normalize_rows(rng.standard_normal((args.chunks, args.dim)))
+    # Queries near existing chunks, like real requirement texts near their articles
+    picks = rng.integers(0, args.chunks, args.queries)
+    queries = normalize_rows(vectors[picks] + 0.5 * normalize_rows(rng.standard_normal((args.queries, args.dim))))
+
+    workdir = tempfile.mkdtemp(prefix="tucana_rag_bench_")
+    rows = []
+    for backend in args.backends.split(","):
+        try:
+            with console.status(f"Benchmarking {backend}..."):
+                rows.append(bench_backend(backend, os.path.join(workdir, backend), vectors, queries, args.k, args.batch))
+        except ImportError as e:
+            console.print(f"[yellow]Skipping {backend}: {e}[/yellow]")
+
+    # Agreement of each backend's top-k with the exact (NumPy) result
+    exact = next((r["_results"] for r in rows if r["backend"] == "numpy"), None)
+    for row in rows:
+        found = row.pop("_results")
+        if exact is not None:
+            overlap = [len(set(a) & set(b)) / len(b) for a, b in zip(found, exact) if b]
+            row["recall_vs_exact"] = round(sum(overlap) / len(overlap), 4) if overlap else None
+
+    table = Table(title=f"LegalRAG vector stores ({args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k})")
+    columns = {
+        "backend": "Backend", "build_seconds": "Build (s)", "open_seconds": "Open (s)",
+        "open_rss_mb": "Open RSS (MB)", "query_p50_ms": "Query p50 (ms)", "query_p95_ms": "Query p95 (ms)",
+        "batch_query_ms_per_query": "Batched (ms/query)", "recall_vs_exact": "Recall vs exact"
+    }
+    for label in columns.values():
+        table.add_column(label)
+    for row in rows:
+        table.add_row(*[str(row.get(col)) for col in columns])
+    console.print(table)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "parameters": vars(args),
+        "backends": rows
+    }
+    output = args.output
+    if not output:
+        os.makedirs(os.path.join("logs", "benchmarks"), exist_ok=True)
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join("logs", "benchmarks", f"rag_{results['commit']}_{ts}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    console.print(f"[green]Results written to {output}[/green]")
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,219 @@
-import chromadb
 import os
-from chromadb.utils import embedding_functions
-from config import DB_DIR
+import json
+import queue
+import threading
+from typing import List, Tuple, Optional, Iterable, Iterator
+from config import (
+    DB_DIR, RAG_BACKEND, EMBEDDING_MODEL, EMBEDDING_BACKEND, LEGAL_CHUNK_CHARS, LEGAL_INGEST_BATCH, LEGAL_INGEST_QUEUE
+)
+from tracing import tracer, bind_context
+from vector_index import create_vector_store, NumpyVectorStore
+from embeddings import create_embedder
+
+def create_embedding_function(backend: str, embedding_backend: str):
+    """
+    The original Chroma setup keeps Chroma's own wrapper (its collection is bound
+    to it); every other combination uses embeddings.create_embedder.
+    """
+    if backend == "chroma" and embedding_backend == "sentence-transformers":
+        from chromadb.utils import embedding_functions
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+    return create_embedder(embedding_backend)
+
+# Several LegalRAG instances (e.g. one per mounted corpus version) share one model
+_embedding_functions = {}
+_embedding_lock = threading.Lock()
+
+def get_embedding_function(backend: str, embedding_backend: str):
+    key = (backend, embedding_backend)
+    with _embedding_lock:
+        if key not in _embedding_functions:
+            _embedding_functions[key] = create_embedding_function(backend, embedding_backend)
+        return _embedding_functions[key]
+
+def version_dir(db_dir: str, version: str) -> str:
+    """Folder of an imported legal snapshot (see legal_snapshot.py)."""
+    return os.path.join(db_dir, "versions", version)
+
+def chunk_text(text: str, size: int = LEGAL_CHUNK_CHARS) -> List[str]:
+    # Simple chunking for PoC
+    return [text[i:i+size] for i in range(0, len(text), size)]
+
+def chunk_page_stream(pages: Iterable[Tuple[int, str]], size: int = LEGAL_CHUNK_CHARS) -> Iterator[Tuple[str, int, int]]:
+    """
+    chunk_text over a stream of (page_number, text) pairs: fixed-size chunks of
+    the concatenated pages, each with the first and last page it covers. Only
+    the text of the chunk being filled is held in memory.
+    """
+    buffer = ""
+    starts: List[Tuple[int, int]] = []     # (offset in buffer, page number) of the pages in the buffer
+
+    def cut(n: int) -> Tuple[str, int, int]:
+        nonlocal buffer, starts
+        covered = [page for offset, page in starts if offset < n]
+        chunk = (buffer[:n], covered[0], covered[-1])
+        buffer = buffer[n:]
+        rest = [(offset - n, page) for offset, page in starts if offset >= n]
+        if buffer and (not rest or rest[0][0] > 0):
+            rest.insert(0, (0, covered[-1]))   # the last page continues into the next chunk
+        starts = rest
+        return chunk
+
+    for number, text in pages:
+        if not text.strip():
+            continue
+        starts.append((len(buffer), number))
+        buffer += text + "\n"
+        while len(buffer) >= size:
+            chunk = cut(size)
+            if chunk[0].strip():
+                yield chunk
+    if buffer.strip():
+        yield cut(len(buffer))
 
 class LegalRAG:
-    def __init__(self):
-        # Persistent Client
-        self.client = chromadb.PersistentClient(path=DB_DIR)
-        
+    def __init__(self, db_dir: str = DB_DIR, backend: str = RAG_BACKEND, embedding_backend: str = EMBEDDING_BACKEND,
+                 version: Optional[str] = None):
+        # One instance may be shared by several threads (see resources.py)
+        self._lock = threading.RLock()
+        self.backend = backend
+        self.embedding_backend = embedding_backend
+        self.version = version
+        self.manifest = None
+
+        if version:
+            # Pinned corpus version: an imported snapshot, mounted read-only
+            path = version_dir(db_dir, version)
+            manifest_path = os.path.join(path, "manifest.json")
+            if not os.path.exists(manifest_path):
+                raise FileNotFoundError(f"Legal corpus version '{version}' not found. Import it with legal_snapshot.py")
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            if (self.manifest["embedding_model"], self.manifest["embedding_backend"]) != (EMBEDDING_MODEL, embedding_backend):
+                raise ValueError(
+                    f"Legal corpus version '{version}' was embedded with {self.manifest['embedding_model']} "
+                    f"({self.manifest['embedding_backend']}), current setting is {EMBEDDING_MODEL} ({embedding_backend})"
+                )
+            self.ef = get_embedding_function("numpy", embedding_backend)
+            self.store = NumpyVectorStore(path)
+            return
+
         # Embedding Function (Local)
-        self.ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
-        
-        self.collection = self.client.get_or_create_collection(
-            name="legal_framework",
-            embedding_function=self.ef
-        )
-
-    def ingest_text(self, text: str, source_name: str):
-        """Splits text into chunks and stores in ChromaDB."""
-        # Simple chunking for PoC
-        chunks = [text[i:i+1000] for i in range(0, len(text), 1000)]
-        ids = [f"{source_name}_{i}" for i in range(len(chunks))]
-        metadatas = [{"source": source_name, "chunk_id": i} for i in range(len(chunks))]
-        
-        self.collection.upsert(
-            documents=chunks,
-            ids=ids,
-            metadatas=metadatas
-        )
+        self.ef = get_embedding_function(backend, embedding_backend)
+
+        # Vector store: persistent Chroma collection or memory-mapped NumPy index.
+        # Vectors from different embedding backends are kept apart.
+        namespace = "" if embedding_backend == "sentence-transformers" else embedding_backend
+        chroma_ef = self.ef if not namespace else None
+        self.store = create_vector_store(backend, db_dir, embedding_function=chroma_ef, namespace=namespace)
+
+    def count(self) -> int:
+        return self.store.count()
+
+    def sources(self) -> List[str]:
+        """Legal files in the index (from the manifest for a mounted version)."""
+        if self.manifest:
+            return sorted(self.manifest["sources"])
+        return self.store.sources()
+
+    def ingest_text(self, text: str, source_name: str) -> int:
+        """Splits text into chunks and stores them in the vector store."""
+        return self.ingest_pages([(1, text)], source_name)
+
+    def ingest_pages(self, pages: Iterable[Tuple[int, str]], source_name: str,
+                     batch_size: int = LEGAL_INGEST_BATCH) -> int:
+        """
+        Streams (page_number, text) pairs into the vector store as chunks with
+        page metadata. A producer thread reads and chunks the pages while this
+        thread embeds and stores the previous batch; at most LEGAL_INGEST_QUEUE
+        batches wait in between, so memory does not depend on the document length.
+        If reading or storing fails, the chunks of source_name already stored are
+        removed, so a source is either fully indexed or absent. Returns the number of chunks stored.
+        """
+        if self.version:
+            raise RuntimeError(f"Legal corpus version '{self.version}' is read-only")
+        batches: queue.Queue = queue.Queue(maxsize=LEGAL_INGEST_QUEUE)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                with tracer.span("pdf.extract", file=source_name):
+                    batch = []
+                    for chunk in chunk_page_stream(pages):
+                        batch.append(chunk)
+                        if len(batch) == batch_size:
+                            if not put(batch):
+                                return
+                            batch = []
+                    if batch and not put(batch):
+                        return
+                put(None)
+            except BaseException as e:   # re-raised in the consumer
+                put(e)
+
+        producer = threading.Thread(target=bind_context(produce), name=f"ingest-{source_name}", daemon=True)
+        producer.start()
+        stored = 0
+        try:
+            with self.store.bulk_writer() as writer:
+                while True:
+                    batch = batches.get()
+                    if batch is None:
+                        break
+                    if isinstance(batch, BaseException):
+                        raise batch
+                    chunks = [text for text, _, _ in batch]
+                    ids = [f"{source_name}_{stored + i}" for i in range(len(batch))]
+                    metadatas = [
+                        {"source": source_name, "chunk_id": stored + i, "page_start": first, "page_end": last}
+                        for i, (_, first, last) in enumerate(batch)
+                    ]
+                    # Embed explicitly so embedding and storage time are traced separately
+                    with self._lock:
+                        with tracer.span("rag.embed", source=source_name, chunks=len(chunks)):
+                            embeddings = self.ef(chunks)
+                        with tracer.span("rag.upsert", source=source_name, chunks=len(chunks)):
+                            writer.upsert(documents=chunks, embeddings=embeddings, ids=ids, metadatas=metadatas)
+                    stored += len(batch)
+        except BaseException:
+            # Chroma batches (and NumPy replacements of known ids) are already stored
+            with self._lock:
+                self.store.delete_source(source_name)
+            raise
+        finally:
+            stop.set()
+            producer.join()
+        return stored
+
+    def retrieve_many(self, queries: List[str], n_results: int = 2) -> List[Tuple[List[str], List[str]]]:
+        """Batched retrieval: one embedding call and one search for all queries."""
+        if not queries:
+            return []
+        with self._lock:
+            with tracer.span("rag.embed", chunks=len(queries)):
+                query_embeddings = self.ef(queries)
+            with tracer.span("rag.query", queries=len(queries)):
+                ids, documents, _ = self.store.query(query_embeddings, n_results=n_results)
+        if not documents:
+            return [([], []) for _ in queries]
+        return list(zip(ids, documents))
+
+    def retrieve(self, query: str, n_results: int = 2) -> Tuple[List[str], List[str]]:
+        """Returns (chunk ids, chunk texts) of the closest legal chunks."""
+        return self.retrieve_many([query], n_results)[0]
 
     def retrieve_context(self, query: str, n_results: int = 2) -> str:
         """Retrieves relevant legal context."""
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        if results['documents']:
-            return "\n\n".join(results['documents'][0])
-        return "No legal context found."
\ No newline at end of file
+        _, documents = self.retrieve(query, n_results)
+        if documents:
+            return "\n\n".join(documents)
+        return "No legal context found."
@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Callable, List, Optional
+
+import config
+from agents import CatalogerAgent, RouterAgent, AuditorAgent, configure_genai, set_text_cache
+from blob_store import BlobStore
+from rag_engine import LegalRAG
+from run_store import RunStore
+from logger import AuditLogger, RUN_STORE_FILENAME
+from pipeline import ingest_legal_framework
+
+# Process-wide shared objects for multi-user serving (app.py / jobs.py).
+# Each factory runs once per process; every session then reuses the same
+# agents, embedding model, vector store and SQLite connection. The rate
+# limiter in agents.py is already process-wide, so concurrent sessions share
+# a single API quota.
+
+LOGS_DIR = "./logs"
+
+_lock = threading.Lock()
+_instances = {}
+_warmed_up = False
+
+def _shared(name, factory):
+    # Double-checked so the hot path does not contend on the lock
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+def get_cataloger() -> CatalogerAgent:
+    return _shared("cataloger", CatalogerAgent)
+
+def get_router() -> RouterAgent:
+    return _shared("router", RouterAgent)
+
+def get_auditor() -> AuditorAgent:
+    return _shared("auditor", AuditorAgent)
+
+def get_legal_rag(version=None) -> LegalRAG:
+    """One index per corpus version; None = config.LEGAL_VERSION."""
+    version = version or config.LEGAL_VERSION
+    return _shared(f"legal_rag:{version or ''}", lambda: LegalRAG(version=version))
+
+def get_run_store() -> RunStore:
+    return _shared("run_store", lambda: RunStore(
+        os.path.join(LOGS_DIR, RUN_STORE_FILENAME), journal_mode=config.SQLITE_JOURNAL_MODE
+    ))
+
+def _create_blob_store() -> BlobStore:
+    store = BlobStore()
+    # Extracted text of uploaded files is cached by content hash
+    set_text_cache(store)
+    return store
+
+def get_blob_store() -> BlobStore:
+    return _shared("blob_store", _create_blob_store)
+
+def new_audit_logger() -> AuditLogger:
+    """Per-run CSV/metadata files, backed by the shared run store."""
+    return AuditLogger(output_dir=LOGS_DIR, store=get_run_store())
+
+def ingest_legal(on_file: Optional[Callable[[str], None]] = None) -> List[str]:
+    """
+    Indexes the legal PDFs missing from the shared index and returns the legal
+    filenames. Serialized, so concurrent jobs never ingest the same file twice.
+    """
+    rag = get_legal_rag()
+    with _lock:
+        return ingest_legal_framework(rag, config.LEGAL_DIR, on_file=on_file)
+
+def warm_up():
+    """Loads every heavy resource and indexes the legal framework, once per process (server start)."""
+    global _warmed_up
+    if _warmed_up:
+        return
+    configure_genai()
+    ingest_legal()
+    get_cataloger()
+    get_router()
+    get_auditor()
+    get_run_store()
+    get_blob_store()
+    _warmed_up = True
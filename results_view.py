@@ -0,0 +1,153 @@
+import re
+import csv
+import zipfile
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Results report of app.py for full-size checklists. Filtering, paging and the
+# aggregate metrics work on the job's result dicts (pipeline.new_result) in the
+# server process, so only one page of results is rendered per rerun. Exports
+# are written row by row to disk instead of building a DataFrame in memory.
+
+STATUS_ORDER = ["CUMPLE", "NO CUMPLE", "SKIPPED"]
+
+EXPORT_HEADERS = [
+    "Req_ID", "Chapter", "Requirement_Text", "Audit_Status", "Audit_Reasoning",
+    "Instruction", "Evidence_Location", "Selected_Files", "Duration_Seconds"
+]
+
+# --- METRICS & FILTERS ---
+def summarize(results: Sequence[dict]) -> dict:
+    """Counts per status plus the chapters and files available as filters (one pass)."""
+    statuses = Counter()
+    chapters = set()
+    files = set()
+    for r in results:
+        statuses[r["status"]] += 1
+        chapters.add(r.get("chapter") or "")
+        files.update(r.get("files_used") or [])
+    ordered = [s for s in STATUS_ORDER if s in statuses] + sorted(s for s in statuses if s not in STATUS_ORDER)
+    return {
+        "total": len(results),
+        "statuses": {s: statuses[s] for s in ordered},
+        "chapters": sorted(chapters),
+        "files": sorted(files),
+        "cost": sum(r.get("cost", 0.0) for r in results)
+    }
+
+def filter_results(results: Sequence[dict], statuses: Optional[Iterable[str]] = None,
+                   chapters: Optional[Iterable[str]] = None, files: Optional[Iterable[str]] = None,
+                   text: str = "") -> List[int]:
+    """Positions of the results matching every given filter (empty filter = no restriction)."""
+    statuses, chapters, files = set(statuses or ()), set(chapters or ()), set(files or ())
+    needle = text.strip().lower()
+    matches = []
+    for i, r in enumerate(results):
+        if statuses and r["status"] not in statuses:
+            continue
+        if chapters and (r.get("chapter") or "") not in chapters:
+            continue
+        if files and not files.intersection(r.get("files_used") or ()):
+            continue
+        if needle and needle not in f"{r['id']}\n{r['requirement']}\n{r.get('reasoning', '')}".lower():
+            continue
+        matches.append(i)
+    return matches
+
+def page_bounds(count: int, page: int, page_size: int) -> Tuple[int, int, int]:
+    """(start, end, number of pages) for a 1-based page, clamped to the available pages."""
+    pages = max(1, -(-count // page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, count), pages
+
+# --- EXPORT ---
+def export_rows(results: Iterable[dict]) -> Iterator[list]:
+    for r in results:
+        yield [
+            r["id"], r.get("chapter", ""), r["requirement"], r["status"], r.get("reasoning", ""),
+            r.get("instruction", ""), r.get("evidence_location", ""), ", ".join(r.get("files_used") or []),
+            round(r.get("duration", 0.0), 2)
+        ]
+
+def write_csv_export(path: str, results: Iterable[dict]) -> str:
+    # utf-8-sig so Excel opens accented text correctly
+    with open(path, mode='w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_HEADERS)
+        for row in export_rows(results):
+            writer.writerow(row)
+    return path
+
+# Minimal single-sheet .xlsx (inline strings, no styles): the sheet XML is
+# streamed into the zip entry, so no spreadsheet library or in-memory workbook is needed.
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Informe" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+XLSX_CELL_LIMIT = 32767
+INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = INVALID_XML_CHARS.sub("", str(value))[:XLSX_CELL_LIMIT]
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+def _xlsx_row(values: list) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+def write_xlsx_export(path: str, results: Iterable[dict]) -> str:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in XLSX_PARTS.items():
+            zf.writestr(name, content)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_HEADERS).encode("utf-8"))
+            for row in export_rows(results):
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+    return path
+
+EXPORT_WRITERS: Dict[str, tuple] = {
+    # format -> (writer, extension, MIME type)
+    "CSV": (write_csv_export, "csv", "text/csv"),
+    "Excel": (write_xlsx_export, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
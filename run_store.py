@@ -0,0 +1,281 @@
+import os
+import csv
+import json
+import sqlite3
+import threading
+from typing import Optional, List, Dict
+
+# --- SCHEMA ---
+# One row per session in `runs`; every other table hangs off run_id.
+# requirement_results keeps the full detailed row so the CSVs can be
+# re-exported from the store at any time.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    project TEXT,
+    run_start TEXT,
+    run_end TEXT,
+    total_duration_seconds REAL,
+    total_cost_usd REAL,
+    metadata_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS catalog_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    timestamp TEXT,
+    filename TEXT,
+    status TEXT,
+    model TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost_usd REAL,
+    compression_ratio REAL
+);
+
+CREATE TABLE IF NOT EXISTS requirement_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    req_id TEXT NOT NULL,
+    requirement_text TEXT,
+    duration_seconds REAL,
+    router_model TEXT,
+    router_input_tokens INTEGER,
+    router_output_tokens INTEGER,
+    router_cost_usd REAL,
+    router_files TEXT,
+    router_reasoning TEXT,
+    auditor_model TEXT,
+    auditor_input_tokens INTEGER,
+    auditor_output_tokens INTEGER,
+    auditor_cost_usd REAL,
+    audit_status TEXT,
+    audit_reasoning TEXT,
+    instruction TEXT,
+    total_cost_usd REAL,
+    evidence_location TEXT,
+    requirement_hash TEXT,
+    criteria_hash TEXT,
+    evidence_hash TEXT,
+    legal_hash TEXT,
+    carried_from TEXT,
+    auditor_ttft_seconds REAL,
+    router_pages TEXT,
+    reused_from TEXT
+);
+
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    timestamp TEXT,
+    agent TEXT,
+    req_id TEXT,
+    filename TEXT,
+    model TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost_usd REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_runs_project ON runs(project);
+CREATE INDEX IF NOT EXISTS idx_catalog_run ON catalog_calls(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_run ON requirement_results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_req ON requirement_results(req_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_llm_run ON llm_calls(run_id);
+CREATE INDEX IF NOT EXISTS idx_llm_req ON llm_calls(req_id, run_id);
+"""
+
+# (table, column, type) added to databases created by older versions
+MIGRATIONS = [
+    ("catalog_calls", "compression_ratio", "REAL"),
+    ("requirement_results", "evidence_location", "TEXT"),
+    ("requirement_results", "requirement_hash", "TEXT"),
+    ("requirement_results", "criteria_hash", "TEXT"),
+    ("requirement_results", "evidence_hash", "TEXT"),
+    ("requirement_results", "legal_hash", "TEXT"),
+    ("requirement_results", "carried_from", "TEXT"),
+    ("requirement_results", "auditor_ttft_seconds", "REAL"),
+    ("requirement_results", "router_pages", "TEXT"),
+    ("requirement_results", "reused_from", "TEXT"),
+]
+
+class RunStore:
+    """Local SQLite store shared by every AuditLogger session."""
+
+    def __init__(self, db_path: str, journal_mode: str = "WAL"):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Queue workers in other processes write to the same file; wait for their locks
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Adds columns introduced after a database was created."""
+        for table, column, sql_type in MIGRATIONS:
+            existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    # --- WRITERS ---
+    def start_run(self, run_id: str, project: Optional[str] = None, run_start: Optional[str] = None):
+        self._execute(
+            "INSERT OR IGNORE INTO runs (run_id, project, run_start) VALUES (?, ?, ?)",
+            (run_id, project, run_start)
+        )
+
+    def finish_run(self, run_id: str, metadata: dict):
+        self._execute(
+            """UPDATE runs SET project = COALESCE(?, project), run_start = COALESCE(?, run_start),
+               run_end = ?, total_duration_seconds = ?, total_cost_usd = ?, metadata_json = ?
+               WHERE run_id = ?""",
+            (
+                metadata.get("input_folder"), metadata.get("run_start"), metadata.get("run_end"),
+                metadata.get("total_duration_seconds"), metadata.get("total_cost_estimated_usd"),
+                json.dumps(metadata, ensure_ascii=False), run_id
+            )
+        )
+
+    def add_catalog_call(self, run_id, timestamp, filename, status, model, input_tok, output_tok, cost,
+                         compression_ratio=None) -> int:
+        return self._execute(
+            """INSERT INTO catalog_calls (run_id, timestamp, filename, status, model,
+               input_tokens, output_tokens, cost_usd, compression_ratio) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (run_id, timestamp, filename, status, model, input_tok, output_tok, cost, compression_ratio)
+        )
+
+    def add_llm_call(self, run_id, timestamp, agent, model, input_tok, output_tok, cost, req_id=None, filename=None):
+        self._execute(
+            """INSERT INTO llm_calls (run_id, timestamp, agent, req_id, filename, model,
+               input_tokens, output_tokens, cost_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (run_id, timestamp, agent, req_id, filename, model, input_tok, output_tok, cost)
+        )
+
+    def add_requirement_result(self, run_id: str, row: Dict) -> int:
+        columns = ", ".join(row.keys())
+        placeholders = ", ".join("?" for _ in row)
+        return self._execute(
+            f"INSERT INTO requirement_results (run_id, {columns}) VALUES (?, {placeholders})",
+            (run_id, *row.values())
+        )
+
+    def adopt_run(self, source_run_id: str, run_id: str):
+        """Moves every row of `source_run_id` (a work queue task attempt) into `run_id`."""
+        with self._lock:
+            for table in ("catalog_calls", "requirement_results", "llm_calls"):
+                self.conn.execute(f"UPDATE {table} SET run_id = ? WHERE run_id = ?", (run_id, source_run_id))
+            self.conn.execute("DELETE FROM runs WHERE run_id = ?", (source_run_id,))
+            self.conn.commit()
+
+    # --- READERS ---
+    def catalog_call(self, row_id: int) -> List[sqlite3.Row]:
+        return self._query("SELECT * FROM catalog_calls WHERE id = ?", (row_id,))
+
+    def requirement_result(self, row_id: int) -> List[sqlite3.Row]:
+        return self._query("SELECT * FROM requirement_results WHERE id = ?", (row_id,))
+
+    def catalog_calls(self, run_id: str) -> List[sqlite3.Row]:
+        return self._query("SELECT * FROM catalog_calls WHERE run_id = ? ORDER BY id", (run_id,))
+
+    def requirement_results(self, run_id: str) -> List[sqlite3.Row]:
+        return self._query("SELECT * FROM requirement_results WHERE run_id = ? ORDER BY id", (run_id,))
+
+    def last_run(self, project: Optional[str] = None, exclude: Optional[str] = None) -> Optional[str]:
+        """Most recent finished run (optionally of one project), skipping run `exclude`."""
+        sql = "SELECT run_id FROM runs WHERE run_end IS NOT NULL AND run_id != ?"
+        params = [exclude or ""]
+        if project is not None:
+            sql += " AND project = ?"
+            params.append(project)
+        rows = self._query(sql + " ORDER BY run_start DESC, run_id DESC LIMIT 1", tuple(params))
+        return rows[0]["run_id"] if rows else None
+
+    def project_costs(self, project: Optional[str] = None) -> List[sqlite3.Row]:
+        """Total runs, LLM calls, tokens and cost per project."""
+        sql = """
+            SELECT r.project AS project,
+                   COUNT(DISTINCT r.run_id) AS runs,
+                   COUNT(l.id) AS llm_calls,
+                   COALESCE(SUM(l.input_tokens), 0) AS input_tokens,
+                   COALESCE(SUM(l.output_tokens), 0) AS output_tokens,
+                   COALESCE(SUM(l.cost_usd), 0) AS cost_usd
+            FROM runs r LEFT JOIN llm_calls l ON l.run_id = r.run_id
+        """
+        params = ()
+        if project is not None:
+            sql += " WHERE r.project = ?"
+            params = (project,)
+        sql += " GROUP BY r.project ORDER BY cost_usd DESC"
+        return self._query(sql, params)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# --- CSV EXPORTS ---
+def _money(value) -> str:
+    return f"${(value or 0.0):.6f}"
+
+def export_detailed_rows(rows: List[sqlite3.Row]) -> List[list]:
+    return [[
+        r["req_id"], r["requirement_text"], f"{r['duration_seconds']:.2f}",
+        r["router_model"], r["router_input_tokens"], r["router_output_tokens"], _money(r["router_cost_usd"]),
+        r["router_files"], r["router_reasoning"],
+        r["auditor_model"], r["auditor_input_tokens"], r["auditor_output_tokens"], _money(r["auditor_cost_usd"]),
+        r["audit_status"], r["audit_reasoning"], r["instruction"], _money(r["total_cost_usd"]),
+        "" if r["auditor_ttft_seconds"] is None else f"{r['auditor_ttft_seconds']:.3f}",
+        r["reused_from"] or ""
+    ] for r in rows]
+
+def export_user_rows(rows: List[sqlite3.Row]) -> List[list]:
+    return [[
+        r["req_id"], r["requirement_text"], f"{r['duration_seconds']:.2f}",
+        r["router_files"], r["audit_status"], r["audit_reasoning"], r["instruction"]
+    ] for r in rows]
+
+def export_catalog_rows(rows: List[sqlite3.Row]) -> List[list]:
+    return [[
+        r["timestamp"], r["filename"], r["status"], r["model"],
+        r["input_tokens"], r["output_tokens"], _money(r["cost_usd"]),
+        "" if r["compression_ratio"] is None else f"{r['compression_ratio']:.3f}"
+    ] for r in rows]
+
+def write_csv(path: str, headers: list, rows: List[list]):
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    import sys
+    from rich.console import Console
+    from rich.table import Table
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("./logs", "audit_runs.db")
+    store = RunStore(db_path)
+
+    table = Table(title="Cost per Project")
+    for col in ["Project", "Runs", "LLM Calls", "Input Tokens", "Output Tokens", "Cost (USD)"]:
+        table.add_column(col)
+    for row in store.project_costs():
+        table.add_row(
+            str(row["project"]), str(row["runs"]), str(row["llm_calls"]),
+            str(row["input_tokens"]), str(row["output_tokens"]), f"${row['cost_usd']:.4f}"
+        )
+    Console().print(table)
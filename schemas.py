@@ -17,6 +17,10 @@ class RoutingDecision(BaseModel):
     """Output from the Router Agent."""
     selected_filenames: List[str] = Field(description="List of exact filenames relevant to the requirement.")
     reasoning: str = Field(description="Brief explanation of why these files were selected.")
+    page_ranges: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Pages to read per selected file, from the index page_ranges (e.g. {'file1.pdf': '4-8, 12'}). A file without an entry is read whole."
+    )
 
 class AuditResult(BaseModel):
     """Output from the Auditor Agent."""
@@ -24,4 +28,17 @@ class AuditResult(BaseModel):
     reasoning: str = Field(description="Technical reasoning in Spanish.")
     legal_base: str = Field(description="The legal article used for verification.")
     evidence_location: str = Field(description="Where the evidence was found (Page/Section).")
-    instruction: str = Field(description="One-sentence corrective action starting with an infinitive verb (e.g. 'Incluir...'). Use 'Ninguna acción requerida' if status is CUMPLE.")
\ No newline at end of file
+    instruction: str = Field(description="One-sentence corrective action starting with an infinitive verb (e.g. 'Incluir...'). Use 'Ninguna acción requerida' if status is CUMPLE.")
+
+class GroupedAuditItem(AuditResult):
+    """One verdict inside a grouped Auditor call."""
+    req_id: str = Field(description="ID of the requirement this verdict belongs to (e.g. 'REQ-004').")
+
+class GroupedAuditResult(BaseModel):
+    """Output from the Auditor Agent when several requirements share one call."""
+    results: List[GroupedAuditItem]
+
+class VerdictReuseCheck(BaseModel):
+    """Output of the cheap check before a cached verdict is reused for a similar requirement."""
+    same_verdict: bool = Field(description="True if the earlier verdict and its reasoning fully answer the new requirement.")
+    reasoning: str = Field(description="Brief justification in Spanish.")
@@ -0,0 +1,206 @@
+import os
+import json
+import random
+import argparse
+from fpdf import FPDF
+
+# Synthetic EIA + legal corpus generator for benchmarks.
+# Pages carry the repeated letterheads, footers and page numbers of real
+# consultant submissions; plans and monitoring tables are spread across files.
+
+PLANS = [
+    ("Plan de Manejo Ambiental", "Plan de Prevencion y Mitigacion de Impactos"),
+    ("Plan de Manejo Ambiental", "Plan de Manejo de Desechos Peligrosos y No Peligrosos"),
+    ("Plan de Manejo Ambiental", "Plan de Contingencias"),
+    ("Plan de Manejo Ambiental", "Programa de Capacitacion y Educacion Ambiental"),
+    ("Plan de Manejo Ambiental", "Plan de Relaciones Comunitarias"),
+    ("Plan de Manejo Ambiental", "Plan de Rehabilitacion de Areas Afectadas"),
+    ("Plan de Manejo Ambiental", "Plan de Cierre, Abandono y Entrega del Area"),
+    ("Plan de Manejo Ambiental", "Plan de Monitoreo y Seguimiento"),
+    ("Linea Base", "Linea Base Fisica - Calidad de Aire"),
+    ("Linea Base", "Linea Base Fisica - Ruido Ambiental"),
+    ("Linea Base", "Linea Base Fisica - Calidad de Agua Superficial"),
+    ("Linea Base", "Linea Base Biotica - Flora"),
+    ("Linea Base", "Linea Base Biotica - Fauna Terrestre"),
+    ("Linea Base", "Linea Base Socioeconomica"),
+    ("Descripcion del Proyecto", "Componente de Infraestructura y Obras Civiles"),
+    ("Ficha Tecnica", "Ficha Tecnica del Proyecto"),
+]
+
+PARAMETERS = [
+    ("Ruido", "dB(A)", 45, 80), ("PM10", "ug/m3", 10, 120), ("PM2.5", "ug/m3", 5, 60),
+    ("pH", "unidades", 5.5, 9.0), ("DBO5", "mg/l", 2, 150), ("Solidos Suspendidos", "mg/l", 10, 300),
+    ("Oxigeno Disuelto", "mg/l", 2, 9), ("Coliformes Fecales", "NMP/100ml", 10, 2000),
+]
+
+VOCABULARY = (
+    "el proyecto contempla la implementacion de medidas de control ambiental en el area de influencia "
+    "directa e indirecta conforme a la normativa vigente se realizaron muestreos en puntos representativos "
+    "los resultados fueron comparados con los limites maximos permisibles establecidos en el acuerdo ministerial "
+    "el proponente se compromete a ejecutar el cronograma valorado y reportar los indicadores de cumplimiento "
+    "la metodologia aplicada incluye inspecciones de campo registros fotograficos y analisis de laboratorio acreditado "
+    "se identificaron receptores sensibles comunidades cercanas cuerpos de agua y zonas de vegetacion nativa"
+).split()
+
+LEGAL_TOPICS = [
+    "regularizacion ambiental", "licencia ambiental", "estudio de impacto ambiental", "participacion ciudadana",
+    "monitoreo ambiental", "gestion de desechos peligrosos", "plan de manejo ambiental", "auditoria ambiental",
+    "limites maximos permisibles de ruido", "calidad del aire ambiente", "descargas a cuerpos de agua",
+    "cierre y abandono", "reparacion integral", "sanciones administrativas",
+]
+
+class SyntheticPDF(FPDF):
+    def __init__(self, letterhead: str, project: str):
+        super().__init__()
+        self.letterhead = letterhead
+        self.project = project
+
+    def header(self):
+        self.set_font("Arial", 'I', size=8)
+        self.cell(0, 5, txt=self.letterhead, ln=1, align='L')
+        self.cell(0, 5, txt=f"Estudio de Impacto Ambiental - {self.project}", ln=1, align='R')
+        self.ln(3)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", 'I', size=8)
+        self.cell(0, 10, txt=f"Pagina {self.page_no()}", align='C')
+
+def paragraph(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def add_table(pdf: SyntheticPDF, rng: random.Random, number: int, rows: int = 8) -> str:
+    name, unit, low, high = rng.choice(PARAMETERS)
+    caption = f"Tabla {number}: Resultados de monitoreo de {name} ({unit})"
+    pdf.set_font("Arial", 'B', size=10)
+    pdf.cell(0, 8, txt=caption, ln=1)
+    pdf.set_font("Arial", size=9)
+    for header in ["Punto", "Fecha", "Valor", "Limite", "Cumple"]:
+        pdf.cell(36, 6, txt=header, border=1)
+    pdf.ln()
+    limit = round(low + (high - low) * 0.8, 1)
+    for r in range(rows):
+        value = round(rng.uniform(low, high), 1)
+        cells = [f"P{r + 1}", f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                 str(value), str(limit), "Si" if value <= limit else "No"]
+        for cell in cells:
+            pdf.cell(36, 6, txt=cell, border=1)
+        pdf.ln()
+    pdf.ln(4)
+    return caption
+
+def generate_eia_file(path: str, rng: random.Random, project: str, plans: list, pages: int, tables: int) -> dict:
+    pdf = SyntheticPDF("Consultora Ambiental Andina Cia. Ltda. - Registro MAATE-SUIA-0042", project)
+    table_pages = set(rng.sample(range(pages), min(tables, pages)))
+    captions = []
+
+    current = None
+    for page in range(pages):
+        pdf.add_page()
+        plan_idx = min(page * len(plans) // pages, len(plans) - 1)
+        if plan_idx != current:
+            current = plan_idx
+            pdf.set_font("Arial", 'B', size=12)
+            pdf.cell(0, 10, txt=f"{plan_idx + 1}. {plans[plan_idx][1]}", ln=1)
+        pdf.set_font("Arial", size=10)
+        if page in table_pages:
+            pdf.multi_cell(0, 5, txt=paragraph(rng, 60))
+            pdf.ln(2)
+            captions.append(add_table(pdf, rng, len(captions) + 1))
+        else:
+            for _ in range(3):
+                pdf.multi_cell(0, 5, txt=paragraph(rng, 90))
+                pdf.ln(2)
+
+    pdf.output(path)
+    return {"file": os.path.basename(path), "plans": [p for _, p in plans], "tables": captions, "pages": pdf.page_no()}
+
+def generate_legal_file(path: str, rng: random.Random, title: str, pages: int, first_article: int) -> int:
+    pdf = SyntheticPDF("Registro Oficial del Ecuador - Edicion Especial", title)
+    article = first_article
+    for _ in range(pages):
+        pdf.add_page()
+        for _ in range(4):
+            topic = rng.choice(LEGAL_TOPICS)
+            pdf.set_font("Arial", 'B', size=10)
+            pdf.cell(0, 6, txt=f"Art. {article}.- De la {topic}", ln=1)
+            pdf.set_font("Arial", size=10)
+            pdf.multi_cell(0, 5, txt=f"En materia de {topic}, " + paragraph(rng, 70))
+            pdf.ln(2)
+            article += 1
+    pdf.output(path)
+    return article
+
+def generate_checklist(rng: random.Random, manifest: list, n_requirements: int) -> list:
+    templates = [
+        ("Se presenta el {plan} con objetivos, medidas y cronograma valorado.",
+         "El {plan} debe incluir objetivos, medidas, indicadores, medios de verificacion y responsables.",
+         "Seccion del {plan} con tabla de medidas."),
+        ("Se reportan los resultados de monitoreo asociados al {plan}.",
+         "Los resultados deben compararse con los limites maximos permisibles vigentes.",
+         "{table}"),
+    ]
+    checklist = []
+    for i in range(n_requirements):
+        entry = manifest[i % len(manifest)]
+        plan = entry["plans"][(i // len(manifest)) % len(entry["plans"])]
+        req, crit, ev = templates[i % len(templates)]
+        table = entry["tables"][i % len(entry["tables"])] if entry["tables"] else "Tabla de resultados"
+        checklist.append({
+            "id": f"REQ-{i + 1:03d}",
+            "chapter": plan,
+            "requirement": req.format(plan=plan),
+            "criteria": crit.format(plan=plan),
+            "expected_evidence": ev.format(plan=plan, table=table)
+        })
+    return checklist
+
+def generate_corpus(root: str, files: int = 5, pages: int = 20, tables: int = 4,
+                    legal_files: int = 2, legal_pages: int = 20, requirements: int = 20, seed: int = 42) -> dict:
+    """Writes <root>/proyecto_eia, <root>/leyes and <root>/audit_checklist.json. Returns a manifest."""
+    rng = random.Random(seed)
+    eia_dir = os.path.join(root, "proyecto_eia")
+    legal_dir = os.path.join(root, "leyes")
+    os.makedirs(eia_dir, exist_ok=True)
+    os.makedirs(legal_dir, exist_ok=True)
+
+    manifest = []
+    for i in range(files):
+        plans = rng.sample(PLANS, k=min(len(PLANS), rng.randint(2, 5)))
+        manifest.append(generate_eia_file(
+            os.path.join(eia_dir, f"Anexo_{i + 1:03d}.pdf"), rng, "Proyecto Minero Sintetico", plans, pages, tables
+        ))
+
+    article = 1
+    for i in range(legal_files):
+        article = generate_legal_file(
+            os.path.join(legal_dir, f"Norma_Sintetica_{i + 1}.pdf"), rng, f"Norma Sintetica {i + 1}", legal_pages, article
+        )
+
+    checklist_file = os.path.join(root, "audit_checklist.json")
+    with open(checklist_file, "w", encoding="utf-8") as f:
+        json.dump(generate_checklist(rng, manifest, requirements), f, indent=4, ensure_ascii=False)
+
+    return {
+        "eia_dir": eia_dir, "legal_dir": legal_dir, "checklist_file": checklist_file,
+        "files": manifest, "legal_articles": article - 1
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic EIA and legal corpus.")
+    parser.add_argument("output", help="Target folder")
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--tables", type=int, default=4)
+    parser.add_argument("--legal-files", type=int, default=2)
+    parser.add_argument("--legal-pages", type=int, default=20)
+    parser.add_argument("--requirements", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    result = generate_corpus(
+        args.output, args.files, args.pages, args.tables,
+        args.legal_files, args.legal_pages, args.requirements, args.seed
+    )
+    print(f"Created {len(result['files'])} EIA files and {result['legal_articles']} legal articles in {args.output}")
@@ -0,0 +1,23 @@
+from text_normalizer import normalize_pages
+
+HEADER = ["Consultora Ambiental S.A.", "EIA Proyecto Minero Río Blanco", "Capítulo 5 - Línea Base"]
+
+def page(number: int, body: list) -> str:
+    return "\n".join(HEADER + [""] + body + ["", "Elaborado por: Consultora Ambiental S.A.", f"Página {number} de 4"])
+
+def test_measured_values_and_units_are_kept():
+    pages, _ = normalize_pages(["Tabla 3. Ruido ambiental\nP1\n65\nP2\n72\n%\n........"])
+    assert pages[0].splitlines() == ["Tabla 3. Ruido ambiental", "P1", "65", "P2", "72", "%"]
+
+def test_repeated_table_cells_are_kept():
+    notes = ["Sin observaciones", "Pendiente de firma", "Verificado en campo", "Sin observaciones del auditor"]
+    raw = [
+        page(n, ["Requisito", "Estado", "Valor", "Plan de manejo", "Cumple", "65", "Monitoreo", "Sí", "N/A", notes[n - 1], "Sí"])
+        for n in range(1, 5)
+    ]
+    pages, _ = normalize_pages(raw)
+    for n, text in enumerate(pages, start=1):
+        lines = text.splitlines()
+        assert not set(HEADER) & set(lines) and f"Página {n} de 4" not in lines
+        assert ["Cumple", "65", "Monitoreo", "Sí", "N/A"] == lines[4:9]
+        assert lines[-1] == "Sí"   # same cell in the footer zone
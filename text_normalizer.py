@@ -0,0 +1,110 @@
+import re
+from collections import Counter
+from typing import List, Tuple, Dict, Iterable, Iterator
+
+import config
+
+# Cleans extracted PDF pages before they reach the Cataloger or the Auditor.
+# EIA reports repeat the consultant letterhead, project name, footer and page
+# number on every page; those lines cost tokens and eat into the 30k window
+# without adding evidence.
+
+DIGITS = re.compile(r"\d+")
+SPACES = re.compile(r"[ \t\u00a0\f\v]+")
+# "Página 3", "pág. 3 de 120", "3 / 120". Bare numbers are left to the repetition
+# check, since a lone number may be a measured value.
+PAGE_NUMBER = re.compile(
+    r"^(?:(?:p[aá]g(?:ina)?\.?|page)\s*\d{1,4}(?:\s*(?:de|of|/)\s*\d{1,4})?|\d{1,4}\s*(?:de|of|/)\s*\d{1,4})$",
+    re.IGNORECASE
+)
+# Dot leaders and rules
+LAYOUT_ARTIFACT = re.compile(r"^[.\-_=·…\s]{3,}$")
+
+def _line_key(line: str) -> str:
+    """Repetition key for header/footer lines: page numbers and dates vary per page, so digits are masked."""
+    return DIGITS.sub("#", line.lower())
+
+def _edge_lines(lines: List[str]) -> set:
+    """Indices of the header/footer zone of a page (first and last non-empty lines)."""
+    filled = [i for i, line in enumerate(lines) if line]
+    n = config.BOILERPLATE_EDGE_LINES
+    return set(filled[:n] + filled[-n:])
+
+def find_boilerplate(pages: List[List[str]]) -> Tuple[set, set]:
+    """
+    Lines in the header/footer zone on at least BOILERPLATE_PAGE_FRACTION of the
+    pages (and on BOILERPLATE_MIN_PAGES or more), counted once per page. Returns
+    (exact lines, digit-masked keys), so "Página 3 de 120" style footers match.
+    A line (or key) must also sit in that zone in most of its occurrences, so
+    repeated table cells ("Sí", "N/A", "Cumple") stay in the evidence.
+    """
+    threshold = max(config.BOILERPLATE_MIN_PAGES, config.BOILERPLATE_PAGE_FRACTION * len(pages))
+    # per key: pages where it sits in the edge zone, occurrences anywhere, occurrences in the edge zone
+    exact, exact_all, exact_edge = Counter(), Counter(), Counter()
+    masked, masked_all, masked_edge = Counter(), Counter(), Counter()
+    for lines in pages:
+        short = {i for i, line in enumerate(lines) if line and len(line) <= config.BOILERPLATE_MAX_LINE_CHARS}
+        edge = short & _edge_lines(lines)
+        exact.update({lines[i] for i in edge})
+        masked.update({_line_key(lines[i]) for i in edge})
+        exact_all.update(lines[i] for i in short)
+        exact_edge.update(lines[i] for i in edge)
+        masked_all.update(_line_key(lines[i]) for i in short)
+        masked_edge.update(_line_key(lines[i]) for i in edge)
+    return ({line for line, n in exact.items() if n >= threshold and 2 * exact_edge[line] > exact_all[line]},
+            {key for key, n in masked.items() if n >= threshold and 2 * masked_edge[key] > masked_all[key]})
+
+def _split_lines(page: str) -> List[str]:
+    return [SPACES.sub(" ", line).strip() for line in page.splitlines()]
+
+def _clean_lines(lines: List[str], exact: set, masked: set) -> str:
+    edges = _edge_lines(lines)
+    kept = [
+        line for i, line in enumerate(lines)
+        if line
+        and not LAYOUT_ARTIFACT.match(line)
+        and line not in exact
+        and not (i in edges and (PAGE_NUMBER.match(line) or _line_key(line) in masked))
+    ]
+    return "\n".join(kept)
+
+def normalize_pages(pages: List[str]) -> Tuple[List[str], Dict]:
+    """
+    Removes repeated headers/footers, page numbers and layout artifacts, and
+    collapses whitespace. Page count and order are preserved (emptied pages stay
+    as ""), so page numbers still line up with the PDF.
+    Returns (pages, stats) with raw/clean character counts and the compression ratio.
+    """
+    split = [_split_lines(page) for page in pages]
+    exact, masked = find_boilerplate(split)
+
+    cleaned = [_clean_lines(lines, exact, masked) for lines in split]
+
+    raw_chars = sum(len(p) for p in pages)
+    clean_chars = sum(len(p) for p in cleaned)
+    stats = {
+        "raw_chars": raw_chars,
+        "clean_chars": clean_chars,
+        "compression_ratio": round(clean_chars / raw_chars, 4) if raw_chars else 1.0,
+        "boilerplate_lines": len(exact) + len(masked)
+    }
+    return cleaned, stats
+
+def normalize_page_stream(pages: Iterable[str], sample_pages: int = config.BOILERPLATE_SAMPLE_PAGES) -> Iterator[str]:
+    """
+    normalize_pages for documents too long to hold in memory (legal ingestion):
+    boilerplate is learned from the first `sample_pages` pages, which are the
+    only ones buffered, and then stripped from every page as it streams through.
+    """
+    pages = iter(pages)
+    sample = []
+    for page in pages:
+        sample.append(_split_lines(page))
+        if len(sample) >= sample_pages:
+            break
+    exact, masked = find_boilerplate(sample)
+    for lines in sample:
+        yield _clean_lines(lines, exact, masked)
+    del sample
+    for page in pages:
+        yield _clean_lines(_split_lines(page), exact, masked)
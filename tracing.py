@@ -0,0 +1,207 @@
+import os
+import json
+import math
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, List, Optional
+
+# Upper bounds (seconds) of the Prometheus histogram buckets.
+HISTOGRAM_BUCKETS = [0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+QUANTILES = [0.5, 0.95, 0.99]
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+# Tracer that receives the spans recorded in the current context (see Tracer.activate)
+_active_tracer: contextvars.ContextVar = contextvars.ContextVar("active_tracer", default=None)
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Wraps fn to run in a copy of the caller's context, so work submitted to a
+    thread pool or thread records its spans into the caller's active tracer.
+    """
+    context = contextvars.copy_context()
+    def run(*args, **kwargs):
+        # One copy per call: a Context cannot be entered by two threads at once
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+class Tracer:
+    """Collects span-style timings per pipeline stage (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stacks: Dict[int, list] = {}   # thread id -> stage stack, only while the thread is inside a span (profiler.py)
+        self.origin = time.time()
+        self.spans: List[dict] = []
+
+    def reset(self):
+        with self._lock:
+            self.origin = time.time()
+            self.spans = []
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def stage_stacks(self) -> Dict[int, tuple]:
+        """Open spans of every thread that is inside one (outermost first)."""
+        with self._lock:
+            stacks = list(self._stacks.items())
+        return {ident: tuple(stack) for ident, stack in stacks if stack}
+
+    def current_stage(self) -> Optional[str]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def record(self, stage: str, seconds: float, start: Optional[float] = None, **attrs):
+        """Adds a finished span. Used directly for time measured elsewhere (e.g. rate-limit sleeps)."""
+        if start is None:
+            start = time.time() - seconds
+        stack = self._stack()
+        span = {
+            "stage": stage,
+            "start": start,
+            "duration": seconds,
+            "thread": threading.get_ident(),
+            "parent": stack[-1] if stack else None,
+            "attrs": attrs
+        }
+        sink = _active_tracer.get() or self
+        with sink._lock:
+            sink.spans.append(span)
+
+    @contextmanager
+    def activate(self):
+        """
+        Routes the spans recorded in this context through any Tracer (in practice
+        the process-wide `tracer`) to this one. Concurrent app jobs each activate
+        their own Tracer instead of resetting the shared one.
+        """
+        token = _active_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _active_tracer.reset(token)
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        stack = self._stack()
+        if not stack:
+            # Registered only while open, so short-lived pool threads do not pile up here
+            with self._lock:
+                self._stacks[threading.get_ident()] = stack
+        stack.append(stage)
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            elapsed = time.perf_counter() - t0
+            stack.pop()
+            if not stack:
+                with self._lock:
+                    self._stacks.pop(threading.get_ident(), None)
+            self.record(stage, elapsed, start=start, **attrs)
+
+    # --- AGGREGATION ---
+    def durations(self) -> Dict[str, List[float]]:
+        with self._lock:
+            spans = list(self.spans)
+        by_stage: Dict[str, List[float]] = {}
+        for s in spans:
+            by_stage.setdefault(s["stage"], []).append(s["duration"])
+        for values in by_stage.values():
+            values.sort()
+        return by_stage
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-stage count, total and p50/p95/p99 in seconds."""
+        result = {}
+        for stage, values in sorted(self.durations().items()):
+            result[stage] = {
+                "count": len(values),
+                "total_seconds": round(sum(values), 4),
+                "p50": round(percentile(values, 0.50), 4),
+                "p95": round(percentile(values, 0.95), 4),
+                "p99": round(percentile(values, 0.99), 4),
+                "max": round(values[-1], 4)
+            }
+        return result
+
+    # --- EXPORTERS ---
+    def export_json(self, path: str):
+        """Writes a Chrome/Perfetto compatible trace plus the stage summary."""
+        with self._lock:
+            spans = list(self.spans)
+            origin = self.origin
+        events = [{
+            "name": s["stage"],
+            "ph": "X",
+            "ts": int((s["start"] - origin) * 1_000_000),
+            "dur": int(s["duration"] * 1_000_000),
+            "pid": os.getpid(),
+            "tid": s["thread"],
+            "args": {k: str(v) for k, v in s["attrs"].items()}
+        } for s in spans]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "summary": self.summary()}, f, indent=2, ensure_ascii=False)
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP tucana_stage_duration_seconds Latency of each pipeline stage.",
+            "# TYPE tucana_stage_duration_seconds histogram"
+        ]
+        durations = self.durations()
+        for stage, values in sorted(durations.items()):
+            for bound in HISTOGRAM_BUCKETS:
+                count = sum(1 for v in values if v <= bound)
+                lines.append(f'tucana_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'tucana_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {len(values)}')
+            lines.append(f'tucana_stage_duration_seconds_sum{{stage="{stage}"}} {sum(values):.6f}')
+            lines.append(f'tucana_stage_duration_seconds_count{{stage="{stage}"}} {len(values)}')
+
+        lines.append("# HELP tucana_stage_latency_quantile_seconds Latency quantiles of each pipeline stage.")
+        lines.append("# TYPE tucana_stage_latency_quantile_seconds gauge")
+        for stage, values in sorted(durations.items()):
+            for q in QUANTILES:
+                lines.append(
+                    f'tucana_stage_latency_quantile_seconds{{stage="{stage}",quantile="{q}"}} {percentile(values, q):.6f}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+
+    def serve_prometheus(self, port: int) -> HTTPServer:
+        """Starts a background /metrics endpoint in a daemon thread."""
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("0.0.0.0", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+# Process-wide tracer used by agents, rag_engine and the orchestrators.
+tracer = Tracer()
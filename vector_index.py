@@ -0,0 +1,291 @@
+import os
+import json
+import uuid
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple, Dict, Optional
+
+import numpy as np
+
+# Vector stores behind LegalRAG (config.RAG_BACKEND).
+#
+# NumpyVectorStore keeps the legal chunks as
+#   <dir>/vectors.npy    float32 matrix (N x D), rows L2-normalized, opened with mmap
+#   <dir>/chunks.json    ids, documents and metadatas in row order
+# Opening only maps the file, so startup is instant and the vectors live in the
+# page cache instead of the Python heap. Search is an exact dot product.
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+COPY_ROWS = 65536          # Rows copied per step when a bulk load rebuilds vectors.npy
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class NumpyVectorStore:
+    def __init__(self, db_dir: str):
+        self.db_dir = db_dir
+        self._lock = threading.RLock()
+        os.makedirs(db_dir, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        vectors_path = os.path.join(self.db_dir, VECTORS_FILE)
+        chunks_path = os.path.join(self.db_dir, CHUNKS_FILE)
+        if os.path.exists(vectors_path) and os.path.exists(chunks_path):
+            self.vectors = np.load(vectors_path, mmap_mode="r")
+            with open(chunks_path, "r", encoding="utf-8") as f:
+                chunks = json.load(f)
+        else:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+            chunks = {"ids": [], "documents": [], "metadatas": []}
+        self.ids: List[str] = chunks["ids"]
+        self.documents: List[str] = chunks["documents"]
+        self.metadatas: List[dict] = chunks["metadatas"]
+        self._row = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def upsert(self, ids: List[str], documents: List[str], embeddings, metadatas: Optional[List[dict]] = None):
+        """Replaces rows with known ids and appends the rest, then rewrites both files atomically."""
+        new_vectors = normalize_rows(embeddings)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            vectors = np.array(self.vectors) if self.count() else np.zeros((0, new_vectors.shape[1]), dtype=np.float32)
+            ids_all, docs_all, metas_all = list(self.ids), list(self.documents), list(self.metadatas)
+            append = []
+            for i, chunk_id in enumerate(ids):
+                row = self._row.get(chunk_id)
+                if row is None:
+                    append.append(i)
+                    ids_all.append(chunk_id)
+                    docs_all.append(documents[i])
+                    metas_all.append(metadatas[i])
+                else:
+                    vectors[row] = new_vectors[i]
+                    docs_all[row] = documents[i]
+                    metas_all[row] = metadatas[i]
+            if append:
+                vectors = np.vstack([vectors, new_vectors[append]])
+            self._write(vectors, {"ids": ids_all, "documents": docs_all, "metadatas": metas_all})
+            self._open()
+
+    def _write(self, vectors: np.ndarray, chunks: dict):
+        tmp = uuid.uuid4().hex
+        vectors_tmp = os.path.join(self.db_dir, f"{tmp}.npy")
+        chunks_tmp = os.path.join(self.db_dir, f"{tmp}.json")
+        np.save(vectors_tmp, vectors.astype(np.float32))
+        with open(chunks_tmp, "w", encoding="utf-8") as f:
+            json.dump(chunks, f, ensure_ascii=False)
+        os.replace(vectors_tmp, os.path.join(self.db_dir, VECTORS_FILE))
+        os.replace(chunks_tmp, os.path.join(self.db_dir, CHUNKS_FILE))
+
+    def sources(self) -> List[str]:
+        """Distinct legal sources in the index (metadata only, vectors are not read)."""
+        with self._lock:
+            return sorted({meta.get("source") for meta in self.metadatas if meta and meta.get("source")})
+
+    def delete_source(self, source: str) -> int:
+        """Removes every chunk of a legal source and rewrites both files. Returns the rows removed."""
+        with self._lock:
+            keep = [i for i, meta in enumerate(self.metadatas) if (meta or {}).get("source") != source]
+            removed = self.count() - len(keep)
+            if removed:
+                self._write(self.vectors[keep], {
+                    "ids": [self.ids[i] for i in keep],
+                    "documents": [self.documents[i] for i in keep],
+                    "metadatas": [self.metadatas[i] for i in keep]
+                })
+                self._open()
+            return removed
+
+    @contextmanager
+    def bulk_writer(self):
+        """
+        Batched loading (legal ingestion): rows are spooled to disk and the index
+        files are rebuilt once at the end, instead of rewriting them on every
+        batch. Nothing is written if the block raises.
+        """
+        writer = NumpyBulkWriter(self)
+        try:
+            yield writer
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def export(self) -> Tuple[List[str], List[str], List[dict], np.ndarray]:
+        with self._lock:
+            return list(self.ids), list(self.documents), list(self.metadatas), np.array(self.vectors, dtype=np.float32)
+
+    def query(self, query_embeddings, n_results: int = 2) -> Tuple[List[List[str]], List[List[str]], List[List[float]]]:
+        """
+        Exact top-k by cosine similarity for a batch of queries (one matrix product).
+        Returns (ids, documents, scores), one list per query.
+        """
+        with self._lock:
+            vectors, ids, documents = self.vectors, self.ids, self.documents
+        queries = normalize_rows(query_embeddings)
+        if not len(ids):
+            return [[] for _ in queries], [[] for _ in queries], [[] for _ in queries]
+
+        k = min(n_results, len(ids))
+        scores = queries @ vectors.T                       # (M, N)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        out_ids, out_docs, out_scores = [], [], []
+        for q, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[q, candidates])]
+            out_ids.append([ids[i] for i in ordered])
+            out_docs.append([documents[i] for i in ordered])
+            out_scores.append([float(scores[q, i]) for i in ordered])
+        return out_ids, out_docs, out_scores
+
+class NumpyBulkWriter:
+    """
+    Appends to a NumpyVectorStore through spool files (raw float32 rows plus one
+    JSON line per chunk); commit() copies the current index and the spool into
+    new files block by block, so memory does not grow with the index size.
+    """
+
+    def __init__(self, store: NumpyVectorStore):
+        self.store = store
+        spool = os.path.join(store.db_dir, uuid.uuid4().hex)
+        self.vectors_path = f"{spool}.vectors"
+        self.rows_path = f"{spool}.jsonl"
+        self._vectors = open(self.vectors_path, "wb")
+        self._rows = open(self.rows_path, "w", encoding="utf-8")
+        self.rows = 0
+        self.dim = store.vectors.shape[1] if store.count() else None
+
+    def upsert(self, ids: List[str], documents: List[str], embeddings, metadatas: Optional[List[dict]] = None):
+        vectors = normalize_rows(embeddings)
+        metadatas = metadatas or [{} for _ in ids]
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dim})")
+        self.dim = vectors.shape[1]
+        known = [i for i, chunk_id in enumerate(ids) if chunk_id in self.store._row]
+        if known:
+            # Chunks already in the index are replaced in place (e.g. re-ingesting a source)
+            self.store.upsert([ids[i] for i in known], [documents[i] for i in known],
+                              vectors[known], [metadatas[i] for i in known])
+        for i, chunk_id in enumerate(ids):
+            if chunk_id in self.store._row:
+                continue
+            self._vectors.write(vectors[i].tobytes())
+            self._rows.write(json.dumps([chunk_id, documents[i], metadatas[i]], ensure_ascii=False) + "\n")
+            self.rows += 1
+
+    def _spooled(self, field: int):
+        with open(self.rows_path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)[field]
+
+    def _write_list(self, f, existing: List, field: int):
+        """JSON list of the index's current values followed by the spooled ones."""
+        f.write("[")
+        for n, value in enumerate(itertools.chain(existing, self._spooled(field))):
+            if n:
+                f.write(", ")
+            json.dump(value, f, ensure_ascii=False)
+        f.write("]")
+
+    def commit(self):
+        self._vectors.close()
+        self._rows.close()
+        store = self.store
+        tmp = os.path.join(store.db_dir, uuid.uuid4().hex)
+        try:
+            if not self.rows:
+                return
+            with store._lock:
+                current = store.count()
+                out = np.lib.format.open_memmap(f"{tmp}.npy", mode="w+", dtype=np.float32,
+                                                shape=(current + self.rows, self.dim))
+                for start in range(0, current, COPY_ROWS):
+                    end = min(start + COPY_ROWS, current)
+                    out[start:end] = store.vectors[start:end]
+                spooled = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+                for start in range(0, self.rows, COPY_ROWS):
+                    end = min(start + COPY_ROWS, self.rows)
+                    out[current + start:current + end] = spooled[start:end]
+                out.flush()
+                del out, spooled
+
+                with open(f"{tmp}.json", "w", encoding="utf-8") as f:
+                    for n, (key, existing) in enumerate(
+                            (("ids", store.ids), ("documents", store.documents), ("metadatas", store.metadatas))):
+                        f.write(("{" if n == 0 else ", ") + json.dumps(key) + ": ")
+                        self._write_list(f, existing, n)
+                    f.write("}")
+                os.replace(f"{tmp}.npy", os.path.join(store.db_dir, VECTORS_FILE))
+                os.replace(f"{tmp}.json", os.path.join(store.db_dir, CHUNKS_FILE))
+                store._open()
+        finally:
+            self.discard()
+            for path in (f"{tmp}.npy", f"{tmp}.json"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def discard(self):
+        for handle in (self._vectors, self._rows):
+            handle.close()
+        for path in (self.vectors_path, self.rows_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+class ChromaVectorStore:
+    """The original persistent Chroma collection, behind the same interface."""
+
+    def __init__(self, db_dir: str, embedding_function=None, collection_name: str = "legal_framework"):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=db_dir)
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=embedding_function
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def upsert(self, ids: List[str], documents: List[str], embeddings, metadatas: Optional[List[dict]] = None):
+        self.collection.upsert(documents=documents, embeddings=embeddings, ids=ids, metadatas=metadatas)
+
+    def sources(self) -> List[str]:
+        data = self.collection.get(include=["metadatas"])
+        return sorted({meta.get("source") for meta in data["metadatas"] if meta and meta.get("source")})
+
+    def delete_source(self, source: str) -> int:
+        before = self.collection.count()
+        self.collection.delete(where={"source": source})
+        return before - self.collection.count()
+
+    @contextmanager
+    def bulk_writer(self):
+        # Every batch is upserted as it arrives (Chroma also caps the size of a single upsert)
+        yield self
+
+    def export(self) -> Tuple[List[str], List[str], List[dict], np.ndarray]:
+        data = self.collection.get(include=["documents", "metadatas", "embeddings"])
+        return data["ids"], data["documents"], data["metadatas"], np.asarray(data["embeddings"], dtype=np.float32)
+
+    def query(self, query_embeddings, n_results: int = 2) -> Tuple[List[List[str]], List[List[str]], List[List[float]]]:
+        results = self.collection.query(query_embeddings=query_embeddings, n_results=n_results)
+        if not results['documents']:
+            return [], [], []
+        return results['ids'], results['documents'], results.get('distances') or [[] for _ in results['ids']]
+
+def create_vector_store(backend: str, db_dir: str, embedding_function=None, namespace: str = ""):
+    """namespace separates indexes built with different embedding models."""
+    suffix = f"_{namespace}" if namespace else ""
+    if backend == "numpy":
+        return NumpyVectorStore(os.path.join(db_dir, f"numpy{suffix}"))
+    if backend == "chroma":
+        return ChromaVectorStore(db_dir, embedding_function, collection_name=f"legal_framework{suffix}")
+    raise ValueError(f"Unknown RAG backend: {backend}")
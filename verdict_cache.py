@@ -0,0 +1,57 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from vector_index import normalize_rows
+
+# Semantic verdict cache for one audit run. Checklists repeat the same check
+# in different words across chapters; when a requirement is routed to exactly
+# the same evidence (same evidence_hash: files, their contents and page ranges)
+# with the same retrieved legal basis (same legal_hash) as an already-audited
+# one, and its requirement + criteria embed within
+# SEMANTIC_CACHE_THRESHOLD cosine similarity, the earlier verdict is reused
+# instead of a new Auditor call. With SEMANTIC_CACHE_MODE = "confirm" a cheap
+# VerdictCheckerAgent call must agree first.
+
+def cache_text(item: dict) -> str:
+    return f"{item['requirement']}\n{item.get('criteria', '')}"
+
+class VerdictCache:
+    def __init__(self, embed: Callable[[List[str]], object], checker=None,
+                 threshold: float = config.SEMANTIC_CACHE_THRESHOLD):
+        self.embed = embed
+        self.checker = checker            # VerdictCheckerAgent, or None to reuse without a check
+        self.threshold = threshold
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._entries: Dict[Tuple[str, str], List[Tuple[np.ndarray, dict, dict]]] = {}   # (evidence_hash, legal_hash) -> (vector, item, result)
+        self._lock = threading.Lock()
+
+    def vector(self, item: dict) -> np.ndarray:
+        with self._lock:
+            if item['id'] in self._vectors:
+                return self._vectors[item['id']]
+        vector = normalize_rows(self.embed([cache_text(item)]))[0]
+        with self._lock:
+            self._vectors[item['id']] = vector
+        return vector
+
+    def lookup(self, item: dict, evidence_hash: str, legal_hash: str) -> Optional[Tuple[dict, dict, float]]:
+        """(cached item, its result, similarity) of the closest verdict on the same evidence and legal basis, if close enough."""
+        with self._lock:
+            candidates = list(self._entries.get((evidence_hash, legal_hash), []))
+        if not candidates:
+            return None
+        vector = self.vector(item)
+        scores = [float(np.dot(vector, cached_vector)) for cached_vector, _, _ in candidates]
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        _, cached_item, cached_result = candidates[best]
+        return cached_item, cached_result, scores[best]
+
+    def add(self, item: dict, evidence_hash: str, legal_hash: str, result: dict):
+        vector = self.vector(item)
+        with self._lock:
+            self._entries.setdefault((evidence_hash, legal_hash), []).append((vector, item, result))
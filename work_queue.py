@@ -0,0 +1,522 @@
+import os
+import sys
+import glob
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import datetime
+import threading
+import subprocess
+from typing import List, Dict, Optional, Callable, Tuple
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+import config
+import resources
+from agents import configure_genai
+from logger import AuditLogger, RUN_STORE_FILENAME
+from run_store import RunStore
+from tracing import tracer
+from pipeline import ingest_legal_framework, catalog_files, skip_near_duplicates, audit_requirement, new_result
+
+# Durable SQLite work queue for large checklist runs.
+#
+# A coordinator enqueues one "catalog" task per PDF and then one "audit" task per
+# requirement; worker processes (on this host or on others sharing the folder)
+# claim tasks under a lease, renew it while they work and record the result.
+# A task whose lease runs out (dead or hung worker) is claimed again, up to
+# QUEUE_MAX_ATTEMPTS times. Each attempt logs to the shared RunStore under its
+# own attempt id; the coordinator adopts the rows of the attempt that completed
+# into its run, so the run ends up as one AuditLogger session with one set of
+# CSVs and a late, superseded attempt cannot add duplicate rows.
+#
+#   python work_queue.py coordinate data/proyecto_eia --workers 4
+#   python work_queue.py work                # on every extra host / process
+#   python work_queue.py status
+
+# --- QUEUE ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_runs (
+    run_id TEXT PRIMARY KEY,
+    pdf_dir TEXT,
+    store_path TEXT,
+    project_index TEXT,
+    status TEXT,
+    created TEXT
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES queue_runs(run_id),
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    attempt_run TEXT,
+    result TEXT,
+    error TEXT,
+    UNIQUE (run_id, kind, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, lease_until);
+CREATE INDEX IF NOT EXISTS idx_tasks_run ON tasks (run_id, kind);
+"""
+
+class WorkQueue:
+    """Tasks with leases in a SQLite file; safe to open from many processes."""
+
+    def __init__(self, db_path: str = config.QUEUE_DB, journal_mode: str = config.SQLITE_JOURNAL_MODE,
+                 lease_seconds: float = config.QUEUE_LEASE_SECONDS, max_attempts: int = config.QUEUE_MAX_ATTEMPTS):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit; claims open their own IMMEDIATE transaction
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.executescript(SCHEMA)
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    # --- COORDINATOR SIDE ---
+    def create_run(self, run_id: str, pdf_dir: str, store_path: str):
+        self._execute(
+            "INSERT OR IGNORE INTO queue_runs (run_id, pdf_dir, store_path, status, created) VALUES (?, ?, ?, 'running', ?)",
+            (run_id, pdf_dir, store_path, datetime.datetime.now().isoformat(timespec="seconds"))
+        )
+
+    def set_project_index(self, run_id: str, project_index: List[dict]):
+        self._execute("UPDATE queue_runs SET project_index = ? WHERE run_id = ?",
+                      (json.dumps(project_index, ensure_ascii=False), run_id))
+
+    def finish_run(self, run_id: str, status: str = "finished"):
+        """Stops handing out the run's remaining tasks."""
+        self._execute("UPDATE queue_runs SET status = ? WHERE run_id = ?", (status, run_id))
+
+    def enqueue(self, run_id: str, kind: str, tasks: List[Tuple[str, dict]]):
+        """tasks: (key, payload) pairs; a key already queued for the run is ignored."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tasks (run_id, kind, key, payload) VALUES (?, ?, ?, ?)",
+                    [(run_id, kind, key, json.dumps(payload, ensure_ascii=False)) for key, payload in tasks]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def progress(self, run_id: str, kind: Optional[str] = None) -> Dict[str, int]:
+        sql = "SELECT status, COUNT(*) AS n FROM tasks WHERE run_id = ?"
+        params = [run_id]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        return {row["status"]: row["n"] for row in self._query(sql + " GROUP BY status", tuple(params))}
+
+    def finished_tasks(self, run_id: str, kind: str) -> List[dict]:
+        """Tasks that are done or failed for good, in enqueue order."""
+        rows = self._query(
+            "SELECT * FROM tasks WHERE run_id = ? AND kind = ? AND status IN ('done', 'failed') ORDER BY task_id",
+            (run_id, kind)
+        )
+        return [
+            {"task_id": row["task_id"], "key": row["key"], "status": row["status"], "attempt_run": row["attempt_run"],
+             "payload": json.loads(row["payload"]), "result": json.loads(row["result"]) if row["result"] else None,
+             "error": row["error"], "attempts": row["attempts"]}
+            for row in rows
+        ]
+
+    def project_index(self, run_id: str) -> List[dict]:
+        rows = self._query("SELECT project_index FROM queue_runs WHERE run_id = ?", (run_id,))
+        return json.loads(rows[0]["project_index"] or "[]") if rows else []
+
+    def runs(self) -> List[sqlite3.Row]:
+        return self._query("SELECT * FROM queue_runs ORDER BY created DESC")
+
+    # --- WORKER SIDE ---
+    def claim(self, worker: str) -> Optional[dict]:
+        """Leases the oldest available task of a running run (pending, or with an expired lease)."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that used up their attempts are not handed out again
+                self.conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired') "
+                    "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (now, self.max_attempts)
+                )
+                row = self.conn.execute(
+                    "SELECT t.*, r.pdf_dir, r.store_path FROM tasks t JOIN queue_runs r ON r.run_id = t.run_id "
+                    "WHERE r.status = 'running' "
+                    "AND (t.status = 'pending' OR (t.status = 'leased' AND t.lease_until < ?)) "
+                    "ORDER BY t.task_id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                        "attempt_run = ? WHERE task_id = ?",
+                        (worker, now + self.lease_seconds, f"{row['run_id']}.{row['task_id']}.{row['attempts'] + 1}",
+                         row["task_id"])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        task = dict(row)
+        task["payload"] = json.loads(task["payload"])
+        task["attempts"] += 1
+        task["attempt_run"] = f"{task['run_id']}.{task['task_id']}.{task['attempts']}"
+        return task
+
+    def expire_leases(self, run_id: str) -> int:
+        """
+        Tasks of run_id whose lease ran out (their worker died) go back to pending,
+        or are marked failed once they used up their attempts. claim() only does
+        this while some worker is still polling; the coordinator calls it too.
+        Returns the number of tasks changed.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self.conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired') "
+                    "WHERE run_id = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (run_id, now, self.max_attempts)
+                ).rowcount
+                requeued = self.conn.execute(
+                    "UPDATE tasks SET status = 'pending', worker = NULL "
+                    "WHERE run_id = ? AND status = 'leased' AND lease_until < ?",
+                    (run_id, now)
+                ).rowcount
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return failed + requeued
+
+    def renew(self, task_id: int, worker: str) -> bool:
+        """Extends the lease; False if the task was meanwhile given to another worker."""
+        return self._execute(
+            "UPDATE tasks SET lease_until = ? WHERE task_id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, task_id, worker)
+        ) == 1
+
+    def complete(self, task_id: int, worker: str, result: dict) -> bool:
+        return self._execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL, lease_until = NULL "
+            "WHERE task_id = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(result, ensure_ascii=False), task_id, worker)
+        ) == 1
+
+    def fail(self, task_id: int, worker: str, error: str) -> bool:
+        """Returns the task to the queue, or marks it failed once its attempts are used up."""
+        return self._execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_until = NULL WHERE task_id = ? AND worker = ? AND status = 'leased'",
+            (self.max_attempts, error, task_id, worker)
+        ) == 1
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# --- WORKER ---
+class QueueWorker:
+    """Claims and runs tasks until stopped (or idle for `idle_exit` seconds)."""
+
+    def __init__(self, queue: WorkQueue, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stores: Dict[str, RunStore] = {}
+        self._project_indexes: Dict[str, List[dict]] = {}
+
+    def attempt_logger(self, task: dict) -> AuditLogger:
+        """Logger writing this attempt's rows to the coordinator's run store."""
+        store_path = task["store_path"]
+        if store_path not in self._stores:
+            self._stores[store_path] = RunStore(store_path, journal_mode=config.SQLITE_JOURNAL_MODE)
+        return AuditLogger(output_dir=os.path.dirname(store_path) or ".", store=self._stores[store_path],
+                           run_id=task["attempt_run"])
+
+    def process(self, task: dict) -> dict:
+        audit_logger = self.attempt_logger(task)
+        if task["kind"] == "catalog":
+            project_index, cost = catalog_files(resources.get_cataloger(), [task["payload"]["path"]], audit_logger)
+            return {"entry": project_index[0] if project_index else None, "cost": cost}
+
+        run_id = task["run_id"]
+        if run_id not in self._project_indexes:
+            self._project_indexes[run_id] = self.queue.project_index(run_id)
+        return audit_requirement(
+            task["payload"]["item"], self._project_indexes[run_id], resources.get_router(), resources.get_auditor(),
+            resources.get_legal_rag(), audit_logger, task["pdf_dir"]
+        )
+
+    def _keep_leased(self, task: dict, stop: threading.Event):
+        while not stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.renew(task["task_id"], self.worker_id):
+                return
+
+    def run(self, idle_exit: Optional[float] = None, on_task: Optional[Callable[[dict, str], None]] = None):
+        configure_genai()
+
+        idle_since = time.time()
+        while True:
+            task = self.queue.claim(self.worker_id)
+            if task is None:
+                if idle_exit is not None and time.time() - idle_since > idle_exit:
+                    return
+                time.sleep(config.QUEUE_POLL_SECONDS)
+                continue
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._keep_leased, args=(task, stop), daemon=True)
+            heartbeat.start()
+            try:
+                result = self.process(task)
+                outcome = "done" if self.queue.complete(task["task_id"], self.worker_id, result) else "lost lease"
+            except Exception as e:
+                self.queue.fail(task["task_id"], self.worker_id, f"{type(e).__name__}: {e}")
+                outcome = "error"
+            finally:
+                stop.set()
+                heartbeat.join()
+            if on_task:
+                on_task(task, outcome)
+            idle_since = time.time()
+
+# --- COORDINATOR ---
+def wait_for(queue: WorkQueue, run_id: str, kind: str, on_task: Optional[Callable[[dict], None]] = None,
+             ensure_workers: Optional[Callable[[], None]] = None) -> List[dict]:
+    """
+    Blocks until every task of `kind` is done or failed; on_task gets each as it
+    finishes. Expired leases are requeued here, and ensure_workers is called
+    while tasks are pending, so a crashed worker cannot leave the run waiting forever.
+    """
+    seen = set()
+    while True:
+        queue.expire_leases(run_id)
+        # Counted before listing, so a task finishing in between is still reported
+        counts = queue.progress(run_id, kind)
+        finished = queue.finished_tasks(run_id, kind)
+        for task in finished:
+            if task["task_id"] not in seen:
+                seen.add(task["task_id"])
+                if on_task:
+                    on_task(task)
+        if not counts.get("pending") and not counts.get("leased"):
+            return finished
+        if counts.get("pending") and ensure_workers:
+            ensure_workers()
+        time.sleep(config.QUEUE_POLL_SECONDS)
+
+def coordinate(queue: WorkQueue, checklist: List[dict], pdf_dir: str, audit_logger,
+               project_index: Optional[List[dict]] = None,
+               on_catalog: Optional[Callable[[dict], None]] = None,
+               on_result: Optional[Callable[[dict], None]] = None,
+               pdf_paths: Optional[List[str]] = None,
+               ensure_workers: Optional[Callable[[], None]] = None) -> Tuple[List[dict], float, List[dict]]:
+    """
+    Runs catalog (unless project_index is given) and audit tasks through the queue
+    into audit_logger's run. Catalogs pdf_paths (default: every PDF in pdf_dir).
+    ensure_workers (see wait_for) restarts local workers that have exited.
+    Returns (project_index, catalog_cost, results), results in checklist order;
+    requirements whose task failed come back with status ERROR.
+    """
+    run_id = audit_logger.run_id
+    pdf_dir = os.path.abspath(pdf_dir)
+    queue.create_run(run_id, pdf_dir, os.path.abspath(audit_logger.store.db_path))
+
+    def adopt(task: dict):
+        # Only the attempt that completed the task contributes rows to the run
+        if task["status"] == "done":
+            audit_logger.store.adopt_run(task["attempt_run"], run_id)
+
+    def on_catalog_task(task: dict):
+        adopt(task)
+        if on_catalog:
+            on_catalog(task)
+
+    catalog_cost = 0.0
+    if project_index is None:
+        if pdf_paths is None:
+            pdf_paths = sorted(glob.glob(os.path.join(pdf_dir, "*.pdf")))
+        pdf_paths = [os.path.abspath(p) for p in pdf_paths]
+        queue.enqueue(run_id, "catalog", [(os.path.basename(p), {"path": p}) for p in pdf_paths])
+        project_index = []
+        for task in wait_for(queue, run_id, "catalog", on_catalog_task, ensure_workers):
+            if task["result"] and task["result"]["entry"]:
+                project_index.append(task["result"]["entry"])
+                catalog_cost += task["result"]["cost"]
+    queue.set_project_index(run_id, project_index)
+
+    items = {item["id"]: item for item in checklist}
+    queue.enqueue(run_id, "audit", [(item["id"], {"item": item}) for item in checklist])
+
+    def task_result(task: dict) -> dict:
+        if task["result"] is not None:
+            return task["result"]
+        result = new_result(items[task["key"]])
+        result["reasoning"] = task["error"] or "N/A"
+        return result
+
+    def on_audit_task(task: dict):
+        adopt(task)
+        if on_result:
+            on_result(task_result(task))
+
+    results_by_id = {task["key"]: task_result(task) for task in wait_for(queue, run_id, "audit", on_audit_task, ensure_workers)}
+    queue.finish_run(run_id)
+
+    order = [item["id"] for item in checklist]
+    audit_logger.export_csvs(order)
+    return project_index, catalog_cost, [results_by_id[req_id] for req_id in order]
+
+def spawn_workers(count: int, queue_path: str, idle_exit: float = 30.0) -> List[subprocess.Popen]:
+    """Local worker processes; they exit on their own once the queue stays empty."""
+    command = [sys.executable, os.path.abspath(__file__), "--queue", queue_path, "work", "--idle-exit", str(idle_exit)]
+    return [subprocess.Popen(command) for _ in range(count)]
+
+# --- CLI ---
+console = Console()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed catalog/audit work queue.")
+    parser.add_argument("--queue", default=config.QUEUE_DB, help="Queue database (shared by all workers)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coord = commands.add_parser("coordinate", help="Queue a full audit of a folder and wait for it")
+    coord.add_argument("pdf_dir", help="Folder with the EIA PDFs (same path on every worker host)")
+    coord.add_argument("--workers", type=int, default=0, help="Local worker processes to start")
+
+    work = commands.add_parser("work", help="Process tasks from the queue")
+    work.add_argument("--idle-exit", type=float, default=None, help="Exit after this many idle seconds")
+
+    commands.add_parser("status", help="Task counts per run")
+    args = parser.parse_args(argv)
+    queue_path = args.queue
+    queue = WorkQueue(queue_path)
+
+    if args.command == "work":
+        worker = QueueWorker(queue)
+        console.print(f"[bold]Worker {worker.worker_id}[/bold] on {queue_path}")
+        worker.run(
+            idle_exit=args.idle_exit,
+            on_task=lambda task, outcome: console.print(f"[dim]{task['kind']} {task['key']}: {outcome}[/dim]")
+        )
+        return
+
+    if args.command == "status":
+        table = Table(title="Work Queue", box=box.SIMPLE)
+        for col in ["Run", "Status", "Created", "Pending", "Leased", "Done", "Failed"]:
+            table.add_column(col)
+        for run in queue.runs():
+            counts = queue.progress(run["run_id"])
+            table.add_row(run["run_id"], run["status"], run["created"],
+                          *[str(counts.get(s, 0)) for s in ("pending", "leased", "done", "failed")])
+        console.print(table)
+        return
+
+    start = time.time()
+    run_start = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    store = RunStore(os.path.join(resources.LOGS_DIR, RUN_STORE_FILENAME), journal_mode=config.SQLITE_JOURNAL_MODE)
+    audit_logger = AuditLogger(output_dir=resources.LOGS_DIR, store=store)
+
+    with open(config.CHECKLIST_FILE, "r", encoding="utf-8") as f:
+        checklist = json.load(f)
+
+    # Index the legal framework once, before workers start retrieving from it
+    with console.status("[bold blue]Indexing Legal Documents...[/bold blue]"):
+        legal_filenames = ingest_legal_framework(resources.get_legal_rag(), config.LEGAL_DIR)
+
+    project_index, pdf_paths, duplicate_groups = None, None, []
+    if os.path.exists(config.INDEX_FILE) and not config.FORCE_REINDEX:
+        with open(config.INDEX_FILE, "r") as f:
+            project_index = json.load(f) or None
+    if project_index is None:
+        # Near-duplicates are dropped before any catalog task is queued
+        pdf_paths, duplicate_groups = skip_near_duplicates(sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf"))))
+        for group in duplicate_groups:
+            console.print(f"[yellow]≈ Near-duplicates of {group['representative']} skipped: "
+                          f"{', '.join(d['filename'] for d in group['duplicates'])}[/yellow]")
+    elif os.path.exists(config.DUPLICATES_FILE):
+        with open(config.DUPLICATES_FILE, "r") as f:
+            duplicate_groups = json.load(f)
+
+    workers = spawn_workers(args.workers, queue_path) if args.workers else []
+
+    def ensure_workers():
+        # Local workers idle-exit; if they all did while tasks are pending again
+        # (e.g. requeued from a crashed worker), start a fresh set
+        if workers and all(process.poll() is not None for process in workers):
+            console.print("[yellow]Local workers exited with tasks pending; restarting them[/yellow]")
+            workers[:] = spawn_workers(args.workers, queue_path)
+    console.print(f"[bold]Run {audit_logger.run_id}[/bold]: {len(checklist)} requirements, "
+                  f"{len(workers)} local worker(s); start more with: python work_queue.py --queue {queue_path} work")
+    try:
+        project_index, catalog_cost, results = coordinate(
+            queue, checklist, args.pdf_dir, audit_logger, project_index,
+            on_catalog=lambda task: console.print(f"[green]✓ Indexed: {task['key']} ({task['status']})[/green]"),
+            on_result=lambda result: console.print(f"{result['id']}: {result['status']}"),
+            pdf_paths=pdf_paths, ensure_workers=ensure_workers
+        )
+    finally:
+        for process in workers:
+            process.terminate()
+
+    if not os.path.exists(config.INDEX_FILE) or config.FORCE_REINDEX:
+        with open(config.INDEX_FILE, "w") as f:
+            json.dump(project_index, f, indent=2)
+        with open(config.DUPLICATES_FILE, "w") as f:
+            json.dump(duplicate_groups, f, indent=2)
+
+    total_cost = catalog_cost + sum(r["cost"] for r in results)
+    metadata = {
+        "run_start": run_start,
+        "run_end": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_duration_seconds": round(time.time() - start, 2),
+        "total_cost_estimated_usd": round(total_cost, 6),
+        "input_folder": args.pdf_dir,
+        "files_analyzed": [entry['filename'] for entry in project_index],
+        "duplicate_groups": duplicate_groups,
+        "legal_files_used": legal_filenames,
+        "legal_version": config.LEGAL_VERSION,
+        "work_queue": {"path": queue_path, "local_workers": len(workers), "progress": queue.progress(audit_logger.run_id)},
+        "configuration": {
+            "model_cataloger": config.MODEL_CATALOGER,
+            "model_router": config.MODEL_ROUTER,
+            "model_auditor": config.MODEL_AUDITOR,
+            "rate_limit": config.RATE_LIMIT_CALLS
+        },
+        "stage_latency_seconds": tracer.summary()
+    }
+    audit_logger.log_metadata(metadata)
+    console.print(f"[bold green]Audit Complete. Logs saved to {resources.LOGS_DIR}/[/bold green]")
+    console.print(f"Total Cost: ${total_cost:.4f}")
+
+if __name__ == "__main__":
+    main()